@@ -113,6 +113,11 @@ async def get_routing_strategies() -> Dict[str, Any]:
             "description": "平衡模式：综合考虑成本、性能和可用性",
             "use_case": "适合大多数场景的默认策略",
         },
+        {
+            "name": "least_connections",
+            "description": "最少连接：选择进行中请求最少的适配器",
+            "use_case": "适合请求耗时差异较大的高并发场景",
+        },
         {
             "name": "manual",
             "description": "手动模式：使用指定的适配器",
@@ -150,24 +150,4 @@ async def get_trace(
         raise HTTPException(status_code=404, detail="追踪不存在")
     
     # 转换为字典格式
-    return {
-        "trace_id": trace.trace_id,
-        "start_time": trace.start_time.isoformat(),
-        "end_time": trace.end_time.isoformat() if trace.end_time else None,
-        "total_duration": trace.total_duration,
-        "metadata": trace.metadata,
-        "spans": [
-            {
-                "span_id": span.span_id,
-                "parent_span_id": span.parent_span_id,
-                "operation": span.operation,
-                "start_time": span.start_time.isoformat(),
-                "end_time": span.end_time.isoformat() if span.end_time else None,
-                "duration": span.duration,
-                "tags": span.tags,
-                "logs": span.logs,
-                "error": span.error,
-            }
-            for span in trace.spans
-        ],
-    }
+    return trace.to_dict()
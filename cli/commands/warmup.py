@@ -0,0 +1,27 @@
+"""
+模块名称：CLI编码器预加载命令模块
+功能描述：预加载tiktoken编码器，供构建镜像时把编码文件缓存到镜像中
+创建日期：2026-01-25
+最后更新：2026-01-25
+维护者：AI框架团队
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+from tiktoken.model import MODEL_TO_ENCODING
+
+from core.llm.utils.token_counter import TokenCounter
+
+
+def main(models: Optional[List[str]] = None) -> None:
+    """
+    预加载Token编码器
+
+    参数：
+        models: 模型名称列表（可选，不传则预加载tiktoken已知的全部模型）
+    """
+    models = models or list(MODEL_TO_ENCODING)
+    TokenCounter().preload(models)
+    print(f"已预加载 {len(models)} 个模型的编码器")
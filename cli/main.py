@@ -11,6 +11,7 @@ from __future__ import annotations
 import argparse
 
 from cli.commands.chat import main as chat_main
+from cli.commands.warmup import main as warmup_main
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -22,6 +23,9 @@ def build_parser() -> argparse.ArgumentParser:
     chat_parser.add_argument("--env", default="dev", help="配置环境：dev/prod")
     chat_parser.add_argument("--model", default=None, help="模型名称（可选）")
 
+    warmup_parser = subparsers.add_parser("warmup-tokenizer", help="预加载Token编码器（构建镜像时执行）")
+    warmup_parser.add_argument("--models", nargs="*", default=None, help="模型名称（可选，默认为tiktoken已知的全部模型）")
+
     return parser
 
 
@@ -33,6 +37,10 @@ def main(argv: list[str] | None = None) -> None:
         chat_main(env=args.env, model=args.model)
         return
 
+    if args.command == "warmup-tokenizer":
+        warmup_main(models=args.models)
+        return
+
     parser.error(f"未知命令: {args.command}")
 
 
@@ -111,7 +111,10 @@ class AgentEngine(BaseService):
             
             # 初始化短期记忆
             max_messages = self._config.get("agent", {}).get("max_messages")
-            self._short_term_memory = ShortTermMemory(max_messages=max_messages)
+            self._short_term_memory = ShortTermMemory(
+                max_messages=max_messages,
+                token_counter=self._llm_service.get_token_counter(),
+            )
             
             # 初始化长期记忆（如果启用）
             if self._enable_long_term_memory:
@@ -18,9 +18,12 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
 from core.llm.context import ConversationContext
 
+if TYPE_CHECKING:
+    from core.llm.utils.token_counter import TokenCounter
+
 # 向量后端类型，避免循环导入
 try:
     from infrastructure.storage.vector_db import BaseVectorBackend
@@ -51,14 +54,22 @@ class ShortTermMemory:
         >>> messages = memory.get_messages()
     """
     
-    def __init__(self, max_messages: Optional[int] = None) -> None:
+    def __init__(
+        self,
+        max_messages: Optional[int] = None,
+        token_counter: Optional[TokenCounter] = None,
+    ) -> None:
         """
         初始化短期记忆
         
         参数:
             max_messages: 最大消息数量（可选，None表示无限制）
+            token_counter: Token计数器（可选，通常为LLMService共享的计数器）
         """
-        self._context: ConversationContext = ConversationContext(max_messages=max_messages)
+        self._context: ConversationContext = ConversationContext(
+            max_messages=max_messages,
+            token_counter=token_counter,
+        )
     
     def add_message(self, role: str, content: str) -> None:
         """
@@ -11,12 +11,14 @@
 依赖模块：
     - core.base.adapter: 适配器基类
     - typing: 类型注解
+    - core.llm.utils.json_body: 请求体序列化
 """
 
 from abc import abstractmethod
-from typing import List, Dict, Any, Optional, AsyncIterator, TYPE_CHECKING
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple, TYPE_CHECKING
 from core.base.adapter import BaseAdapter
 from core.llm.models import LLMResponse, ModelCapability
+from core.llm.utils.json_body import json_request_kwargs
 
 if TYPE_CHECKING:
     from core.llm.connection_pool import ConnectionPoolManager
@@ -60,8 +62,12 @@ class BaseLLMAdapter(BaseAdapter):
         """
         super().__init__(config)
         self._capability: Optional[ModelCapability] = None
+        # (能力标签, 位掩码) 缓存，路由按能力过滤时不必每次重新计算掩码
+        self._capability_mask: Optional[Tuple[ModelCapability, int]] = None
         self._cost_per_1k_tokens: Optional[Dict[str, float]] = None  # {input: cost, output: cost}
         self._connection_pool: Optional["ConnectionPoolManager"] = connection_pool
+        # 服务的全局配置（如llm.timeout），由注册表在初始化前设置
+        self._global_config: Dict[str, Any] = {}
     
     @property
     @abstractmethod
@@ -136,6 +142,66 @@ class BaseLLMAdapter(BaseAdapter):
         )
         yield response
     
+    @property
+    def supports_prompt_cache(self) -> bool:
+        """
+        是否支持显式提示词缓存标记
+        
+        返回True时，服务会在chat指定cache_prefix_boundary的请求中为稳定前缀的
+        最后一条消息添加cache_control字段，由适配器转换为提供商的缓存断点格式。
+        
+        返回:
+            默认False
+        """
+        return False
+    
+    @property
+    def supports_prebuilt_payload(self) -> bool:
+        """
+        是否支持预先构建的请求体
+        
+        返回True时，服务对同一适配器的多次重试只调用一次build_payload，
+        之后通过call的prebuilt_payload参数复用序列化好的请求体。
+        
+        返回:
+            默认False
+        """
+        return False
+    
+    def build_payload(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """
+        构建并序列化请求体
+        
+        默认按OpenAI兼容的chat/completions格式构建；请求格式不同的适配器应重写此方法，
+        或保持supports_prebuilt_payload为False。
+        
+        参数:
+            messages: 消息列表
+            model: 模型名称
+            temperature: 温度参数
+            max_tokens: 最大token数
+            **kwargs: 其他参数，合并到请求体
+        
+        返回:
+            可直接展开传给httpx请求的关键字参数
+        """
+        request_data: Dict[str, Any] = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+        }
+        if max_tokens:
+            request_data["max_tokens"] = max_tokens
+        request_data.update(kwargs)
+        return json_request_kwargs(request_data)
+    
     def get_capability(self) -> Optional[ModelCapability]:
         """
         获取模型能力标签
@@ -153,6 +219,24 @@ class BaseLLMAdapter(BaseAdapter):
             capability: 模型能力标签
         """
         self._capability = capability
+        self._capability_mask = (capability, capability.to_mask())
+    
+    def get_capability_mask(self) -> Optional[int]:
+        """
+        获取模型能力位掩码（首次访问时计算并缓存）
+        
+        返回:
+            能力位掩码，未设置能力标签时返回None
+        """
+        capability = self.get_capability()
+        if capability is None:
+            return None
+        cached = self._capability_mask
+        if cached is not None and cached[0] is capability:
+            return cached[1]
+        mask = capability.to_mask()
+        self._capability_mask = (capability, mask)
+        return mask
     
     def get_cost_per_1k_tokens(self, model: str) -> Optional[Dict[str, float]]:
         """
@@ -181,4 +265,15 @@ class BaseLLMAdapter(BaseAdapter):
         self._cost_per_1k_tokens = {
             "input": input_cost,
             "output": output_cost,
-        }
\ No newline at end of file
+        }
+    
+    def set_global_config(self, global_config: Dict[str, Any]) -> None:
+        """
+        设置服务的全局配置
+        
+        适配器可从中读取超时等全局设置，适配器自身的配置字典保持不变。
+        
+        参数:
+            global_config: 全局配置字典
+        """
+        self._global_config = global_config
\ No newline at end of file
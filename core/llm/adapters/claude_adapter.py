@@ -22,7 +22,8 @@ from httpx import AsyncClient, HTTPError
 
 from core.base.adapter import AdapterCallError
 from core.llm.adapters.base import BaseLLMAdapter
-from core.llm.models import ModelCapability
+from core.llm.models import ModelCapability, ROLE_SYSTEM
+from core.llm.utils.json_body import json_request_kwargs
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -62,6 +63,10 @@ class ClaudeAdapter(BaseLLMAdapter):
     def provider(self) -> str:
         return "claude"
 
+    @property
+    def supports_prompt_cache(self) -> bool:
+        return True
+
     async def initialize(self, config: Optional[Dict[str, Any]] = None) -> None:
         if config:
             self._config.update(config)
@@ -114,26 +119,47 @@ class ClaudeAdapter(BaseLLMAdapter):
 
         await super().initialize()
 
-    def _extract_system_prompt(self, messages: List[Dict[str, str]]) -> tuple[Optional[str], List[Dict[str, str]]]:
+    def _extract_system_prompt(self, messages: List[Dict[str, Any]]) -> tuple[Optional[Any], List[Dict[str, Any]]]:
         """
         Claude Messages API将system作为顶层字段。
 
         约定：
             - 如果messages中包含role=system的消息，则合并为system字段
             - 其余消息按原样传递
+            - 带cache_control的消息转换为文本内容块并在该块上设置缓存断点
+              （system字段此时为内容块列表）
         """
         system_parts: List[str] = []
-        remaining: List[Dict[str, str]] = []
+        system_cache_control: Optional[Dict[str, Any]] = None
+        remaining: List[Dict[str, Any]] = []
         for m in messages:
             role = m.get("role")
-            if role == "system":
+            cache_control = m.get("cache_control")
+            if role == ROLE_SYSTEM:
                 content = m.get("content") or ""
                 if content:
                     system_parts.append(content)
+                if cache_control:
+                    system_cache_control = cache_control
+            elif cache_control:
+                message = {key: value for key, value in m.items() if key != "cache_control"}
+                content = m.get("content") or ""
+                if isinstance(content, str):
+                    blocks = [{"type": "text", "text": content}]
+                else:
+                    blocks = [dict(block) for block in content]
+                if blocks:
+                    blocks[-1]["cache_control"] = cache_control
+                message["content"] = blocks
+                remaining.append(message)
             else:
                 remaining.append(m)
 
-        system_prompt = "\n".join(system_parts) if system_parts else None
+        system_prompt: Optional[Any] = "\n".join(system_parts) if system_parts else None
+        if system_prompt and system_cache_control:
+            system_prompt = [
+                {"type": "text", "text": system_prompt, "cache_control": system_cache_control}
+            ]
         return system_prompt, remaining
 
     async def call(
@@ -162,7 +188,7 @@ class ClaudeAdapter(BaseLLMAdapter):
         request_data.update(kwargs)
 
         try:
-            response = await self._client.post("/messages", json=request_data)
+            response = await self._client.post("/messages", **json_request_kwargs(request_data))
             response.raise_for_status()
             result = response.json()
 
@@ -225,7 +251,7 @@ class ClaudeAdapter(BaseLLMAdapter):
         request_data.update(kwargs)
 
         try:
-            async with self._client.stream("POST", "/messages", json=request_data) as response:
+            async with self._client.stream("POST", "/messages", **json_request_kwargs(request_data)) as response:
                 response.raise_for_status()
 
                 async for line in response.aiter_lines():
@@ -23,6 +23,7 @@ from httpx import AsyncClient, HTTPError
 from core.base.adapter import AdapterCallError
 from core.llm.adapters.base import BaseLLMAdapter
 from core.llm.models import ModelCapability
+from core.llm.utils.json_body import json_request_kwargs
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -118,7 +119,7 @@ class OllamaAdapter(BaseLLMAdapter):
         request_data.update(kwargs)
 
         try:
-            response = await self._client.post("/api/chat", json=request_data)
+            response = await self._client.post("/api/chat", **json_request_kwargs(request_data))
             response.raise_for_status()
             result = response.json()
 
@@ -176,7 +177,7 @@ class OllamaAdapter(BaseLLMAdapter):
         request_data.update(kwargs)
 
         try:
-            async with self._client.stream("POST", "/api/chat", json=request_data) as response:
+            async with self._client.stream("POST", "/api/chat", **json_request_kwargs(request_data)) as response:
                 response.raise_for_status()
                 async for line in response.aiter_lines():
                     if not line.strip():
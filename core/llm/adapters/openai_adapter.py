@@ -21,6 +21,7 @@ from core.llm.adapters.base import BaseLLMAdapter
 from core.base.adapter import AdapterCallError
 from core.base.health_check import HealthStatus, HealthCheckResult
 from core.llm.models import ModelCapability
+from core.llm.utils.json_body import json_request_kwargs
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -78,6 +79,11 @@ class OpenAIAdapter(BaseLLMAdapter):
         """服务提供商名称"""
         return "openai"
     
+    @property
+    def supports_prebuilt_payload(self) -> bool:
+        """请求体为OpenAI兼容格式，使用基类build_payload"""
+        return True
+    
     async def initialize(self, config: Optional[Dict[str, Any]] = None) -> None:
         """
         初始化适配器
@@ -163,25 +169,15 @@ class OpenAIAdapter(BaseLLMAdapter):
         if not self._client:
             raise AdapterCallError("适配器未初始化")
         
-        # 构建请求数据
-        request_data: Dict[str, Any] = {
-            "model": model,
-            "messages": messages,
-            "temperature": temperature,
-        }
-        
-        if max_tokens:
-            request_data["max_tokens"] = max_tokens
-        
-        # 合并其他参数（如functions, function_call等）
-        request_data.update(kwargs)
+        # 构建请求体：服务重试时传入已序列化的请求体，不再重复构建
+        payload = kwargs.pop("prebuilt_payload", None)
         
         try:
+            if payload is None:
+                payload = self.build_payload(messages, model, temperature, max_tokens, **kwargs)
+            
             # 发送请求
-            response = await self._client.post(
-                "/chat/completions",
-                json=request_data,
-            )
+            response = await self._client.post("/chat/completions", **payload)
             response.raise_for_status()
             
             result = response.json()
@@ -261,7 +257,7 @@ class OpenAIAdapter(BaseLLMAdapter):
             async with self._client.stream(
                 "POST",
                 "/chat/completions",
-                json=request_data,
+                **json_request_kwargs(request_data),
             ) as response:
                 response.raise_for_status()
                 
@@ -21,6 +21,7 @@ from httpx import AsyncClient, HTTPError, ReadTimeout
 from core.llm.adapters.base import BaseLLMAdapter
 from core.base.adapter import AdapterCallError
 from core.llm.models import ModelCapability
+from core.llm.utils.json_body import json_request_kwargs
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -100,8 +101,7 @@ class QwenAdapter(BaseLLMAdapter):
         adapter_timeout = self._config.get("timeout", None)
         if adapter_timeout is None:
             # 尝试从全局配置读取
-            global_config = self._config.get("_global_config", {})
-            llm_config = global_config.get("llm", {})
+            llm_config = self._global_config.get("llm", {})
             adapter_timeout = llm_config.get("timeout", 120.0)
         else:
             adapter_timeout = float(adapter_timeout)
@@ -285,7 +285,7 @@ class QwenAdapter(BaseLLMAdapter):
             # 发送请求
             response = await self._client.post(
                 "/services/aigc/text-generation/generation",
-                json=request_data,
+                **json_request_kwargs(request_data),
             )
             response.raise_for_status()
             
@@ -573,7 +573,7 @@ class QwenAdapter(BaseLLMAdapter):
             async with self._client.stream(
                 "POST",
                 "/services/aigc/text-generation/generation",
-                json=request_data,
+                **json_request_kwargs(request_data),
             ) as response:
                 response.raise_for_status()
                 
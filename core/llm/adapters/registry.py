@@ -22,6 +22,10 @@ import inspect
 from core.llm.adapters.base import BaseLLMAdapter
 
 
+# 模型解析结果缓存的最大条目数（模型名来自请求参数，需防止无限增长）
+_MAX_RESOLVED_MODELS = 1024
+
+
 class AdapterRegistry:
     """
     适配器注册表
@@ -46,6 +50,8 @@ class AdapterRegistry:
         self._adapters: Dict[str, Type[BaseLLMAdapter]] = {}
         self._instances: Dict[str, BaseLLMAdapter] = {}
         self._model_mapping: Dict[str, str] = {}  # model_name -> adapter_name
+        # 模型名 -> 解析结果（包括模糊匹配和前缀匹配），注册变更时由compile_model_index重建
+        self._resolved_models: Dict[str, Optional[str]] = {}
         self._initialized: bool = False
     
     def discover_adapters(self) -> None:
@@ -104,6 +110,7 @@ class AdapterRegistry:
                             # 如果无法实例化，跳过
                             continue
             
+            self.compile_model_index()
             self._initialized = True
             
         except Exception as e:
@@ -135,6 +142,8 @@ class AdapterRegistry:
             if models:
                 for model in models:
                     self._model_mapping[model] = adapter_name
+            
+            self.compile_model_index()
                     
         except Exception as e:
             raise ValueError(f"适配器注册失败: {e}") from e
@@ -144,6 +153,8 @@ class AdapterRegistry:
         adapter_name: str,
         config: Dict[str, Any],
         connection_pool: Optional[Any] = None,
+        *,
+        global_config: Optional[Dict[str, Any]] = None,
     ) -> BaseLLMAdapter:
         """
         创建适配器实例
@@ -151,6 +162,8 @@ class AdapterRegistry:
         参数:
             adapter_name: 适配器名称
             config: 适配器配置
+            connection_pool: 连接池管理器（可选）
+            global_config: 服务的全局配置（可选），初始化前传给适配器
         
         返回:
             适配器实例
@@ -169,6 +182,8 @@ class AdapterRegistry:
         # 创建新实例（传递连接池）
         adapter_class = self._adapters[adapter_name]
         adapter = adapter_class(config, connection_pool=connection_pool)
+        if global_config is not None:
+            adapter.set_global_config(global_config)
         await adapter.initialize()
         
         # 缓存实例
@@ -183,6 +198,38 @@ class AdapterRegistry:
         参数:
             model: 模型名称（如 "qwen-turbo", "deepseek-chat"）
         
+        返回:
+            适配器名称，如果未找到返回None
+        """
+        # 解析结果缓存：显式映射已预先写入，模糊匹配需要遍历所有适配器，
+        # 热路径上只做一次字典查找
+        resolved = self._resolved_models
+        if model in resolved:
+            return resolved[model]
+        
+        adapter_name = self._resolve_model(model)
+        if len(resolved) >= _MAX_RESOLVED_MODELS:
+            self.compile_model_index()
+            resolved = self._resolved_models
+        resolved[model] = adapter_name
+        return adapter_name
+    
+    def compile_model_index(self) -> None:
+        """
+        重建模型索引
+        
+        丢弃按需解析的结果，并把显式模型映射预先写入解析结果缓存，
+        已映射模型的查找不再经过_resolve_model。注册表变更时自动调用。
+        """
+        self._resolved_models = dict(self._model_mapping)
+    
+    def _resolve_model(self, model: str) -> Optional[str]:
+        """
+        解析模型名称对应的适配器名称（内部方法，不使用缓存）
+        
+        参数:
+            model: 模型名称
+        
         返回:
             适配器名称，如果未找到返回None
         """
@@ -227,6 +274,28 @@ class AdapterRegistry:
             raise ValueError(f"适配器不存在: {adapter_name}")
         
         self._model_mapping[model] = adapter_name
+        self.compile_model_index()
+    
+    def register_model_mappings(self, mapping: Dict[str, str]) -> None:
+        """
+        批量注册模型到适配器的映射
+        
+        全部写入后只重建一次模型索引；遇到不存在的适配器时抛出异常，
+        此前的映射保留。
+        
+        参数:
+            mapping: 模型名称到适配器名称的映射
+        
+        异常:
+            ValueError: 适配器不存在时抛出
+        """
+        try:
+            for model, adapter_name in mapping.items():
+                if adapter_name not in self._adapters:
+                    raise ValueError(f"适配器不存在: {adapter_name}")
+                self._model_mapping[model] = adapter_name
+        finally:
+            self.compile_model_index()
     
     def get_available_adapters(self) -> List[str]:
         """
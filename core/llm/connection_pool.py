@@ -10,6 +10,7 @@
 
 依赖模块：
     - httpx: 异步HTTP客户端
+    - h2: HTTP/2支持（可选，未安装时使用HTTP/1.1）
     - typing: 类型注解
     - asyncio: 异步编程
 """
@@ -17,6 +18,11 @@
 from typing import Dict, Optional, Any
 from httpx import AsyncClient, Limits, Timeout
 import asyncio
+try:
+    import h2  # noqa: F401  httpx启用HTTP/2需要h2
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
 
 
 class ConnectionPoolManager:
@@ -30,6 +36,7 @@ class ConnectionPoolManager:
         - 连接数限制（防止资源耗尽）
         - 超时配置
         - 多域名连接池管理
+        - HTTP/2多路复用（安装h2时可选启用）
     
     示例:
         >>> pool_manager = ConnectionPoolManager()
@@ -42,6 +49,8 @@ class ConnectionPoolManager:
         max_connections: int = 100,
         max_keepalive_connections: int = 20,
         timeout: float = 30.0,
+        keepalive_expiry: float = 5.0,
+        http2: bool = False,
     ) -> None:
         """
         初始化连接池管理器
@@ -50,10 +59,14 @@ class ConnectionPoolManager:
             max_connections: 最大连接数
             max_keepalive_connections: 最大保持活跃连接数
             timeout: 默认超时时间（秒）
+            keepalive_expiry: 空闲连接保持时间（秒），LLM调用间隔较长时调大可避免重复握手
+            http2: 是否启用HTTP/2（同一连接上多路复用并发请求；未安装h2时忽略）
         """
         self._max_connections = max_connections
         self._max_keepalive_connections = max_keepalive_connections
         self._timeout = timeout
+        self._keepalive_expiry = keepalive_expiry
+        self._http2 = http2 and H2_AVAILABLE
         self._pools: Dict[str, AsyncClient] = {}
         self._lock = asyncio.Lock()
     
@@ -89,6 +102,7 @@ class ConnectionPoolManager:
             limits = Limits(
                 max_connections=self._max_connections,
                 max_keepalive_connections=self._max_keepalive_connections,
+                keepalive_expiry=self._keepalive_expiry,
             )
             
             client_timeout = timeout or self._timeout
@@ -98,6 +112,7 @@ class ConnectionPoolManager:
                 limits=limits,
                 timeout=client_timeout,
                 headers=headers or {},
+                http2=self._http2,
             )
             
             self._pools[cache_key] = client
@@ -159,5 +174,7 @@ class ConnectionPoolManager:
             "pool_count": len(self._pools),
             "max_connections": self._max_connections,
             "max_keepalive_connections": self._max_keepalive_connections,
+            "keepalive_expiry": self._keepalive_expiry,
+            "http2": self._http2,
             "pools": list(self._pools.keys()),
         }
@@ -9,10 +9,20 @@
     - ConversationContext: 对话上下文管理类
 
 依赖模块：
+    - core.llm.models: 消息角色常量
+    - core.llm.utils.token_counter: Token计数（按需加载）
     - typing: 类型注解
 """
 
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, TYPE_CHECKING
+from core.llm.models import ROLE_ASSISTANT, ROLE_SYSTEM, ROLE_TOOL, ROLE_USER
+
+if TYPE_CHECKING:
+    from core.llm.utils.token_counter import TokenCounter
+
+
+# 有效的消息角色
+_VALID_ROLES = (ROLE_USER, ROLE_ASSISTANT, ROLE_SYSTEM, ROLE_TOOL)
 
 
 class ConversationContext:
@@ -26,6 +36,7 @@ class ConversationContext:
         - 支持上下文清理
         - 支持上下文限制（最大消息数）
         - 支持Function Calling的tool消息（包含tool_call_id）
+        - 支持统计上下文Token数（可与LLMService共享Token计数器）
     
     示例:
         >>> context = ConversationContext()
@@ -34,15 +45,22 @@ class ConversationContext:
         >>> messages = context.get_messages()
     """
     
-    def __init__(self, max_messages: Optional[int] = None) -> None:
+    def __init__(
+        self,
+        max_messages: Optional[int] = None,
+        token_counter: Optional["TokenCounter"] = None,
+    ) -> None:
         """
         初始化对话上下文
         
         参数:
             max_messages: 最大消息数量（可选，None表示无限制）
+            token_counter: Token计数器（可选，传入LLMService.get_token_counter()
+                以复用服务已加载的编码器；None时在首次计数时创建）
         """
         self._messages: List[Dict[str, Any]] = []
         self._max_messages: Optional[int] = max_messages
+        self._token_counter: Optional["TokenCounter"] = token_counter
     
     def add_message(self, role: str, content: str, **kwargs: Any) -> None:
         """
@@ -60,7 +78,7 @@ class ConversationContext:
             >>> context.add_message("user", "你好")
             >>> context.add_message("tool", "结果", tool_call_id="call_123")
         """
-        if role not in ["user", "assistant", "system", "tool"]:
+        if role not in _VALID_ROLES:
             raise ValueError(f"无效的角色: {role}")
         
         message: Dict[str, Any] = {"role": role, "content": content}
@@ -84,6 +102,25 @@ class ConversationContext:
         """
         return self._messages.copy()
     
+    def count_tokens(self, model: Optional[str] = None) -> int:
+        """
+        统计上下文中所有消息内容的Token数
+        
+        参数:
+            model: 模型名称（可选，用于选择编码器）
+        
+        返回:
+            Token总数
+        
+        示例:
+            >>> total = context.count_tokens("gpt-4")
+        """
+        if self._token_counter is None:
+            from core.llm.utils.token_counter import TokenCounter
+            self._token_counter = TokenCounter()
+        contents = [message.get("content") or "" for message in self._messages]
+        return sum(self._token_counter.count_batch_tokens(contents, model))
+    
     def clear(self) -> None:
         """清空上下文"""
         self._messages.clear()
@@ -15,12 +15,17 @@
     - asyncio: 异步编程
 """
 
-from typing import Dict, Any, Optional, List
-from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Deque, Tuple
+from datetime import date, datetime, timedelta
 from dataclasses import dataclass, field
+from collections import deque
 import asyncio
 
 
+# 默认保留的明细记录上限
+DEFAULT_MAX_RECORDS = 100_000
+
+
 @dataclass
 class TokenUsage:
     """Token使用记录"""
@@ -57,6 +62,9 @@ class CostManager:
     
     管理LLM调用的成本统计、预算管理和优化建议。
     
+    明细记录保存在有上限的环形缓冲区中（配置项 max_records），超出上限时
+    最旧的记录会被归档为按（日期, 适配器, 模型）聚合的统计，不再保留明细。
+    
     特性：
         - Token使用统计
         - 成本计算
@@ -75,9 +83,17 @@ class CostManager:
         
         参数:
             config: 配置字典
+        
+        异常:
+            ValueError: max_records小于1时抛出
         """
         self._config = config or {}
-        self._records: List[CostRecord] = []
+        self._max_records: int = self._config.get("max_records", DEFAULT_MAX_RECORDS)
+        if self._max_records < 1:
+            raise ValueError(f"max_records必须为正整数: {self._max_records}")
+        self._records: Deque[CostRecord] = deque(maxlen=self._max_records)
+        # 已淘汰明细的聚合统计，键为 (日期, 适配器名称, 模型名称)
+        self._archived: Dict[Tuple[date, str, str], Dict[str, Any]] = {}
         self._lock = asyncio.Lock()
         self._budget: CostBudget = CostBudget(
             daily_budget=self._config.get("daily_budget", 0.0),
@@ -110,14 +126,18 @@ class CostManager:
         total_tokens = usage.get("total_tokens", 0)
         
         # 计算成本
-        if cost_info is None:
-            # 如果没有提供成本信息，尝试从适配器获取
-            # 这里需要适配器实例，暂时使用默认值
-            cost_info = {"input": 0.0, "output": 0.0}
+        # 如果没有提供成本信息，尝试从适配器获取
+        # 这里需要适配器实例，暂时按零费率处理
+        input_rate = cost_info.get("input", 0.0) if cost_info else 0.0
+        output_rate = cost_info.get("output", 0.0) if cost_info else 0.0
         
-        input_cost = (prompt_tokens / 1000.0) * cost_info.get("input", 0.0)
-        output_cost = (completion_tokens / 1000.0) * cost_info.get("output", 0.0)
-        total_cost = input_cost + output_cost
+        if input_rate == 0.0 and output_rate == 0.0:
+            # 未配置价格的常见情况，跳过浮点运算
+            input_cost = output_cost = total_cost = 0.0
+        else:
+            input_cost = (prompt_tokens / 1000.0) * input_rate
+            output_cost = (completion_tokens / 1000.0) * output_rate
+            total_cost = input_cost + output_cost
         
         # 创建记录
         record = CostRecord(
@@ -135,6 +155,9 @@ class CostManager:
         )
         
         async with self._lock:
+            # 缓冲区已满时，先将即将被淘汰的记录归档
+            if len(self._records) == self._max_records:
+                self._archive_record(self._records[0])
             self._records.append(record)
         
         # 检查预算
@@ -143,6 +166,61 @@ class CostManager:
         
         return record
     
+    def _archive_record(self, record: CostRecord) -> None:
+        """
+        将记录累加到归档聚合统计（内部方法，调用方需持有锁）
+        
+        参数:
+            record: 即将从明细缓冲区淘汰的成本记录
+        """
+        key = (record.timestamp.date(), record.adapter_name, record.model)
+        bucket = self._archived.get(key)
+        if bucket is None:
+            bucket = self._archived[key] = {
+                "total_cost": 0.0,
+                "input_cost": 0.0,
+                "output_cost": 0.0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_tokens": 0,
+                "request_count": 0,
+            }
+        usage = record.token_usage
+        bucket["total_cost"] += record.total_cost
+        bucket["input_cost"] += record.input_cost
+        bucket["output_cost"] += record.output_cost
+        bucket["prompt_tokens"] += usage.prompt_tokens
+        bucket["completion_tokens"] += usage.completion_tokens
+        bucket["total_tokens"] += usage.total_tokens
+        bucket["request_count"] += 1
+    
+    def _get_period_costs(self) -> Tuple[float, float]:
+        """
+        计算今日和本月总成本（内部方法，包含已归档记录）
+        
+        返回:
+            (今日成本, 本月成本)
+        """
+        today = date.today()
+        month_start = today.replace(day=1)
+        today_cost = 0.0
+        month_cost = 0.0
+        
+        for r in self._records:
+            record_date = r.timestamp.date()
+            if record_date >= month_start:
+                month_cost += r.total_cost
+                if record_date == today:
+                    today_cost += r.total_cost
+        
+        for (record_date, _, _), bucket in self._archived.items():
+            if record_date >= month_start:
+                month_cost += bucket["total_cost"]
+                if record_date == today:
+                    today_cost += bucket["total_cost"]
+        
+        return today_cost, month_cost
+    
     async def _check_budget(self, record: CostRecord) -> None:
         """
         检查预算（内部方法）
@@ -151,17 +229,7 @@ class CostManager:
             record: 成本记录
         """
         # 计算今日和本月总成本
-        today = datetime.now().date()
-        month_start = datetime.now().replace(day=1).date()
-        
-        today_cost = sum(
-            r.total_cost for r in self._records
-            if r.timestamp.date() == today
-        )
-        month_cost = sum(
-            r.total_cost for r in self._records
-            if r.timestamp.date() >= month_start
-        )
+        today_cost, month_cost = self._get_period_costs()
         
         # 检查告警
         if self._budget.daily_budget > 0:
@@ -186,6 +254,9 @@ class CostManager:
         """
         获取成本统计信息
         
+        已归档（超出 max_records 被淘汰）的记录只有按天聚合的统计，
+        因此仅在未指定时间范围时计入结果。
+        
         参数:
             start_date: 开始日期（可选）
             end_date: 结束日期（可选）
@@ -196,67 +267,85 @@ class CostManager:
             统计信息字典
         """
         async with self._lock:
-            # 过滤记录
-            filtered_records = self._records
-            
-            if start_date:
-                filtered_records = [
-                    r for r in filtered_records
-                    if r.timestamp >= start_date
-                ]
-            
-            if end_date:
+            # 过滤记录（单次遍历完成全部过滤条件，避免多次重建列表）
+            if start_date or end_date or adapter_name or model:
                 filtered_records = [
-                    r for r in filtered_records
-                    if r.timestamp <= end_date
-                ]
-            
-            if adapter_name:
-                filtered_records = [
-                    r for r in filtered_records
-                    if r.adapter_name == adapter_name
-                ]
-            
-            if model:
-                filtered_records = [
-                    r for r in filtered_records
-                    if r.model == model
+                    r for r in self._records
+                    if (not start_date or r.timestamp >= start_date)
+                    and (not end_date or r.timestamp <= end_date)
+                    and (not adapter_name or r.adapter_name == adapter_name)
+                    and (not model or r.model == model)
                 ]
+            else:
+                filtered_records = self._records
             
-            # 计算统计信息
-            total_cost = sum(r.total_cost for r in filtered_records)
-            total_input_cost = sum(r.input_cost for r in filtered_records)
-            total_output_cost = sum(r.output_cost for r in filtered_records)
-            
-            total_prompt_tokens = sum(r.token_usage.prompt_tokens for r in filtered_records)
-            total_completion_tokens = sum(r.token_usage.completion_tokens for r in filtered_records)
-            total_tokens = sum(r.token_usage.total_tokens for r in filtered_records)
+            # 计算统计信息（单次遍历同时完成汇总与分组统计）
+            total_cost = 0.0
+            total_input_cost = 0.0
+            total_output_cost = 0.0
+            total_prompt_tokens = 0
+            total_completion_tokens = 0
+            total_tokens = 0
             
-            # 按适配器分组统计
+            # 按适配器、模型分组统计
             adapter_stats: Dict[str, Dict[str, Any]] = {}
-            for record in filtered_records:
-                if record.adapter_name not in adapter_stats:
-                    adapter_stats[record.adapter_name] = {
-                        "total_cost": 0.0,
-                        "total_tokens": 0,
-                        "request_count": 0,
-                    }
-                adapter_stats[record.adapter_name]["total_cost"] += record.total_cost
-                adapter_stats[record.adapter_name]["total_tokens"] += record.token_usage.total_tokens
-                adapter_stats[record.adapter_name]["request_count"] += 1
-            
-            # 按模型分组统计
             model_stats: Dict[str, Dict[str, Any]] = {}
+            
             for record in filtered_records:
-                if record.model not in model_stats:
-                    model_stats[record.model] = {
-                        "total_cost": 0.0,
-                        "total_tokens": 0,
-                        "request_count": 0,
-                    }
-                model_stats[record.model]["total_cost"] += record.total_cost
-                model_stats[record.model]["total_tokens"] += record.token_usage.total_tokens
-                model_stats[record.model]["request_count"] += 1
+                usage = record.token_usage
+                total_cost += record.total_cost
+                total_input_cost += record.input_cost
+                total_output_cost += record.output_cost
+                total_prompt_tokens += usage.prompt_tokens
+                total_completion_tokens += usage.completion_tokens
+                total_tokens += usage.total_tokens
+                
+                for group_stats, group_key in (
+                    (adapter_stats, record.adapter_name),
+                    (model_stats, record.model),
+                ):
+                    stat = group_stats.get(group_key)
+                    if stat is None:
+                        stat = group_stats[group_key] = {
+                            "total_cost": 0.0,
+                            "total_tokens": 0,
+                            "request_count": 0,
+                        }
+                    stat["total_cost"] += record.total_cost
+                    stat["total_tokens"] += usage.total_tokens
+                    stat["request_count"] += 1
+            
+            request_count = len(filtered_records)
+            
+            # 未指定时间范围时，合并已归档记录的聚合统计
+            if not start_date and not end_date:
+                for (_, bucket_adapter, bucket_model), bucket in self._archived.items():
+                    if adapter_name and bucket_adapter != adapter_name:
+                        continue
+                    if model and bucket_model != model:
+                        continue
+                    total_cost += bucket["total_cost"]
+                    total_input_cost += bucket["input_cost"]
+                    total_output_cost += bucket["output_cost"]
+                    total_prompt_tokens += bucket["prompt_tokens"]
+                    total_completion_tokens += bucket["completion_tokens"]
+                    total_tokens += bucket["total_tokens"]
+                    request_count += bucket["request_count"]
+                    
+                    for group_stats, group_key in (
+                        (adapter_stats, bucket_adapter),
+                        (model_stats, bucket_model),
+                    ):
+                        stat = group_stats.get(group_key)
+                        if stat is None:
+                            stat = group_stats[group_key] = {
+                                "total_cost": 0.0,
+                                "total_tokens": 0,
+                                "request_count": 0,
+                            }
+                        stat["total_cost"] += bucket["total_cost"]
+                        stat["total_tokens"] += bucket["total_tokens"]
+                        stat["request_count"] += bucket["request_count"]
             
             return {
                 "total_cost": total_cost,
@@ -265,7 +354,7 @@ class CostManager:
                 "total_prompt_tokens": total_prompt_tokens,
                 "total_completion_tokens": total_completion_tokens,
                 "total_tokens": total_tokens,
-                "request_count": len(filtered_records),
+                "request_count": request_count,
                 "adapter_stats": adapter_stats,
                 "model_stats": model_stats,
                 "budget": {
@@ -319,11 +408,7 @@ class CostManager:
         
         # 建议3：检查预算使用情况
         if self._budget.enabled:
-            today = datetime.now().date()
-            today_cost = sum(
-                r.total_cost for r in self._records
-                if r.timestamp.date() == today
-            )
+            today_cost, _ = self._get_period_costs()
             if self._budget.daily_budget > 0:
                 daily_ratio = today_cost / self._budget.daily_budget
                 if daily_ratio > 0.5:
@@ -369,19 +454,28 @@ class CostManager:
         
         参数:
             before_date: 清理此日期之前的记录（如果为None，清理所有记录）
+                已归档的聚合统计按天清理，仅清理早于该日期当天的部分
         
         返回:
             清理的记录数
         """
         async with self._lock:
             if before_date is None:
-                count = len(self._records)
+                count = len(self._records) + sum(
+                    bucket["request_count"] for bucket in self._archived.values()
+                )
                 self._records.clear()
+                self._archived.clear()
                 return count
             else:
                 original_count = len(self._records)
-                self._records = [
-                    r for r in self._records
-                    if r.timestamp >= before_date
-                ]
-                return original_count - len(self._records)
+                self._records = deque(
+                    (r for r in self._records if r.timestamp >= before_date),
+                    maxlen=self._max_records,
+                )
+                count = original_count - len(self._records)
+                
+                before_day = before_date.date()
+                for key in [k for k in self._archived if k[0] < before_day]:
+                    count += self._archived.pop(key)["request_count"]
+                return count
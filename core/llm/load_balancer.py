@@ -20,7 +20,9 @@
 
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import List, Dict, Any, Optional
+from functools import reduce
+from math import gcd
+from typing import List, Dict, Any, Optional, Tuple
 from core.llm.adapters.base import BaseLLMAdapter
 
 
@@ -78,8 +80,42 @@ class RoundRobinStrategy(LoadBalanceStrategyBase):
         return selected
 
 
+def _build_wrr_schedule(weights: List[int]) -> List[int]:
+    """
+    生成一个完整周期的平滑加权轮询调度序列
+    
+    参数:
+        weights: 各适配器的整数权重（与候选列表顺序一致）
+    
+    返回:
+        适配器下标序列，长度为约分后的权重之和；权重全为0时返回空列表
+    """
+    weights = [max(weight, 0) for weight in weights]
+    divisor = reduce(gcd, weights, 0)
+    if divisor == 0:
+        return []
+    weights = [weight // divisor for weight in weights]
+    total_weight = sum(weights)
+    candidates = [index for index, weight in enumerate(weights) if weight > 0]
+    
+    current = [0] * len(weights)
+    schedule: List[int] = []
+    for _ in range(total_weight):
+        for index in candidates:
+            current[index] += weights[index]
+        best = max(candidates, key=current.__getitem__)
+        current[best] -= total_weight
+        schedule.append(best)
+    return schedule
+
+
 class WeightedRoundRobinStrategy(LoadBalanceStrategyBase):
-    """加权轮询策略"""
+    """
+    加权轮询策略
+    
+    整数权重时按候选适配器组合预先生成一个周期的调度序列并缓存，
+    每次选择只需一次下标访问；非整数权重时按累计权重逐个比较。
+    """
     
     def select_adapter(
         self,
@@ -96,6 +132,20 @@ class WeightedRoundRobinStrategy(LoadBalanceStrategyBase):
             # 如果没有权重配置，使用轮询
             return RoundRobinStrategy().select_adapter(adapters, state)
         
+        adapter_weights = [weights.get(adapter.name, 1) for adapter in adapters]
+        if all(type(weight) is int for weight in adapter_weights):
+            schedules: Dict[Tuple[str, ...], List[int]] = state.setdefault("wrr_schedules", {})
+            names = tuple(adapter.name for adapter in adapters)
+            schedule = schedules.get(names)
+            if schedule is None:
+                schedule = schedules[names] = _build_wrr_schedule(adapter_weights)
+            if not schedule:
+                return adapters[0]
+            
+            index = state.get("wrr_schedule_index", 0)
+            state["wrr_schedule_index"] = index + 1
+            return adapters[schedule[index % len(schedule)]]
+        
         # 计算总权重
         total_weight = sum(weights.get(adapter.name, 1) for adapter in adapters)
         if total_weight == 0:
@@ -163,6 +213,15 @@ class RandomStrategy(LoadBalanceStrategyBase):
         return random.choice(adapters)
 
 
+# 策略枚举到实现类的映射（模块级常量，仅实例化实际使用的策略）
+_STRATEGY_CLASSES: Dict[LoadBalanceStrategy, type] = {
+    LoadBalanceStrategy.ROUND_ROBIN: RoundRobinStrategy,
+    LoadBalanceStrategy.WEIGHTED_ROUND_ROBIN: WeightedRoundRobinStrategy,
+    LoadBalanceStrategy.LEAST_CONNECTIONS: LeastConnectionsStrategy,
+    LoadBalanceStrategy.RANDOM: RandomStrategy,
+}
+
+
 class LoadBalancer:
     """
     负载均衡器
@@ -198,13 +257,7 @@ class LoadBalancer:
     
     def _create_strategy(self, strategy: LoadBalanceStrategy) -> LoadBalanceStrategyBase:
         """创建策略实现"""
-        strategies = {
-            LoadBalanceStrategy.ROUND_ROBIN: RoundRobinStrategy(),
-            LoadBalanceStrategy.WEIGHTED_ROUND_ROBIN: WeightedRoundRobinStrategy(),
-            LoadBalanceStrategy.LEAST_CONNECTIONS: LeastConnectionsStrategy(),
-            LoadBalanceStrategy.RANDOM: RandomStrategy(),
-        }
-        return strategies.get(strategy, RoundRobinStrategy())
+        return _STRATEGY_CLASSES.get(strategy, RoundRobinStrategy)()
     
     def select(
         self,
@@ -250,6 +303,8 @@ class LoadBalancer:
             weights: 权重字典 {adapter_name: weight}
         """
         self._state["weights"] = weights
+        # 权重变化后已缓存的调度序列失效
+        self._state.pop("wrr_schedules", None)
     
     def get_statistics(self) -> Dict[str, Any]:
         """
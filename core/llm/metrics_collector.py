@@ -15,8 +15,8 @@
     - asyncio: 异步编程
 """
 
-from typing import Dict, Any, Optional
-from time import time
+from typing import Dict, Any, Optional, Tuple, List
+from time import monotonic
 try:
     from prometheus_client import Counter, Histogram, Gauge, Summary, CollectorRegistry, generate_latest
     from prometheus_client.exposition import CONTENT_TYPE_LATEST
@@ -159,7 +159,7 @@ class MetricsCollector:
         )
         
         # 请求时间戳记录（用于计算QPS）
-        self._request_timestamps: Dict[str, list] = {}
+        self._request_timestamps: Dict[Tuple[str, str], List[float]] = {}
         self._lock = asyncio.Lock()
     
     def record_request(
@@ -233,14 +233,16 @@ class MetricsCollector:
             adapter: 适配器名称
             model: 模型名称
         """
-        key = f"{adapter}:{model}"
+        key = (adapter, model)
         async with self._lock:
             if key not in self._request_timestamps:
                 self._request_timestamps[key] = []
-            self._request_timestamps[key].append(time())
+            # 使用单调时钟，避免系统时间回拨导致窗口计算错误
+            now = monotonic()
+            self._request_timestamps[key].append(now)
             
             # 只保留最近1分钟的时间戳
-            cutoff = time() - 60
+            cutoff = now - 60
             self._request_timestamps[key] = [
                 ts for ts in self._request_timestamps[key] if ts > cutoff
             ]
@@ -15,12 +15,22 @@
     - typing: 类型注解
     - dataclasses: 数据类
     - enum: 枚举类型
+    - sys: 字符串驻留
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, ClassVar
 from datetime import datetime
+from time import time_ns
 from dataclasses import dataclass, field
 from enum import Enum
+import sys
+
+
+# 消息角色常量（驻留字符串，比较和哈希可走对象同一性快速路径）
+ROLE_SYSTEM = sys.intern("system")
+ROLE_USER = sys.intern("user")
+ROLE_ASSISTANT = sys.intern("assistant")
+ROLE_TOOL = sys.intern("tool")
 
 
 class LLMMessage:
@@ -34,6 +44,9 @@ class LLMMessage:
         content: 消息内容
     """
     
+    # 每次请求会创建大量消息对象，使用__slots__省去实例__dict__
+    __slots__ = ("role", "content")
+    
     def __init__(self, role: str, content: str) -> None:
         """
         初始化消息
@@ -42,7 +55,8 @@ class LLMMessage:
             role: 消息角色
             content: 消息内容
         """
-        self.role = role
+        # 驻留角色字符串，使所有消息共享同一个字符串对象（str子类无法驻留）
+        self.role = sys.intern(role) if type(role) is str else role
         self.content = content
     
     def to_dict(self) -> Dict[str, str]:
@@ -55,10 +69,7 @@ class LLMMessage:
     @classmethod
     def from_dict(cls, data: Dict[str, str]) -> "LLMMessage":
         """从字典创建消息"""
-        return cls(
-            role=data["role"],
-            content=data["content"],
-        )
+        return cls(data["role"], data["content"])
 
 
 class LLMResponse:
@@ -75,6 +86,8 @@ class LLMResponse:
         created_at: 响应创建时间
     """
     
+    __slots__ = ("content", "model", "usage", "metadata", "_created_ns", "_created_at", "_created_at_iso")
+    
     def __init__(
         self,
         content: str,
@@ -95,16 +108,37 @@ class LLMResponse:
         self.model = model
         self.usage = usage or {}
         self.metadata = metadata or {}
-        self.created_at = datetime.now()
+        # 只记录纳秒时间戳，created_at首次访问时再转换为datetime
+        # （流式响应逐块创建对象，大多数块的创建时间不会被读取）
+        self._created_ns = time_ns()
+        self._created_at: Optional[datetime] = None
+        # created_at的ISO格式字符串，首次序列化时计算并缓存
+        self._created_at_iso: Optional[str] = None
+    
+    @property
+    def created_at(self) -> datetime:
+        """响应创建时间"""
+        created_at = self._created_at
+        if created_at is None:
+            created_at = self._created_at = datetime.fromtimestamp(self._created_ns / 1e9)
+        return created_at
+    
+    @created_at.setter
+    def created_at(self, value: datetime) -> None:
+        self._created_at = value
+        self._created_at_iso = None
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
+        created_at_iso = self._created_at_iso
+        if created_at_iso is None:
+            created_at_iso = self._created_at_iso = self.created_at.isoformat()
         return {
             "content": self.content,
             "model": self.model,
             "usage": self.usage,
             "metadata": self.metadata,
-            "created_at": self.created_at.isoformat(),
+            "created_at": created_at_iso,
         }
     
     @property
@@ -147,6 +181,26 @@ class ModelCapability:
     vision: bool = False
     function_calling: bool = False
     
+    # 必需能力的位掩码定义（cost_effective、fast、multilingual为可选属性，不参与匹配）
+    REASONING_BIT: ClassVar[int] = 1 << 0
+    CREATIVITY_BIT: ClassVar[int] = 1 << 1
+    FUNCTION_CALLING_BIT: ClassVar[int] = 1 << 2
+    VISION_BIT: ClassVar[int] = 1 << 3
+    
+    def to_mask(self) -> int:
+        """
+        转换为必需能力位掩码
+        
+        返回:
+            位掩码整数，可用 (offered & required) == required 判断是否满足要求
+        """
+        return (
+            (self.REASONING_BIT if self.reasoning else 0)
+            | (self.CREATIVITY_BIT if self.creativity else 0)
+            | (self.FUNCTION_CALLING_BIT if self.function_calling else 0)
+            | (self.VISION_BIT if self.vision else 0)
+        )
+    
     def to_dict(self) -> Dict[str, bool]:
         """转换为字典格式"""
         return {
@@ -175,4 +229,5 @@ class RoutingStrategy(str, Enum):
     PERFORMANCE_FIRST = "performance_first"  # 性能优先
     AVAILABILITY_FIRST = "availability_first"  # 可用性优先
     BALANCED = "balanced"  # 平衡模式
+    LEAST_CONNECTIONS = "least_connections"  # 最少连接（进行中请求最少）
     MANUAL = "manual"  # 手动指定
@@ -12,16 +12,90 @@
 依赖模块：
     - typing: 类型注解
     - hashlib: 哈希计算
+    - blake3: BLAKE3哈希（可选，未安装时使用hashlib.blake2b）
     - json: JSON序列化
+    - orjson: 快速JSON序列化（可选，未安装时使用json）
     - asyncio: 异步编程
     - time: 时间处理
 """
 
-from typing import Dict, Any, Optional, Callable, Awaitable
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Deque, Tuple
+from collections import OrderedDict, deque
 import hashlib
 import json
 import asyncio
 import time
+try:
+    from blake3 import blake3 as _blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# 请求数据规范化序列化（按键排序，保证相同请求得到相同字节串）
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+    
+    def _serialize_request(request_data: Any) -> bytes:
+        """序列化请求数据（orjson）"""
+        return orjson.dumps(request_data, option=_ORJSON_OPTIONS)
+else:
+    def _serialize_request(request_data: Any) -> bytes:
+        """序列化请求数据（json）"""
+        return json.dumps(request_data, sort_keys=True).encode()
+
+
+# 缓存键仅在进程内部使用，无需抗碰撞攻击的加密哈希，128位摘要足够；
+# 直接使用原始摘要字节作为字典键，省去十六进制编码
+if BLAKE3_AVAILABLE:
+    def _hash_key(data: bytes) -> bytes:
+        """计算缓存键哈希（BLAKE3）"""
+        return _blake3(data).digest(length=16)
+else:
+    def _hash_key(data: bytes) -> bytes:
+        """计算缓存键哈希（BLAKE2b）"""
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+
+# 准入布隆过滤器：2**20 位（128 KB），每个指纹映射到 2 个位
+_BLOOM_BITS = 1 << 20
+_BLOOM_MASK = _BLOOM_BITS - 1
+
+
+def _bloom_fingerprint(request_data: Any) -> int:
+    """
+    计算请求数据的轻量指纹（用于布隆过滤器）
+    
+    只取模型名和最后一条消息内容等少量字段，内容相同的请求必然得到相同指纹，
+    字符串的hash在进程内有缓存，开销远低于完整的序列化和哈希。
+    
+    参数:
+        request_data: 请求数据
+    
+    返回:
+        指纹整数
+    """
+    if type(request_data) is str:
+        return hash(request_data)
+    if type(request_data) is not dict:
+        return 0
+    
+    model = request_data.get("model")
+    content = None
+    messages = request_data.get("messages")
+    if type(messages) is list and messages:
+        last_message = messages[-1]
+        if type(last_message) is dict:
+            content = last_message.get("content")
+    return hash((
+        model if type(model) is str else None,
+        content if type(content) is str else None,
+    ))
 
 
 class RequestCache:
@@ -34,7 +108,8 @@ class RequestCache:
         - 基于请求内容的哈希缓存
         - TTL（生存时间）支持
         - 异步安全
-        - 可配置缓存大小限制
+        - 可配置缓存大小限制（LRU淘汰）
+        - 布隆过滤器准入检查，冷键未命中无需序列化
     
     示例:
         >>> cache = RequestCache(ttl=3600, max_size=1000)
@@ -55,10 +130,15 @@ class RequestCache:
         """
         self._ttl = ttl
         self._max_size = max_size
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        # 按访问顺序排列，末尾为最近使用的条目
+        self._cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        # 按写入时间排列的 (写入时间, 键) 队列，用于增量清理过期条目
+        self._expiry_queue: Deque[Tuple[float, bytes]] = deque()
+        # 准入布隆过滤器：位为0说明该指纹从未写入，可跳过序列化直接判定未命中
+        self._bloom = bytearray(_BLOOM_BITS // 8)
         self._lock = asyncio.Lock()
     
-    def _generate_key(self, request_data: Dict[str, Any]) -> str:
+    def _generate_key(self, request_data: Dict[str, Any]) -> bytes:
         """
         生成缓存键
         
@@ -66,11 +146,56 @@ class RequestCache:
             request_data: 请求数据
         
         返回:
-            缓存键字符串
+            缓存键（摘要字节）
         """
         # 序列化请求数据并生成哈希
-        request_str = json.dumps(request_data, sort_keys=True)
-        return hashlib.sha256(request_str.encode()).hexdigest()
+        return _hash_key(_serialize_request(request_data))
+    
+    def _generate_keys_batch(self, request_datas: List[Any]) -> List[bytes]:
+        """
+        批量生成缓存键
+        
+        每个请求仍各自得到独立的摘要，序列化和哈希函数只查找一次，
+        在列表推导式中完成，摊薄逐个调用的Python层开销。
+        
+        参数:
+            request_datas: 请求数据列表
+        
+        返回:
+            缓存键列表，与输入顺序一致
+        """
+        serialize = _serialize_request
+        hash_key = _hash_key
+        return [hash_key(serialize(request_data)) for request_data in request_datas]
+    
+    def _bloom_add(self, fingerprint: int) -> None:
+        """
+        将指纹写入布隆过滤器（内部方法）
+        
+        参数:
+            fingerprint: 请求指纹
+        """
+        index1 = fingerprint & _BLOOM_MASK
+        index2 = (fingerprint >> 20) & _BLOOM_MASK
+        self._bloom[index1 >> 3] |= 1 << (index1 & 7)
+        self._bloom[index2 >> 3] |= 1 << (index2 & 7)
+    
+    def _bloom_may_contain(self, fingerprint: int) -> bool:
+        """
+        检查指纹是否可能已写入（内部方法）
+        
+        参数:
+            fingerprint: 请求指纹
+        
+        返回:
+            False表示一定未写入，True表示可能已写入
+        """
+        index1 = fingerprint & _BLOOM_MASK
+        index2 = (fingerprint >> 20) & _BLOOM_MASK
+        return bool(
+            self._bloom[index1 >> 3] & (1 << (index1 & 7))
+            and self._bloom[index2 >> 3] & (1 << (index2 & 7))
+        )
     
     async def get(
         self,
@@ -85,21 +210,61 @@ class RequestCache:
         返回:
             缓存的结果，如果不存在或已过期返回None
         """
-        key = self._generate_key(request_data)
+        # 布隆过滤器判定一定不存在时，跳过序列化和哈希
+        if not self._bloom_may_contain(_bloom_fingerprint(request_data)):
+            return None
+        return self._get_by_key(self._generate_key(request_data))
+    
+    def _get_by_key(self, key: bytes) -> Optional[Any]:
+        """
+        按已计算的键获取缓存结果（内部方法）
         
-        async with self._lock:
-            if key not in self._cache:
-                return None
-            
-            entry = self._cache[key]
-            current_time = time.time()
-            
-            # 检查是否过期
-            if current_time - entry["timestamp"] > self._ttl:
-                del self._cache[key]
-                return None
-            
-            return entry["value"]
+        参数:
+            key: 缓存键
+        
+        返回:
+            缓存的结果，如果不存在或已过期返回None
+        """
+        # 读取路径不加锁：以下操作之间没有await，不会被其他协程打断
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        
+        # 检查是否过期
+        if time.time() - entry["timestamp"] > self._ttl:
+            self._cache.pop(key, None)
+            return None
+        
+        # 命中时标记为最近使用
+        self._cache.move_to_end(key)
+        return entry["value"]
+    
+    async def get_many(
+        self,
+        request_datas: List[Dict[str, Any]],
+    ) -> List[Optional[Any]]:
+        """
+        批量获取缓存结果
+        
+        参数:
+            request_datas: 请求数据列表
+        
+        返回:
+            缓存结果列表，与输入顺序一致，不存在或已过期的位置为None
+        """
+        # 先用布隆过滤器排除冷键，只为可能命中的请求计算缓存键
+        candidates = [
+            index for index, request_data in enumerate(request_datas)
+            if self._bloom_may_contain(_bloom_fingerprint(request_data))
+        ]
+        results: List[Optional[Any]] = [None] * len(request_datas)
+        if not candidates:
+            return results
+        
+        keys = self._generate_keys_batch([request_datas[index] for index in candidates])
+        for index, key in zip(candidates, keys):
+            results[index] = self._get_by_key(key)
+        return results
     
     async def set(
         self,
@@ -113,20 +278,37 @@ class RequestCache:
             request_data: 请求数据
             value: 缓存值
         """
-        key = self._generate_key(request_data)
+        self._bloom_add(_bloom_fingerprint(request_data))
+        await self._set_by_key(self._generate_key(request_data), value)
+    
+    async def _set_by_key(self, key: bytes, value: Any) -> None:
+        """
+        按已计算的键设置缓存结果（内部方法）
         
+        参数:
+            key: 缓存键
+            value: 缓存值
+        """
         async with self._lock:
+            current_time = time.time()
+            # 顺带清理队首已过期的条目，避免过期队列无限增长
+            self._evict_expired(current_time)
+            
             # 检查缓存大小限制
             if len(self._cache) >= self._max_size and key not in self._cache:
-                # 删除最旧的条目（简单策略：删除第一个）
+                # 删除最近最少使用的条目
                 if self._cache:
-                    oldest_key = next(iter(self._cache))
-                    del self._cache[oldest_key]
+                    self._cache.popitem(last=False)
             
             self._cache[key] = {
                 "value": value,
-                "timestamp": time.time(),
+                "timestamp": current_time,
             }
+            self._cache.move_to_end(key)
+            self._expiry_queue.append((current_time, key))
+            # 重写和被淘汰的键在队列中留下失效记录，队列明显长于缓存时按现存条目重建
+            if len(self._expiry_queue) > 2 * max(self._max_size, len(self._cache)):
+                self._compact_expiry_queue()
     
     async def get_or_set(
         self,
@@ -143,16 +325,22 @@ class RequestCache:
         返回:
             缓存或新获取的结果
         """
+        # 只计算一次缓存键，读写共用
+        key = self._generate_key(request_data)
+        fingerprint = _bloom_fingerprint(request_data)
+        
         # 先尝试获取缓存
-        cached = await self.get(request_data)
-        if cached is not None:
-            return cached
+        if self._bloom_may_contain(fingerprint):
+            cached = self._get_by_key(key)
+            if cached is not None:
+                return cached
         
         # 缓存未命中，调用函数获取
         value = await fetch_func()
         
         # 缓存结果
-        await self.set(request_data, value)
+        self._bloom_add(fingerprint)
+        await self._set_by_key(key, value)
         
         return value
     
@@ -160,6 +348,42 @@ class RequestCache:
         """清空所有缓存"""
         async with self._lock:
             self._cache.clear()
+            self._expiry_queue.clear()
+            self._bloom = bytearray(_BLOOM_BITS // 8)
+    
+    def _evict_expired(self, current_time: float) -> int:
+        """
+        从过期队列队首开始清理过期条目（内部方法，调用方需持有锁）
+        
+        队列按写入时间有序，只需处理队首已过期的部分，均摊O(1)。
+        
+        参数:
+            current_time: 当前时间戳
+        
+        返回:
+            清理的条目数
+        """
+        removed = 0
+        queue = self._expiry_queue
+        while queue and current_time - queue[0][0] > self._ttl:
+            timestamp, key = queue.popleft()
+            entry = self._cache.get(key)
+            # 条目可能已被淘汰或重新写入，仅删除与队列记录一致的条目
+            if entry is not None and entry["timestamp"] == timestamp:
+                del self._cache[key]
+                removed += 1
+        return removed
+    
+    def _compact_expiry_queue(self) -> None:
+        """
+        按现存缓存条目重建过期队列（内部方法，调用方需持有锁）
+        
+        每个现存条目只保留一条记录，重建后队列长度不超过缓存条目数；
+        两次重建之间至少写入max_size次，均摊开销很小。
+        """
+        self._expiry_queue = deque(sorted(
+            (entry["timestamp"], key) for key, entry in self._cache.items()
+        ))
     
     async def cleanup_expired(self) -> int:
         """
@@ -168,18 +392,8 @@ class RequestCache:
         返回:
             清理的条目数
         """
-        current_time = time.time()
-        expired_keys = []
-        
         async with self._lock:
-            for key, entry in self._cache.items():
-                if current_time - entry["timestamp"] > self._ttl:
-                    expired_keys.append(key)
-            
-            for key in expired_keys:
-                del self._cache[key]
-        
-        return len(expired_keys)
+            return self._evict_expired(time.time())
     
     def get_statistics(self) -> Dict[str, Any]:
         """
@@ -213,10 +427,9 @@ class RequestDeduplicator:
     
     def __init__(self) -> None:
         """初始化请求去重器"""
-        self._pending_requests: Dict[str, asyncio.Task] = {}
-        self._lock = asyncio.Lock()
+        self._pending_requests: Dict[bytes, asyncio.Task] = {}
     
-    def _generate_key(self, request_data: Dict[str, Any]) -> str:
+    def _generate_key(self, request_data: Dict[str, Any]) -> bytes:
         """
         生成去重键
         
@@ -224,10 +437,9 @@ class RequestDeduplicator:
             request_data: 请求数据
         
         返回:
-            去重键字符串
+            去重键（摘要字节）
         """
-        request_str = json.dumps(request_data, sort_keys=True)
-        return hashlib.sha256(request_str.encode()).hexdigest()
+        return _hash_key(_serialize_request(request_data))
     
     async def deduplicate(
         self,
@@ -246,30 +458,28 @@ class RequestDeduplicator:
         """
         key = self._generate_key(request_data)
         
-        async with self._lock:
-            # 检查是否已有相同请求在进行
-            if key in self._pending_requests:
-                # 等待现有请求完成
-                task = self._pending_requests[key]
-                return await task
-        
-        # 创建新请求任务
-        async def _fetch_and_cleanup() -> Any:
-            try:
-                result = await fetch_func()
-                return result
-            finally:
-                # 清理完成的请求
-                async with self._lock:
-                    if key in self._pending_requests:
-                        del self._pending_requests[key]
-        
-        task = asyncio.create_task(_fetch_and_cleanup())
-        
-        async with self._lock:
+        # 检查与注册之间没有await，在事件循环中天然是原子操作，无需加锁；
+        # 只在临界区之外等待结果
+        task = self._pending_requests.get(key)
+        if task is None:
+            task = asyncio.create_task(fetch_func())
             self._pending_requests[key] = task
+            # 完成回调在下一轮事件循环执行，同一轮内到达的相同请求仍可复用结果
+            task.add_done_callback(lambda t: self._release(key, t))
+        
+        # 共享任务由所有等待者复用，shield保证单个等待者被取消时不会取消共享的请求
+        return await asyncio.shield(task)
+    
+    def _release(self, key: bytes, task: asyncio.Task) -> None:
+        """
+        移除已完成的请求（内部方法）
         
-        return await task
+        参数:
+            key: 去重键
+            task: 已完成的请求任务
+        """
+        if self._pending_requests.get(key) is task:
+            del self._pending_requests[key]
     
     def get_statistics(self) -> Dict[str, Any]:
         """
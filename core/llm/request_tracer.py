@@ -11,41 +11,179 @@
 
 依赖模块：
     - typing: 类型注解
-    - uuid: UUID生成
+    - random: 追踪/跨度ID生成
     - datetime: 日期时间处理
+    - time: 纳秒级时间戳
+    - contextvars: 当前追踪/跨度的上下文传播
     - asyncio: 异步编程
 """
 
-from typing import Dict, Any, Optional, List
-from uuid import uuid4
-from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Tuple, Deque
+from datetime import datetime
 from dataclasses import dataclass, field
+from time import time_ns, monotonic_ns
+from contextvars import ContextVar, Token
+from bisect import bisect_left, insort
+from collections import deque
+from itertools import islice
 import asyncio
+import os
+import random
+
+
+# 追踪ID只需在进程内唯一，无需加密强度的随机数：使用普通伪随机数生成器，
+# 避免uuid4每次调用os.urandom的系统调用开销
+_id_rng = random.Random()
+if hasattr(os, "register_at_fork"):
+    # 多进程部署时子进程重新播种，避免各worker生成相同的ID序列
+    os.register_at_fork(after_in_child=_id_rng.seed)
+
+
+def _new_trace_id() -> str:
+    """生成128位追踪ID（32位十六进制）"""
+    return f"{_id_rng.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    """生成64位跨度ID（16位十六进制）"""
+    return f"{_id_rng.getrandbits(64):016x}"
+
+
+def _ns_to_datetime(timestamp_ns: Optional[int]) -> Optional[datetime]:
+    """将纳秒时间戳转换为本地时间datetime"""
+    if timestamp_ns is None:
+        return None
+    return datetime.fromtimestamp(timestamp_ns / 1e9)
+
+
+def _ns_to_isoformat(timestamp_ns: Optional[int]) -> Optional[str]:
+    """将纳秒时间戳转换为ISO格式字符串"""
+    if timestamp_ns is None:
+        return None
+    return datetime.fromtimestamp(timestamp_ns / 1e9).isoformat()
 
 
 @dataclass
 class TraceSpan:
-    """追踪跨度"""
+    """
+    追踪跨度
+    
+    时间以整数纳秒记录：*_time_ns为墙钟时间，start_monotonic_ns用于计算耗时。
+    datetime对象只在访问start_time/end_time或导出时生成。
+    """
     span_id: str
     parent_span_id: Optional[str]
     operation: str
-    start_time: datetime
-    end_time: Optional[datetime] = None
+    start_time_ns: int = field(default_factory=time_ns)
+    start_monotonic_ns: int = field(default_factory=monotonic_ns)
+    end_time_ns: Optional[int] = None
     duration: Optional[float] = None
     tags: Dict[str, Any] = field(default_factory=dict)
     logs: List[Dict[str, Any]] = field(default_factory=list)
     error: Optional[str] = None
+    
+    @property
+    def start_time(self) -> datetime:
+        """开始时间"""
+        return _ns_to_datetime(self.start_time_ns)
+    
+    @property
+    def end_time(self) -> Optional[datetime]:
+        """结束时间"""
+        return _ns_to_datetime(self.end_time_ns)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式"""
+        return {
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "operation": self.operation,
+            "start_time": _ns_to_isoformat(self.start_time_ns),
+            "end_time": _ns_to_isoformat(self.end_time_ns),
+            "duration": self.duration,
+            "tags": self.tags,
+            "logs": [
+                {
+                    "timestamp": _ns_to_isoformat(log["timestamp_ns"]),
+                    "level": log["level"],
+                    "message": log["message"],
+                }
+                for log in self.logs
+            ],
+            "error": self.error,
+        }
 
 
 @dataclass
 class TraceContext:
-    """追踪上下文"""
+    """追踪上下文（时间记录方式同TraceSpan）"""
     trace_id: str
     spans: List[TraceSpan] = field(default_factory=list)
-    start_time: datetime = field(default_factory=datetime.now)
-    end_time: Optional[datetime] = None
+    start_time_ns: int = field(default_factory=time_ns)
+    start_monotonic_ns: int = field(default_factory=monotonic_ns)
+    end_time_ns: Optional[int] = None
     total_duration: Optional[float] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
+    # start_trace设置当前追踪/当前跨度时返回的令牌，end_trace据此恢复开始前的值
+    _context_tokens: Optional[Tuple[Token, Token]] = field(default=None, repr=False, compare=False)
+    
+    @property
+    def start_time(self) -> datetime:
+        """开始时间"""
+        return _ns_to_datetime(self.start_time_ns)
+    
+    @property
+    def end_time(self) -> Optional[datetime]:
+        """结束时间"""
+        return _ns_to_datetime(self.end_time_ns)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式（包含全部跨度）"""
+        return {
+            "trace_id": self.trace_id,
+            "start_time": _ns_to_isoformat(self.start_time_ns),
+            "end_time": _ns_to_isoformat(self.end_time_ns),
+            "total_duration": self.total_duration,
+            "metadata": self.metadata,
+            "spans": [span.to_dict() for span in self.spans],
+        }
+    
+    def get_operation_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        按操作名称汇总已结束跨度的耗时
+        
+        返回:
+            操作名称 -> {"count": 跨度数, "total_duration": 总耗时, "max_duration": 最大耗时}
+        """
+        statistics: Dict[str, Dict[str, Any]] = {}
+        for span in self.spans:
+            duration = span.duration
+            if duration is None:
+                continue
+            stats = statistics.get(span.operation)
+            if stats is None:
+                statistics[span.operation] = {
+                    "count": 1,
+                    "total_duration": duration,
+                    "max_duration": duration,
+                }
+            else:
+                stats["count"] += 1
+                stats["total_duration"] += duration
+                if duration > stats["max_duration"]:
+                    stats["max_duration"] = duration
+        return statistics
+
+
+# 追踪禁用时返回的共享哨兵对象，避免生成ID和分配新对象；调用方不应修改其内容
+_NOOP_SPAN = TraceSpan(span_id="", parent_span_id=None, operation="", start_time_ns=0, start_monotonic_ns=0)
+_NOOP_CONTEXT = TraceContext(trace_id="", start_time_ns=0, start_monotonic_ns=0)
+
+
+# 当前任务中的追踪上下文与当前跨度ID；asyncio.create_task会复制上下文，
+# 因此子任务自动继承父任务的追踪状态，无需显式传递
+_current_trace: ContextVar[Optional[TraceContext]] = ContextVar("current_trace", default=None)
+_current_span_id: ContextVar[Optional[str]] = ContextVar("current_span_id", default=None)
 
 
 class RequestTracer:
@@ -64,6 +202,9 @@ class RequestTracer:
         >>> span = tracer.start_span(context, "adapter_call", adapter="openai")
         >>> tracer.end_span(span)
         >>> tracer.end_trace(context)
+    
+    start_trace会把追踪设为当前任务的当前追踪，之后start_span可以传入
+    context=None使用当前追踪，并自动以当前跨度作为父跨度。
     """
     
     def __init__(self, config: Optional[Dict[str, Any]] = None) -> None:
@@ -75,15 +216,38 @@ class RequestTracer:
                 - max_traces: 最大追踪数（默认1000）
                 - trace_ttl: 追踪TTL（秒，默认3600）
                 - enabled: 是否启用追踪（默认True）
+                - sample_rate: 采样率（0-1，默认1.0，即追踪所有请求）
         """
         self._config = config or {}
         self._max_traces = self._config.get("max_traces", 1000)
         self._trace_ttl = self._config.get("trace_ttl", 3600)
         self._enabled = self._config.get("enabled", True)
+        self._sample_rate: float = min(1.0, max(0.0, self._config.get("sample_rate", 1.0)))
         
         self._traces: Dict[str, TraceContext] = {}
+        # 按开始时间有序的 (开始时间, 追踪ID) 索引，同时用于时间范围查询、过期清理和容量淘汰；
+        # 追踪基本按时间顺序追加，使用双端队列使淘汰最旧追踪为O(1)
+        self._trace_index: Deque[Tuple[int, str]] = deque()
         self._lock = asyncio.Lock()
     
+    def should_sample(self, operation: str) -> bool:
+        """
+        判断本次请求是否追踪
+        
+        调用方在构造追踪元数据之前先调用，未采样的请求不产生任何追踪开销。
+        
+        参数:
+            operation: 操作名称
+        
+        返回:
+            True表示应追踪本次请求
+        """
+        if not self._enabled:
+            return False
+        if self._sample_rate >= 1.0:
+            return True
+        return _id_rng.random() < self._sample_rate
+    
     def start_trace(
         self,
         operation: str,
@@ -102,25 +266,33 @@ class RequestTracer:
             追踪上下文
         """
         if not self._enabled:
-            # 返回一个空的上下文，但不记录
-            return TraceContext(trace_id=trace_id or str(uuid4()))
+            # 返回空上下文，但不记录；未指定追踪ID时直接返回共享哨兵
+            if trace_id is None:
+                return _NOOP_CONTEXT
+            return TraceContext(trace_id=trace_id)
         
-        trace_id = trace_id or str(uuid4())
+        trace_id = trace_id or _new_trace_id()
         context = TraceContext(
             trace_id=trace_id,
-            start_time=datetime.now(),
             metadata=metadata or {},
         )
         
         # 创建根跨度
         root_span = TraceSpan(
-            span_id=str(uuid4()),
+            span_id=_new_span_id(),
             parent_span_id=None,
             operation=operation,
-            start_time=context.start_time,
+            start_time_ns=context.start_time_ns,
+            start_monotonic_ns=context.start_monotonic_ns,
         )
         context.spans.append(root_span)
         
+        # 设置为当前任务的当前追踪，保留令牌以便结束时恢复外层追踪
+        context._context_tokens = (
+            _current_trace.set(context),
+            _current_span_id.set(root_span.span_id),
+        )
+        
         # 存储追踪上下文
         asyncio.create_task(self._store_trace(context))
         
@@ -138,29 +310,50 @@ class RequestTracer:
             await self._cleanup_expired_traces()
             
             # 如果超过最大数量，删除最旧的
-            if len(self._traces) >= self._max_traces:
-                oldest_trace_id = min(
-                    self._traces.keys(),
-                    key=lambda k: self._traces[k].start_time,
-                )
-                del self._traces[oldest_trace_id]
+            while len(self._traces) >= self._max_traces and self._trace_index:
+                self._pop_oldest_trace()
+            
+            previous = self._traces.get(context.trace_id)
+            if previous is not None:
+                self._remove_from_index(previous)
             
             self._traces[context.trace_id] = context
+            # 新追踪的开始时间通常最大，insort基本落在末尾
+            insort(self._trace_index, (context.start_time_ns, context.trace_id))
+    
+    def _remove_from_index(self, trace: TraceContext) -> None:
+        """从时间索引中移除追踪（内部方法，调用方需持有锁）"""
+        entry = (trace.start_time_ns, trace.trace_id)
+        index = bisect_left(self._trace_index, entry)
+        if index < len(self._trace_index) and self._trace_index[index] == entry:
+            del self._trace_index[index]
+    
+    def _pop_oldest_trace(self) -> None:
+        """删除开始时间最早的追踪（内部方法，调用方需持有锁）"""
+        _, trace_id = self._trace_index.popleft()
+        self._traces.pop(trace_id, None)
     
     async def _cleanup_expired_traces(self) -> None:
-        """清理过期追踪（内部方法）"""
-        cutoff = datetime.now() - timedelta(seconds=self._trace_ttl)
-        expired_ids = [
-            trace_id
-            for trace_id, trace in self._traces.items()
-            if trace.start_time < cutoff
-        ]
-        for trace_id in expired_ids:
-            del self._traces[trace_id]
+        """清理过期追踪（内部方法），只从索引头部弹出已过期的部分"""
+        cutoff_ns = time_ns() - int(self._trace_ttl * 1_000_000_000)
+        index = self._trace_index
+        while index and index[0][0] < cutoff_ns:
+            _, trace_id = index.popleft()
+            self._traces.pop(trace_id, None)
+    
+    @staticmethod
+    def get_current_trace() -> Optional[TraceContext]:
+        """
+        获取当前任务的追踪上下文
+        
+        返回:
+            当前追踪上下文（如果存在）
+        """
+        return _current_trace.get()
     
     def start_span(
         self,
-        context: TraceContext,
+        context: Optional[TraceContext],
         operation: str,
         parent_span_id: Optional[str] = None,
         tags: Optional[Dict[str, Any]] = None,
@@ -169,35 +362,40 @@ class RequestTracer:
         开始跨度
         
         参数:
-            context: 追踪上下文
+            context: 追踪上下文（为None时使用当前任务的追踪上下文）
             operation: 操作名称
-            parent_span_id: 父跨度ID（可选，默认使用最后一个跨度）
+            parent_span_id: 父跨度ID（可选，默认使用当前跨度，其次为最后一个跨度）
             tags: 标签（可选）
         
         返回:
             追踪跨度
         """
         if not self._enabled:
-            # 返回一个空的跨度，但不记录
-            return TraceSpan(
-                span_id=str(uuid4()),
-                parent_span_id=parent_span_id,
-                operation=operation,
-                start_time=datetime.now(),
-            )
-        
-        # 如果没有指定父跨度，使用最后一个跨度
-        if parent_span_id is None and context.spans:
-            parent_span_id = context.spans[-1].span_id
+            # 返回共享的空跨度哨兵，不记录
+            return _NOOP_SPAN
+        
+        current_trace = _current_trace.get()
+        if context is None:
+            context = current_trace
+        
+        # 如果没有指定父跨度，优先使用当前跨度，其次使用最后一个跨度
+        if parent_span_id is None and context is not None:
+            if context is current_trace:
+                parent_span_id = _current_span_id.get()
+            if parent_span_id is None and context.spans:
+                parent_span_id = context.spans[-1].span_id
         
         span = TraceSpan(
-            span_id=str(uuid4()),
+            span_id=_new_span_id(),
             parent_span_id=parent_span_id,
             operation=operation,
-            start_time=datetime.now(),
             tags=tags or {},
         )
-        context.spans.append(span)
+        # 没有可用的追踪上下文时，返回未挂载的跨度
+        if context is not None:
+            context.spans.append(span)
+            if context is current_trace:
+                _current_span_id.set(span.span_id)
         
         return span
     
@@ -209,13 +407,19 @@ class RequestTracer:
             span: 追踪跨度
             error: 错误信息（可选）
         """
-        if not self._enabled:
+        if not self._enabled or span is _NOOP_SPAN:
             return
         
-        span.end_time = datetime.now()
-        span.duration = (span.end_time - span.start_time).total_seconds()
+        # 耗时基于单调时钟，结束墙钟时间由开始时间推算，避免重复读取时钟
+        elapsed_ns = monotonic_ns() - span.start_monotonic_ns
+        span.end_time_ns = span.start_time_ns + elapsed_ns
+        span.duration = elapsed_ns / 1e9
         if error:
             span.error = error
+        
+        # 当前跨度结束后，恢复父跨度为当前跨度
+        if _current_span_id.get() == span.span_id:
+            _current_span_id.set(span.parent_span_id)
     
     def add_span_log(self, span: TraceSpan, message: str, level: str = "info") -> None:
         """
@@ -226,11 +430,11 @@ class RequestTracer:
             message: 日志消息
             level: 日志级别
         """
-        if not self._enabled:
+        if not self._enabled or span is _NOOP_SPAN:
             return
         
         span.logs.append({
-            "timestamp": datetime.now().isoformat(),
+            "timestamp_ns": time_ns(),
             "level": level,
             "message": message,
         })
@@ -242,14 +446,25 @@ class RequestTracer:
         参数:
             context: 追踪上下文
         """
-        if not self._enabled:
+        if not self._enabled or context is _NOOP_CONTEXT:
             return
         
-        context.end_time = datetime.now()
-        if context.start_time:
-            context.total_duration = (
-                context.end_time - context.start_time
-            ).total_seconds()
+        elapsed_ns = monotonic_ns() - context.start_monotonic_ns
+        context.end_time_ns = context.start_time_ns + elapsed_ns
+        context.total_duration = elapsed_ns / 1e9
+        
+        tokens = context._context_tokens
+        context._context_tokens = None
+        if tokens is not None and _current_trace.get() is context:
+            trace_token, span_token = tokens
+            try:
+                # 恢复开始追踪前的当前追踪和当前跨度（嵌套追踪结束后回到外层追踪）
+                _current_span_id.reset(span_token)
+                _current_trace.reset(trace_token)
+            except ValueError:
+                # 令牌在其他上下文中创建（例如在另一个任务中结束追踪），只能清除当前追踪
+                _current_trace.set(None)
+                _current_span_id.set(None)
     
     async def get_trace(self, trace_id: str) -> Optional[TraceContext]:
         """
@@ -282,18 +497,23 @@ class RequestTracer:
             追踪上下文列表
         """
         async with self._lock:
-            traces = list(self._traces.values())
+            index = self._trace_index
             
-            # 过滤时间范围
+            # 在有序索引上二分定位时间范围（统一转换为纳秒时间戳比较）
+            low = 0
+            high = len(index)
             if start_time:
-                traces = [t for t in traces if t.start_time >= start_time]
+                start_ns = int(start_time.timestamp() * 1_000_000_000)
+                low = bisect_left(index, (start_ns,))
             if end_time:
-                traces = [t for t in traces if t.start_time <= end_time]
-            
-            # 按时间排序（最新的在前）
-            traces.sort(key=lambda t: t.start_time, reverse=True)
+                end_ns = int(end_time.timestamp() * 1_000_000_000)
+                high = bisect_left(index, (end_ns + 1,))
             
-            return traces[:limit]
+            # 从范围末尾倒序取，最新的在前（双端队列不支持切片，从尾部反向迭代）
+            size = len(index)
+            start = max(low, high - max(limit, 0))
+            selected = islice(reversed(index), size - high, size - start)
+            return [self._traces[trace_id] for _, trace_id in selected]
     
     async def clear_traces(self) -> int:
         """
@@ -305,4 +525,5 @@ class RequestTracer:
         async with self._lock:
             count = len(self._traces)
             self._traces.clear()
+            self._trace_index.clear()
             return count
@@ -12,6 +12,7 @@
     - PerformanceFirstStrategy: 性能优先策略
     - AvailabilityFirstStrategy: 可用性优先策略
     - BalancedStrategy: 平衡模式策略
+    - LeastConnectionsStrategy: 最少连接策略
 
 依赖模块：
     - core.llm.adapters.base: 适配器基类
@@ -19,10 +20,15 @@
     - core.base.health_check: 健康检查
     - typing: 类型注解
     - abc: 抽象基类
+    - asyncio: 并发健康检查、后台健康刷新
+    - time: 健康检查缓存计时
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, TYPE_CHECKING
+import asyncio
+import time
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union, Final, Callable, TYPE_CHECKING
 from core.llm.adapters.base import BaseLLMAdapter
 from core.llm.models import ModelCapability, RoutingStrategy
 from core.base.health_check import HealthStatus, HealthCheckResult
@@ -32,11 +38,100 @@ if TYPE_CHECKING:
     from core.llm.adapters.factory import AdapterFactory
 
 
+# 健康检查缓存使用单调时钟计时，不受系统时间调整影响；模块级别名省去属性查找
+_now = time.monotonic
+# 最热的状态比较使用模块级常量，省去枚举类属性查找
+_HEALTHY = HealthStatus.HEALTHY
+_UNHEALTHY = HealthStatus.UNHEALTHY
+
+# 成本缓存的最大条目数：模型名来自请求，任意取值不应使缓存无限增长
+_MAX_COST_ENTRIES = 4096
+
+# 路由策略取值常量：内部分发使用纯字符串键，避免Enum在哈希和比较上的Python层开销
+COST_FIRST: Final[str] = RoutingStrategy.COST_FIRST.value
+PERFORMANCE_FIRST: Final[str] = RoutingStrategy.PERFORMANCE_FIRST.value
+AVAILABILITY_FIRST: Final[str] = RoutingStrategy.AVAILABILITY_FIRST.value
+BALANCED: Final[str] = RoutingStrategy.BALANCED.value
+LEAST_CONNECTIONS: Final[str] = RoutingStrategy.LEAST_CONNECTIONS.value
+MANUAL: Final[str] = RoutingStrategy.MANUAL.value
+
+
+def _strategy_key(strategy: Union[RoutingStrategy, str]) -> str:
+    """将路由策略（枚举或字符串）转换为内部分发键"""
+    return strategy.value if isinstance(strategy, RoutingStrategy) else strategy
+
+
+def _probe_result(task: "asyncio.Future[HealthCheckResult]") -> Optional[HealthCheckResult]:
+    """
+    读取已完成的健康检查任务结果
+    
+    参数:
+        task: 已完成的健康检查任务
+    
+    返回:
+        健康检查结果；任务被取消或抛出异常时返回None（按检查失败处理）
+    """
+    if task.cancelled() or task.exception() is not None:
+        return None
+    return task.result()
+
+
+async def _check_health_concurrently(
+    adapters: List[BaseLLMAdapter],
+) -> List[Optional[HealthCheckResult]]:
+    """
+    并发执行多个适配器的健康检查
+    
+    参数:
+        adapters: 适配器列表
+    
+    返回:
+        与输入顺序一致的健康检查结果，检查异常的位置为None
+    """
+    results = await asyncio.gather(
+        *(adapter.health_check() for adapter in adapters),
+        return_exceptions=True,
+    )
+    return [None if isinstance(result, BaseException) else result for result in results]
+
+
+def _lookup_average_cost(
+    cost_index: Dict[Tuple[str, str], Optional[float]],
+    adapter: BaseLLMAdapter,
+    model: str,
+) -> Optional[float]:
+    """
+    查询适配器的平均单价（每1K Token），结果缓存在cost_index中
+    
+    参数:
+        cost_index: (适配器名称, 模型名称) -> 平均单价 的缓存字典
+        adapter: 适配器
+        model: 模型名称
+    
+    返回:
+        平均单价（假设输入和输出各占一半），适配器没有成本信息时返回None
+    """
+    key = (adapter.name, model)
+    if key in cost_index:
+        return cost_index[key]
+    
+    cost_info = adapter.get_cost_per_1k_tokens(model)
+    avg_cost = None
+    if cost_info:
+        avg_cost = (cost_info.get("input", 0) + cost_info.get("output", 0)) / 2
+    cost_index[key] = avg_cost
+    return avg_cost
+
+
 class RoutingStrategyBase(ABC):
     """
     路由策略基类
     
     定义路由策略的接口，所有具体策略必须实现此接口。
+    
+    健康检查由AdapterRouter在调用策略前统一完成，策略收到的候选列表
+    已按健康状态过滤（全部不健康时为降级后的完整列表），策略只负责
+    排序选择，不应再自行调用health_check。
     """
     
     @abstractmethod
@@ -50,12 +145,16 @@ class RoutingStrategyBase(ABC):
         
         参数:
             request: 请求信息（包含messages、model、strategy等）
-            adapters: 候选适配器列表
+            adapters: 候选适配器列表（已由路由器过滤健康状态）
         
         返回:
             选中的适配器，如果无法选择返回None
         """
         pass
+    
+    def clear_cache(self) -> None:
+        """清空策略内部缓存（适配器变更时调用，默认无缓存）"""
+        pass
 
 
 class CostFirstStrategy(RoutingStrategyBase):
@@ -63,8 +162,26 @@ class CostFirstStrategy(RoutingStrategyBase):
     成本优先路由策略
     
     选择成本最低的适配器。
+    
+    每个模型维护一份按平均单价升序排列的适配器名称列表，选择时按顺序
+    返回第一个在候选列表中的适配器，只有出现新适配器时才重新排序。
     """
     
+    def __init__(self) -> None:
+        """初始化成本优先策略"""
+        # (适配器名称, 模型名称) -> 平均单价，价格配置稳定，按需计算一次
+        self._cost_index: Dict[Tuple[str, str], Optional[float]] = {}
+        # 模型名称 -> 按平均单价升序排列的适配器名称（不含无成本信息的适配器）
+        self._cost_sorted_adapters: Dict[str, List[str]] = {}
+        # 模型名称 -> 已计入排序的适配器名称（按首次出现顺序，值无意义）
+        self._ranked_names: Dict[str, Dict[str, None]] = {}
+    
+    def clear_cache(self) -> None:
+        """清空成本缓存和排序索引"""
+        self._cost_index.clear()
+        self._cost_sorted_adapters.clear()
+        self._ranked_names.clear()
+    
     async def select_adapter(
         self,
         request: Dict[str, Any],
@@ -74,41 +191,44 @@ class CostFirstStrategy(RoutingStrategyBase):
         if not adapters:
             return None
         
-        # 估算每个适配器的成本
-        best_adapter = None
-        min_cost = float('inf')
+        model = request.get("model", "")
+        candidates = {adapter.name: adapter for adapter in adapters}
+        ranked = self._ranked_names.get(model)
+        if ranked is None and len(self._cost_index) >= _MAX_COST_ENTRIES:
+            # 新模型加入前整体清空：每个模型至少占用一个成本条目，排序索引随之有界
+            self.clear_cache()
+        if ranked is None or not candidates.keys() <= ranked.keys():
+            self._rank_adapters(model, adapters)
+        
+        # 按成本从低到高，第一个在候选列表中的即为成本最低
+        for adapter_name in self._cost_sorted_adapters[model]:
+            adapter = candidates.get(adapter_name)
+            if adapter is not None:
+                return adapter
+        
+        # 如果没有找到有成本信息的适配器，返回第一个适配器
+        return adapters[0]
+    
+    def _rank_adapters(self, model: str, adapters: List[BaseLLMAdapter]) -> None:
+        """
+        将新出现的适配器计入模型的成本排序（内部方法）
         
+        参数:
+            model: 模型名称
+            adapters: 候选适配器列表
+        """
+        cost_index = self._cost_index
+        ranked = self._ranked_names.setdefault(model, {})
         for adapter in adapters:
-            # 检查健康状态
-            try:
-                health = await adapter.health_check()
-                if health.status != HealthStatus.HEALTHY:
-                    continue
-            except Exception:
-                continue
-            
-            # 获取成本信息
-            model = request.get("model", "")
-            cost_info = adapter.get_cost_per_1k_tokens(model)
-            
-            if cost_info:
-                # 简单估算：假设输入和输出各占一半
-                avg_cost = (cost_info.get("input", 0) + cost_info.get("output", 0)) / 2
-                if avg_cost < min_cost:
-                    min_cost = avg_cost
-                    best_adapter = adapter
-        
-        # 如果没有找到有成本信息的适配器，返回第一个健康的适配器
-        if best_adapter is None:
-            for adapter in adapters:
-                try:
-                    health = await adapter.health_check()
-                    if health.status == HealthStatus.HEALTHY:
-                        return adapter
-                except Exception:
-                    continue
-        
-        return best_adapter or (adapters[0] if adapters else None)
+            if adapter.name not in ranked:
+                ranked[adapter.name] = None
+                _lookup_average_cost(cost_index, adapter, model)
+        
+        # 稳定排序：成本相同时先出现的适配器在前
+        self._cost_sorted_adapters[model] = sorted(
+            (name for name in ranked if cost_index[(name, model)] is not None),
+            key=lambda name: cost_index[(name, model)],
+        )
 
 
 class PerformanceFirstStrategy(RoutingStrategyBase):
@@ -127,22 +247,9 @@ class PerformanceFirstStrategy(RoutingStrategyBase):
         if not adapters:
             return None
         
-        # 检查健康状态，选择健康的适配器
-        healthy_adapters = []
-        for adapter in adapters:
-            try:
-                health = await adapter.health_check()
-                if health.status == HealthStatus.HEALTHY:
-                    healthy_adapters.append(adapter)
-            except Exception:
-                continue
-        
-        if not healthy_adapters:
-            return adapters[0] if adapters else None
-        
         # 简单实现：选择第一个健康的适配器
         # TODO: 可以根据历史性能数据选择
-        return healthy_adapters[0]
+        return adapters[0]
 
 
 class AvailabilityFirstStrategy(RoutingStrategyBase):
@@ -161,22 +268,8 @@ class AvailabilityFirstStrategy(RoutingStrategyBase):
         if not adapters:
             return None
         
-        # 检查所有适配器的健康状态
-        best_adapter = None
-        best_status = HealthStatus.UNKNOWN
-        
-        for adapter in adapters:
-            try:
-                health = await adapter.health_check()
-                if health.status == HealthStatus.HEALTHY:
-                    return adapter  # 找到健康的就返回
-                elif health.status.value > best_status.value:
-                    best_status = health.status
-                    best_adapter = adapter
-            except Exception:
-                continue
-        
-        return best_adapter or (adapters[0] if adapters else None)
+        # 候选列表已按健康状态过滤且保持原有顺序，第一个即为首选
+        return adapters[0]
 
 
 class BalancedStrategy(RoutingStrategyBase):
@@ -186,6 +279,14 @@ class BalancedStrategy(RoutingStrategyBase):
     综合考虑成本、性能、可用性等因素。
     """
     
+    def __init__(self) -> None:
+        """初始化平衡模式策略"""
+        self._cost_index: Dict[Tuple[str, str], Optional[float]] = {}
+    
+    def clear_cache(self) -> None:
+        """清空成本缓存"""
+        self._cost_index.clear()
+    
     async def select_adapter(
         self,
         request: Dict[str, Any],
@@ -195,26 +296,53 @@ class BalancedStrategy(RoutingStrategyBase):
         if not adapters:
             return None
         
-        # 首先过滤出健康的适配器
-        healthy_adapters = []
+        # 简单实现：优先选择有成本信息的适配器，然后选择第一个
+        model = request.get("model", "")
+        cost_index = self._cost_index
+        if len(cost_index) >= _MAX_COST_ENTRIES:
+            cost_index.clear()
         for adapter in adapters:
-            try:
-                health = await adapter.health_check()
-                if health.status == HealthStatus.HEALTHY:
-                    healthy_adapters.append(adapter)
-            except Exception:
-                continue
+            if _lookup_average_cost(cost_index, adapter, model) is not None:
+                return adapter
         
-        if not healthy_adapters:
-            return adapters[0] if adapters else None
+        return adapters[0]
+
+
+class LeastConnectionsStrategy(RoutingStrategyBase):
+    """
+    最少连接路由策略
+    
+    选择进行中请求数最少的适配器。LLM请求耗时差异很大（取决于Token数），
+    相比轮询能避免把多个长请求堆到同一个适配器上。
+    """
+    
+    def __init__(self, inflight: Dict[str, int]) -> None:
+        """
+        初始化最少连接策略
         
-        # 简单实现：优先选择有成本信息的适配器，然后选择第一个
-        for adapter in healthy_adapters:
-            model = request.get("model", "")
-            if adapter.get_cost_per_1k_tokens(model):
-                return adapter
+        参数:
+            inflight: 适配器名称 -> 进行中请求数（由AdapterRouter维护，共享引用）
+        """
+        self._inflight = inflight
+    
+    async def select_adapter(
+        self,
+        request: Dict[str, Any],
+        adapters: List[BaseLLMAdapter],
+    ) -> Optional[BaseLLMAdapter]:
+        """选择进行中请求最少的适配器（并列时取靠前的）"""
+        if not adapters:
+            return None
         
-        return healthy_adapters[0]
+        inflight = self._inflight
+        return min(adapters, key=lambda adapter: inflight.get(adapter.name, 0))
+
+
+class _StrategyTable(dict):
+    """策略分发表：未注册的策略键回退到平衡模式（仅未命中时走__missing__）"""
+    
+    def __missing__(self, key: str) -> RoutingStrategyBase:
+        return self[BALANCED]
 
 
 class AdapterRouter:
@@ -242,29 +370,34 @@ class AdapterRouter:
             factory: 适配器工厂实例
         """
         self._factory = factory
-        self._strategies: Dict[RoutingStrategy, RoutingStrategyBase] = {
-            RoutingStrategy.COST_FIRST: CostFirstStrategy(),
-            RoutingStrategy.PERFORMANCE_FIRST: PerformanceFirstStrategy(),
-            RoutingStrategy.AVAILABILITY_FIRST: AvailabilityFirstStrategy(),
-            RoutingStrategy.BALANCED: BalancedStrategy(),
-        }
+        # adapter_name -> 进行中请求数
+        self._inflight: Dict[str, int] = defaultdict(int)
+        self._strategies: Dict[str, RoutingStrategyBase] = _StrategyTable({
+            COST_FIRST: CostFirstStrategy(),
+            PERFORMANCE_FIRST: PerformanceFirstStrategy(),
+            AVAILABILITY_FIRST: AvailabilityFirstStrategy(),
+            BALANCED: BalancedStrategy(),
+            LEAST_CONNECTIONS: LeastConnectionsStrategy(self._inflight),
+        })
         self._load_balancer: LoadBalancer = LoadBalancer(LoadBalanceStrategy.ROUND_ROBIN)
-        self._health_cache: Dict[str, HealthCheckResult] = {}  # adapter_name -> health_result
+        # adapter_name -> (health_result, timestamp)，单个字典一次查找即可取得结果和时间
+        self._health_cache: Dict[str, Tuple[HealthCheckResult, float]] = {}
         self._health_cache_ttl: float = 60.0  # 健康检查缓存TTL（秒）
-        self._health_cache_timestamps: Dict[str, float] = {}  # adapter_name -> timestamp
+        # 后台健康刷新任务；运行期间请求路径只读缓存，不再内联执行健康检查
+        self._refresher_task: Optional[asyncio.Task] = None
     
     async def route(
         self,
         request: Dict[str, Any],
-        strategy: RoutingStrategy = RoutingStrategy.BALANCED,
-        adapters: Optional[List[BaseLLMAdapter]] = None,
+        strategy: Union[RoutingStrategy, str] = RoutingStrategy.BALANCED,
+        adapters: Optional[Sequence[BaseLLMAdapter]] = None,
     ) -> Optional[BaseLLMAdapter]:
         """
         根据策略路由到合适的适配器
         
         参数:
             request: 请求信息
-            strategy: 路由策略
+            strategy: 路由策略（枚举或对应的字符串值）
             adapters: 候选适配器列表（如果为None，则从工厂获取）
         
         返回:
@@ -277,8 +410,10 @@ class AdapterRouter:
         if not adapters:
             return None
         
+        strategy_key = _strategy_key(strategy)
+        
         # 如果是手动模式，直接返回指定的适配器
-        if strategy == RoutingStrategy.MANUAL:
+        if strategy_key == MANUAL:
             model = request.get("model")
             if model:
                 adapter_name = self._factory.registry.get_adapter_for_model(model)
@@ -287,18 +422,21 @@ class AdapterRouter:
                     pass
             return adapters[0] if adapters else None
         
-        # 使用策略选择适配器
-        strategy_impl = self._strategies.get(strategy)
-        if not strategy_impl:
-            # 默认使用平衡模式
-            strategy_impl = self._strategies[RoutingStrategy.BALANCED]
+        # 使用策略选择适配器（未注册的策略默认使用平衡模式）
+        strategy_impl = self._strategies[strategy_key]
         
-        # 过滤健康的适配器（故障转移机制）
-        healthy_adapters = await self._filter_healthy_adapters(adapters, request.get("require_healthy", True))
+        # 过滤健康的适配器（故障转移机制）；这是每次路由唯一的健康检查，策略不再重复检查，
+        # 因此无论请求的require_healthy取值如何都必须执行（结果带缓存）
+        if strategy_key == AVAILABILITY_FIRST:
+            # 可用性优先只需要一个健康的适配器：按优先级取第一个通过检查的，其余检查取消
+            first_healthy = await self._select_first_healthy(adapters)
+            healthy_adapters = [first_healthy] if first_healthy else []
+        else:
+            healthy_adapters = await self._filter_healthy_adapters(adapters)
         
         if not healthy_adapters:
-            # 如果没有健康的适配器，尝试使用所有适配器（降级）
-            healthy_adapters = adapters
+            # 如果没有健康的适配器，尝试使用未确认不健康的适配器，都不健康时使用所有适配器（降级）
+            healthy_adapters = self._filter_not_unhealthy(adapters) or adapters
         
         # 使用策略选择适配器
         selected = await strategy_impl.select_adapter(request, healthy_adapters)
@@ -334,9 +472,9 @@ class AdapterRouter:
     
     async def _filter_healthy_adapters(
         self,
-        adapters: List[BaseLLMAdapter],
+        adapters: Sequence[BaseLLMAdapter],
         require_healthy: bool = True,
-    ) -> List[BaseLLMAdapter]:
+    ) -> Sequence[BaseLLMAdapter]:
         """
         过滤健康的适配器（故障转移机制）
         
@@ -350,42 +488,248 @@ class AdapterRouter:
         if not require_healthy:
             return adapters
         
-        import time
-        healthy_adapters = []
-        current_time = time.time()
+        if self.is_health_refresher_running():
+            # 后台刷新负责更新缓存，这里只读缓存；尚未检查过的适配器视为健康，避免阻塞请求
+            return [adapter for adapter in adapters if self._is_healthy_or_pending(adapter.name)]
+        
+        current_time = _now()
         
+        # 第一遍：根据缓存判断健康状态，收集需要重新检查的适配器
+        is_healthy: Dict[int, bool] = {}
+        need_check: List[BaseLLMAdapter] = []
         for adapter in adapters:
-            adapter_name = adapter.name
-            
-            # 检查缓存
-            cached_health = self._health_cache.get(adapter_name)
-            cache_timestamp = self._health_cache_timestamps.get(adapter_name, 0)
-            
             # 如果缓存有效，使用缓存
-            if cached_health and (current_time - cache_timestamp) < self._health_cache_ttl:
-                if cached_health.status == HealthStatus.HEALTHY:
-                    healthy_adapters.append(adapter)
-                continue
-            
-            # 执行健康检查
-            try:
-                health = await adapter.health_check()
-                # 更新缓存
-                self._health_cache[adapter_name] = health
-                self._health_cache_timestamps[adapter_name] = current_time
-                
-                if health.status == HealthStatus.HEALTHY:
-                    healthy_adapters.append(adapter)
-            except Exception:
-                # 健康检查失败，标记为不健康
-                unhealthy_health = HealthCheckResult(
-                    status=HealthStatus.UNHEALTHY,
-                    message="健康检查异常"
-                )
-                self._health_cache[adapter_name] = unhealthy_health
-                self._health_cache_timestamps[adapter_name] = current_time
+            cached_health = self._get_cached_health(adapter.name, current_time)
+            if cached_health:
+                is_healthy[id(adapter)] = cached_health.status is _HEALTHY
+            else:
+                need_check.append(adapter)
+        
+        # 第二遍：并发执行缓存未命中的健康检查，耗时取决于最慢的一个而非总和
+        if need_check:
+            healths = await _check_health_concurrently(need_check)
+            for adapter, health in zip(need_check, healths):
+                health = self._cache_health(adapter.name, health, current_time)
+                is_healthy[id(adapter)] = health.status is _HEALTHY
+        
+        # 保持候选列表原有顺序
+        return [adapter for adapter in adapters if is_healthy[id(adapter)]]
+    
+    def _filter_not_unhealthy(
+        self,
+        adapters: Sequence[BaseLLMAdapter],
+    ) -> List[BaseLLMAdapter]:
+        """
+        过滤未确认不健康的适配器（降级时优先使用，内部方法）
         
-        return healthy_adapters
+        参数:
+            adapters: 候选适配器列表
+        
+        返回:
+            缓存状态不是UNHEALTHY（例如UNKNOWN）的适配器，保持原有顺序
+        """
+        health_cache = self._health_cache
+        return [
+            adapter for adapter in adapters
+            if adapter.name not in health_cache or health_cache[adapter.name][0].status is not _UNHEALTHY
+        ]
+    
+    async def _select_first_healthy(
+        self,
+        adapters: Sequence[BaseLLMAdapter],
+    ) -> Optional[BaseLLMAdapter]:
+        """
+        选择第一个确认健康的适配器（可用性优先路由使用）
+        
+        缓存中已健康的适配器直接返回；否则同时启动全部健康检查，按候选顺序（配置的优先级）
+        依次等待结果：优先级更高的适配器确认不健康后才考虑下一个，多个适配器健康时
+        结果与检查完成的先后无关。选出适配器后其余检查被取消。
+        
+        参数:
+            adapters: 候选适配器列表
+        
+        返回:
+            健康的适配器，如果都不健康返回None
+        """
+        if self.is_health_refresher_running():
+            for adapter in adapters:
+                if self._is_healthy_or_pending(adapter.name):
+                    return adapter
+            return None
+        
+        current_time = _now()
+        
+        need_check: List[BaseLLMAdapter] = []
+        for adapter in adapters:
+            cached_health = self._get_cached_health(adapter.name, current_time)
+            if not cached_health:
+                need_check.append(adapter)
+            elif cached_health.status is _HEALTHY:
+                return adapter
+        
+        if not need_check:
+            return None
+        
+        probes = [
+            (adapter, asyncio.ensure_future(adapter.health_check()))
+            for adapter in need_check
+        ]
+        processed = 0
+        try:
+            for adapter, task in probes:
+                await asyncio.wait({task})
+                processed += 1
+                health = self._cache_health(adapter.name, _probe_result(task), current_time)
+                if health.status is _HEALTHY:
+                    return adapter
+        finally:
+            # 已完成的检查结果写入缓存；取消仍在进行的检查，并等待其结束，避免遗留未回收的任务
+            running = []
+            for adapter, task in probes[processed:]:
+                if not task.done():
+                    task.cancel()
+                    running.append(task)
+                elif not task.cancelled():
+                    self._cache_health(adapter.name, _probe_result(task), current_time)
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+        
+        return None
+    
+    def _get_cached_health(
+        self,
+        adapter_name: str,
+        current_time: float,
+    ) -> Optional[HealthCheckResult]:
+        """
+        获取未过期的缓存健康检查结果（内部方法）
+        
+        参数:
+            adapter_name: 适配器名称
+            current_time: 当前时间戳
+        
+        返回:
+            缓存的健康检查结果，不存在或已过期返回None
+        """
+        entry = self._health_cache.get(adapter_name)
+        if entry is not None:
+            cached_health, cache_timestamp = entry
+            if (current_time - cache_timestamp) < self._health_cache_ttl:
+                return cached_health
+        return None
+    
+    def _cache_health(
+        self,
+        adapter_name: str,
+        health: Optional[HealthCheckResult],
+        current_time: float,
+    ) -> HealthCheckResult:
+        """
+        缓存健康检查结果（内部方法）
+        
+        参数:
+            adapter_name: 适配器名称
+            health: 健康检查结果（检查异常时为None）
+            current_time: 当前时间戳
+        
+        返回:
+            实际缓存的健康检查结果
+        """
+        if health is None:
+            # 健康检查失败，标记为不健康
+            health = HealthCheckResult(
+                status=HealthStatus.UNHEALTHY,
+                message="健康检查异常"
+            )
+        self._health_cache[adapter_name] = (health, current_time)
+        return health
+    
+    def _is_healthy_or_pending(self, adapter_name: str) -> bool:
+        """
+        根据后台刷新维护的缓存判断适配器是否可用（内部方法）
+        
+        参数:
+            adapter_name: 适配器名称
+        
+        返回:
+            缓存结果为健康，或尚无缓存结果时返回True
+        """
+        entry = self._health_cache.get(adapter_name)
+        return entry is None or entry[0].status is _HEALTHY
+    
+    async def refresh_health(self, adapters: Sequence[BaseLLMAdapter]) -> None:
+        """
+        并发刷新一组适配器的健康检查缓存
+        
+        参数:
+            adapters: 需要刷新的适配器列表
+        """
+        if not adapters:
+            return
+        healths = await _check_health_concurrently(adapters)
+        current_time = _now()
+        for adapter, health in zip(adapters, healths):
+            self._cache_health(adapter.name, health, current_time)
+    
+    async def start_health_refresher(
+        self,
+        adapters_provider: Callable[[], Sequence[BaseLLMAdapter]],
+        interval: Optional[float] = None,
+    ) -> None:
+        """
+        启动后台健康刷新任务
+        
+        启动后立即刷新一次，之后周期性刷新；运行期间路由只读取缓存，
+        请求不再承担健康检查的往返延迟。
+        
+        参数:
+            adapters_provider: 返回当前适配器列表的回调
+            interval: 刷新间隔（秒，默认为缓存TTL的一半）
+        """
+        if self.is_health_refresher_running():
+            return
+        if not interval or interval <= 0:
+            interval = self._health_cache_ttl / 2
+        self._refresher_task = asyncio.create_task(
+            self._refresh_health_loop(adapters_provider, interval)
+        )
+    
+    async def _refresh_health_loop(
+        self,
+        adapters_provider: Callable[[], Sequence[BaseLLMAdapter]],
+        interval: float,
+    ) -> None:
+        """
+        后台健康刷新循环（内部方法）
+        
+        参数:
+            adapters_provider: 返回当前适配器列表的回调
+            interval: 刷新间隔（秒）
+        """
+        while True:
+            await self.refresh_health(adapters_provider())
+            await asyncio.sleep(interval)
+    
+    async def stop_health_refresher(self) -> None:
+        """停止后台健康刷新任务，之后恢复请求时按TTL检查"""
+        task = self._refresher_task
+        self._refresher_task = None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    
+    def is_health_refresher_running(self) -> bool:
+        """
+        后台健康刷新任务是否在运行
+        
+        返回:
+            是否在运行
+        """
+        return self._refresher_task is not None and not self._refresher_task.done()
     
     async def get_healthy_adapters(
         self,
@@ -407,12 +751,12 @@ class AdapterRouter:
         
         healthy_adapters = await self._filter_healthy_adapters(adapters, require_healthy=True)
         
-        # 如果指定了能力要求，进一步过滤
+        # 如果指定了能力要求，进一步过滤（所需能力掩码只计算一次，适配器掩码缓存在适配器上）
         if capability:
+            required_mask = capability.to_mask()
             filtered = []
             for adapter in healthy_adapters:
-                adapter_capability = adapter.get_capability()
-                if adapter_capability and self._match_capability(adapter_capability, capability):
+                if self._match_capability(adapter, required_mask):
                     filtered.append(adapter)
             return filtered
         
@@ -420,44 +764,36 @@ class AdapterRouter:
     
     def _match_capability(
         self,
-        adapter_capability: ModelCapability,
-        required_capability: ModelCapability,
+        adapter: BaseLLMAdapter,
+        required_mask: int,
     ) -> bool:
         """
         检查适配器能力是否满足要求
         
         参数:
-            adapter_capability: 适配器能力
-            required_capability: 所需能力
+            adapter: 适配器
+            required_mask: 所需能力位掩码
         
         返回:
             是否满足要求
         """
-        # 检查所有必需的能力
-        if required_capability.reasoning and not adapter_capability.reasoning:
-            return False
-        if required_capability.creativity and not adapter_capability.creativity:
-            return False
-        if required_capability.function_calling and not adapter_capability.function_calling:
-            return False
-        if required_capability.vision and not adapter_capability.vision:
-            return False
-        # cost_effective、fast、multilingual 是可选属性，不强制要求
-        return True
+        # 检查所有必需的能力（位掩码一次比较）；cost_effective、fast、multilingual 是可选属性，不强制要求
+        offered_mask = adapter.get_capability_mask()
+        return offered_mask is not None and (offered_mask & required_mask) == required_mask
     
     def register_strategy(
         self,
-        strategy: RoutingStrategy,
+        strategy: Union[RoutingStrategy, str],
         implementation: RoutingStrategyBase,
     ) -> None:
         """
         注册自定义路由策略
         
         参数:
-            strategy: 路由策略枚举
+            strategy: 路由策略（枚举或对应的字符串值）
             implementation: 策略实现
         """
-        self._strategies[strategy] = implementation
+        self._strategies[_strategy_key(strategy)] = implementation
     
     def set_load_balance_strategy(self, strategy: LoadBalanceStrategy) -> None:
         """
@@ -477,10 +813,40 @@ class AdapterRouter:
         """
         self._load_balancer.set_weights(weights)
     
+    def record_connection(self, adapter_name: str, increment: int = 1) -> None:
+        """
+        记录适配器进行中请求数的变化（调用开始时+1，结束时-1）
+        
+        参数:
+            adapter_name: 适配器名称
+            increment: 增量（正数表示增加，负数表示减少）
+        """
+        count = self._inflight[adapter_name] + increment
+        self._inflight[adapter_name] = count if count > 0 else 0
+        self._load_balancer.record_connection(adapter_name, increment)
+    
+    def clear_cost_cache(self) -> None:
+        """清空所有策略的成本缓存（适配器注册或价格配置变更后调用）"""
+        for strategy_impl in self._strategies.values():
+            strategy_impl.clear_cache()
+    
+    def invalidate_health(self, adapter_name: str) -> None:
+        """
+        使指定适配器的健康检查缓存失效（调用失败后使用，下次路由时重新检查）
+        
+        后台刷新运行期间，路由不会内联检查，因此改为标记为不健康，直到下一轮刷新。
+        
+        参数:
+            adapter_name: 适配器名称
+        """
+        if self.is_health_refresher_running():
+            self._cache_health(adapter_name, None, _now())
+        else:
+            self._health_cache.pop(adapter_name, None)
+    
     def clear_health_cache(self) -> None:
         """清空健康检查缓存"""
         self._health_cache.clear()
-        self._health_cache_timestamps.clear()
     
     def get_load_balance_statistics(self) -> Dict[str, Any]:
         """
@@ -17,9 +17,11 @@
     - infrastructure.log: 日志管理
 """
 
-from typing import List, Dict, Any, Optional, AsyncIterator, TYPE_CHECKING
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple, TYPE_CHECKING
+import asyncio
+from collections import deque
 from datetime import datetime
-from time import time as time_now
+from time import monotonic, perf_counter_ns
 from core.base.service import BaseService
 from core.llm.models import LLMResponse, LLMMessage, RoutingStrategy
 from core.llm.context import ConversationContext
@@ -33,17 +35,27 @@ else:
     from core.llm.routing import AdapterRouter
 from core.llm.utils.retry import retry_with_backoff
 from core.llm.utils.token_counter import TokenCounter
+from core.llm.utils.stream_batcher import batch_stream_chunks
 from core.base.health_check import HealthCheckResult, HealthStatus
 from core.llm.connection_pool import ConnectionPoolManager
 from core.llm.request_cache import RequestCache, RequestDeduplicator
 from core.llm.cost_manager import CostManager
 try:
-    from core.llm.metrics_collector import MetricsCollector
+    from core.llm.metrics_collector import MetricsCollector, PROMETHEUS_AVAILABLE
     METRICS_AVAILABLE = True
 except ImportError:
     METRICS_AVAILABLE = False
+    PROMETHEUS_AVAILABLE = False
     MetricsCollector = None
-from core.llm.request_tracer import RequestTracer
+from core.llm.request_tracer import RequestTracer, TraceContext, TraceSpan
+
+
+# 模型到适配器解析结果缓存的最大条目数（模型名来自请求参数，需防止无限增长）
+_MAX_CACHED_ADAPTERS = 256
+
+# 调用失败日志的堆栈采样：每个时间窗口内最多记录的完整堆栈数
+_TRACEBACK_SAMPLE_LIMIT = 5
+_TRACEBACK_SAMPLE_WINDOW = 60.0
 
 
 class LLMError(Exception):
@@ -85,20 +97,47 @@ class LLMService(BaseService):
             config: 服务配置字典
         """
         super().__init__(config)
+        # 配置在构造时解析一次，请求路径上只读实例属性，不再逐级查找配置字典
+        llm_config = config.get("llm", {})
+        health_config = llm_config.get("health_check", {})
+        self._llm_config: Dict[str, Any] = llm_config
         self._adapters: Dict[str, BaseLLMAdapter] = {}
-        self._default_model: str = config.get("llm", {}).get("default_model", "gpt-3.5-turbo")
+        # 已注册适配器的只读快照，注册时重建，路由时直接传给路由器而不必每次复制
+        self._adapter_values: Tuple[BaseLLMAdapter, ...] = ()
+        self._default_model: str = llm_config.get("default_model", "gpt-3.5-turbo")
+        self._default_adapter_name: Optional[str] = llm_config.get("default_adapter")
+        # 模型名 -> 适配器的分发表（非路由模式），注册适配器时按注册表映射重建
+        self._adapter_cache: Dict[Optional[str], BaseLLMAdapter] = {}
+        # 解析好的默认适配器：已注册的default_adapter，否则为最先注册的适配器，注册时维护
+        self._default_adapter: Optional[BaseLLMAdapter] = None
+        # 是否已有可用适配器；适配器只增不减，注册后置位，请求路径只读该标志
+        self._adapters_ready: bool = False
         self._registry: AdapterRegistry = AdapterRegistry()
         self._factory: Optional[AdapterFactory] = None
         self._router: Optional[AdapterRouter] = None
-        self._auto_discover: bool = config.get("llm", {}).get("auto_discover_adapters", True)
-        self._enable_routing: bool = config.get("llm", {}).get("enable_routing", False)
+        self._auto_discover: bool = llm_config.get("auto_discover_adapters", True)
+        self._enable_routing: bool = llm_config.get("enable_routing", False)
         self._default_routing_strategy: RoutingStrategy = RoutingStrategy(
-            config.get("llm", {}).get("default_routing_strategy", "balanced")
+            llm_config.get("default_routing_strategy", "balanced")
         )
         self._token_counter: TokenCounter = TokenCounter()
+        # adapter_name -> (上次尝试时间, 连续失败次数)，自动注册失败的适配器按指数退避重试
+        self._failed_adapters: Dict[str, Tuple[float, int]] = {}
+        self._adapter_retry_base: float = llm_config.get("adapter_retry_base", 30.0)
+        self._adapter_retry_max_attempts: int = llm_config.get("adapter_retry_max_attempts", 5)
+        # 重试配置
+        self._max_retries: int = int(llm_config.get("max_retries", 3))
+        self._retry_initial_wait: float = llm_config.get("retry_initial_wait", 1.0)
+        self._retry_max_wait: float = llm_config.get("retry_max_wait", 10.0)
+        # 最近记录完整堆栈的时间，失败集中爆发时只为少量失败格式化堆栈
+        self._traceback_times: deque = deque(maxlen=_TRACEBACK_SAMPLE_LIMIT)
+        # adapter_name -> (检查时间, 健康检查结果)，短时间内重复的健康检查直接复用
+        self._health_cache: Dict[str, Tuple[float, HealthCheckResult]] = {}
+        self._health_cache_ttl: float = health_config.get("cache_ttl", 5.0)
+        # 同时进行的健康检查上限，避免适配器较多时占满共享连接池
+        self._health_check_concurrency: int = max(1, health_config.get("concurrency", 8))
         
         # 性能优化组件
-        llm_config = config.get("llm", {})
         perf_config = llm_config.get("performance", {})
         
         # 连接池管理器
@@ -108,6 +147,8 @@ class LLMService(BaseService):
                 max_connections=perf_config.get("max_connections", 100),
                 max_keepalive_connections=perf_config.get("max_keepalive_connections", 20),
                 timeout=perf_config.get("connection_timeout", 30.0),
+                keepalive_expiry=perf_config.get("keepalive_expiry", 5.0),
+                http2=perf_config.get("enable_http2", False),
             )
         
         # 请求缓存
@@ -117,6 +158,13 @@ class LLMService(BaseService):
                 ttl=perf_config.get("cache_ttl", 3600.0),
                 max_size=perf_config.get("cache_max_size", 1000),
             )
+        # 温度不高于该阈值的请求视为确定性请求，结果可缓存复用
+        self._cache_temperature_threshold: float = perf_config.get("cache_temperature_threshold", 0.0)
+        # 流式响应块合并阈值（stream_chat启用batch_chunks时生效）
+        self._stream_batch_max_chars: int = perf_config.get("stream_batch_max_chars", 256)
+        self._stream_batch_interval: float = perf_config.get("stream_batch_interval_ms", 20) / 1000
+        # 初始化时预加载默认模型的Token编码器
+        self._preload_tokenizer: bool = perf_config.get("preload_tokenizer", False)
         
         # 请求去重器
         self._request_deduplicator: Optional[RequestDeduplicator] = None
@@ -133,11 +181,11 @@ class LLMService(BaseService):
         monitoring_config = llm_config.get("monitoring", {})
         self._metrics_collector: Optional[MetricsCollector] = None
         if monitoring_config.get("enabled", True) and METRICS_AVAILABLE:
-            try:
+            if PROMETHEUS_AVAILABLE:
                 self._metrics_collector = MetricsCollector()
-            except ImportError:
+            else:
+                # 保持为None，请求路径上直接跳过全部指标调用
                 self.logger.warning("prometheus_client未安装，监控功能已禁用")
-                self._metrics_collector = None
         
         # 请求追踪器
         self._request_tracer: Optional[RequestTracer] = None
@@ -153,33 +201,64 @@ class LLMService(BaseService):
             self._registry.discover_adapters()
             await self._auto_register_adapters()
         
+        # 预加载编码器：首个请求不再承担下载和构建BPE表的延迟；失败时在首次计数时重试
+        if self._preload_tokenizer:
+            try:
+                await asyncio.to_thread(self._token_counter.preload, [self._default_model])
+            except Exception as e:
+                self.logger.warning(f"预加载Token编码器失败: {e}")
+        
         # 初始化适配器工厂和路由层（如果启用路由）
         if self._enable_routing:
             self._factory = AdapterFactory(self._registry)
             self._router = AdapterRouter(self._factory)
             self.logger.info("适配器路由层已启用")
+            
+            # 配置了检查间隔时，由后台任务定期刷新健康状态，请求路径只读缓存
+            health_config = self._llm_config.get("health_check", {})
+            health_interval = health_config.get("interval", 0)
+            if health_config.get("enabled", True) and health_interval > 0:
+                await self._router.start_health_refresher(
+                    lambda: self._adapter_values,
+                    interval=health_interval,
+                )
+                self.logger.info(f"后台健康检查已启动，间隔: {health_interval}秒")
         
         self.logger.info(f"LLM服务初始化完成，默认模型: {self._default_model}")
         self.logger.info(f"已注册适配器: {list(self._adapters.keys())}")
+        if not self._adapters_ready:
+            self.logger.warning("初始化完成但没有可用的适配器，请通过register_adapter注册后再发起请求")
     
     async def _auto_register_adapters(self) -> None:
         """
         自动注册适配器
         
-        根据配置自动创建并注册适配器实例。
+        根据配置自动创建并注册适配器实例。创建失败的适配器按指数退避
+        （adapter_retry_base * 2^(失败次数-1) 秒）后才会再次尝试，
+        连续失败达到 adapter_retry_max_attempts 次后不再尝试。
         """
-        llm_config = self._config.get("llm", {})
+        llm_config = self._llm_config
         adapters_config = llm_config.get("adapters", {})
         
         # 注册模型到适配器的映射
-        model_mapping = llm_config.get("model_adapter_mapping", {})
-        for model, adapter_name in model_mapping.items():
-            self._registry.register_model_mapping(model, adapter_name)
+        self._registry.register_model_mappings(llm_config.get("model_adapter_mapping", {}))
         
         # 获取所有可用的适配器
         available_adapters = self._registry.get_available_adapters()
         
+        # 第一步：同步解析每个适配器的配置（开销很小）
+        now = monotonic()
+        prepared: List[Tuple[str, Dict[str, Any]]] = []
         for adapter_name in available_adapters:
+            # 之前注册失败的适配器：退避期内或超过最大尝试次数时跳过
+            failure = self._failed_adapters.get(adapter_name)
+            if failure is not None:
+                last_try, attempts = failure
+                if attempts >= self._adapter_retry_max_attempts:
+                    continue
+                if now - last_try < self._adapter_retry_base * (2 ** (attempts - 1)):
+                    continue
+            
             # 跳过LiteLLM适配器（需要特殊处理，因为它是可选的）
             if adapter_name == "litellm-adapter":
                 # LiteLLM适配器需要检查是否可用
@@ -208,20 +287,38 @@ class LLMService(BaseService):
             
             # 对于LiteLLM适配器，即使没有配置也可以注册（LiteLLM可以从环境变量读取）
             if adapter_config or adapter_name == "litellm-adapter":
-                try:
-                    # 将全局配置传递给适配器，以便适配器可以读取超时等全局设置
-                    adapter_config_with_global = (adapter_config.copy() if adapter_config else {})
-                    adapter_config_with_global["_global_config"] = self._config
-                    
-                    adapter = await self._registry.create_adapter(
-                        adapter_name,
-                        adapter_config_with_global,
-                        connection_pool=self._connection_pool,
-                    )
-                    self._adapters[adapter_name] = adapter
-                    self.logger.info(f"自动注册适配器: {adapter_name}")
-                except Exception as e:
-                    self.logger.warning(f"适配器 {adapter_name} 自动注册失败: {e}")
+                # 复制适配器配置：适配器初始化时会更新自身配置，不能修改服务的配置树
+                prepared.append((adapter_name, dict(adapter_config) if adapter_config else {}))
+        
+        # 第二步：并发创建适配器（初始化可能涉及网络连接），启动耗时取决于最慢的一个
+        created = await asyncio.gather(
+            *(
+                self._registry.create_adapter(
+                    adapter_name,
+                    adapter_config,
+                    connection_pool=self._connection_pool,
+                    # 全局配置单独传入，适配器可读取超时等全局设置
+                    global_config=self._config,
+                )
+                for adapter_name, adapter_config in prepared
+            ),
+            return_exceptions=True,
+        )
+        
+        # 按发现顺序注册，保证默认回退适配器稳定
+        for (adapter_name, _), adapter in zip(prepared, created):
+            if isinstance(adapter, Exception):
+                attempts = self._failed_adapters.get(adapter_name, (0.0, 0))[1] + 1
+                self._failed_adapters[adapter_name] = (now, attempts)
+                self.logger.warning(f"适配器 {adapter_name} 自动注册失败（第{attempts}次）: {adapter}")
+                continue
+            if isinstance(adapter, BaseException):
+                raise adapter
+            self._failed_adapters.pop(adapter_name, None)
+            self._adapters[adapter_name] = adapter
+            self._remember_default_adapter(adapter)
+            self.logger.info(f"自动注册适配器: {adapter_name}")
+        self._rebuild_adapter_cache()
     
     def register_adapter(self, adapter: BaseLLMAdapter) -> None:
         """
@@ -236,8 +333,55 @@ class LLMService(BaseService):
             >>> service.register_adapter(adapter)
         """
         self._adapters[adapter.name] = adapter
+        self._health_cache.pop(adapter.name, None)
+        self._remember_default_adapter(adapter)
+        self._rebuild_adapter_cache()
+        if self._router:
+            self._router.clear_cost_cache()
         self.logger.info(f"手动注册适配器: {adapter.name} (provider: {adapter.provider})")
     
+    def _rebuild_adapter_cache(self) -> None:
+        """
+        重建模型到适配器的分发表（内部方法）
+        
+        默认模型和注册表中显式映射到已注册适配器的模型预先写入，未指定模型时
+        直接命中默认适配器；其余模型（模糊匹配或未知模型）在首次请求时解析后写入。
+        同时刷新已注册适配器的快照。
+        """
+        self._adapter_values = tuple(self._adapters.values())
+        table: Dict[Optional[str], BaseLLMAdapter] = {}
+        if self._default_adapter is None:
+            self._adapter_cache = table
+            return
+        table[None] = self._default_adapter
+        table[self._default_model] = self._resolve_adapter(self._default_model)
+        for model in self._registry.get_supported_models():
+            if len(table) >= _MAX_CACHED_ADAPTERS:
+                break
+            adapter = self._adapters.get(self._registry.get_adapter_for_model(model))
+            if adapter is not None:
+                table[model] = adapter
+        self._adapter_cache = table
+    
+    def _remember_default_adapter(self, adapter: BaseLLMAdapter) -> None:
+        """
+        维护默认适配器引用（内部方法）
+        
+        配置的default_adapter注册后优先作为默认适配器，此前使用最先注册的适配器；
+        同名适配器重新注册时替换为新实例，与_adapters中保存的保持一致。
+        同时标记服务已有可用适配器。
+        
+        参数:
+            adapter: 刚注册的适配器实例
+        """
+        if (
+            self._default_adapter is None
+            or adapter.name == self._default_adapter_name
+            or adapter.name == self._default_adapter.name
+        ):
+            self._default_adapter = adapter
+        self._adapters_ready = True
+    
     async def _get_adapter(
         self,
         model: Optional[str] = None,
@@ -262,7 +406,7 @@ class LLMService(BaseService):
         异常:
             LLMError: 找不到适配器时抛出
         """
-        if not self._adapters:
+        if not self._adapters_ready:
             raise LLMError("没有注册的适配器")
         
         # 如果启用了路由层，使用路由策略选择适配器
@@ -273,13 +417,33 @@ class LLMService(BaseService):
                     "require_healthy": require_healthy,
                 }
                 routing_strategy = strategy or self._default_routing_strategy
-                selected = await self._router.route(request, routing_strategy, list(self._adapters.values()))
+                selected = await self._router.route(request, routing_strategy, self._adapter_values)
                 if selected:
                     return selected
             except Exception as e:
                 self.logger.warning(f"路由选择失败，回退到默认选择: {e}")
         
-        # 回退到原有逻辑（保持向后兼容）
+        # 回退到原有逻辑（保持向后兼容）：分发表一次查找，未命中时解析并写入
+        adapter = self._adapter_cache.get(model)
+        if adapter is None:
+            adapter = self._resolve_adapter(model)
+            if len(self._adapter_cache) >= _MAX_CACHED_ADAPTERS:
+                # 只丢弃按需解析的条目，预先映射的条目随重建保留
+                self._rebuild_adapter_cache()
+            self._adapter_cache[model] = adapter
+        # 健康检查不在这里执行（避免性能开销），而是依赖调用时的健康检查
+        return adapter
+    
+    def _resolve_adapter(self, model: Optional[str]) -> BaseLLMAdapter:
+        """
+        根据模型名称解析适配器（内部方法）
+        
+        参数:
+            model: 模型名称（可选）
+        
+        返回:
+            适配器实例，找不到模型对应的适配器时返回默认适配器
+        """
         candidate_adapters: List[BaseLLMAdapter] = []
         
         if model:
@@ -295,44 +459,29 @@ class LLMService(BaseService):
         
         # 如果没有候选适配器，使用默认适配器
         if not candidate_adapters:
-            default_adapter_name = self._config.get("llm", {}).get("default_adapter")
-            if default_adapter_name and default_adapter_name in self._adapters:
-                candidate_adapters.append(self._adapters[default_adapter_name])
-            else:
-                candidate_adapters.append(next(iter(self._adapters.values())))
-        
-        # 如果要求健康，选择健康的适配器
-        if require_healthy:
-            # 尝试从候选适配器中选择健康的
-            for adapter in candidate_adapters:
-                # 这里不实际执行健康检查（避免性能开销），而是依赖调用时的健康检查
-                # 如果需要，可以在这里添加同步健康检查
-                return adapter
-            
-            # 如果候选适配器都不健康，尝试所有适配器
-            for adapter in self._adapters.values():
-                if adapter not in candidate_adapters:
-                    candidate_adapters.append(adapter)
-            
-            # 返回第一个候选适配器（实际健康检查在调用时进行）
-            return candidate_adapters[0]
+            candidate_adapters.append(self._default_adapter)
         
         return candidate_adapters[0]
     
-    async def check_adapter_health(self, adapter_name: Optional[str] = None) -> Dict[str, HealthCheckResult]:
+    async def check_adapter_health(
+        self,
+        adapter_name: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> Dict[str, HealthCheckResult]:
         """
         检查适配器健康状态
         
-        检查指定适配器或所有适配器的健康状态。
+        检查指定适配器或所有适配器的健康状态。缓存有效期内的结果直接复用，
+        其余适配器并发检查（并发数受health_check.concurrency限制），
+        总耗时取决于最慢的一批。
         
         参数:
             adapter_name: 适配器名称（可选，如果为None则检查所有适配器）
+            use_cache: 是否复用缓存的检查结果（默认True）
         
         返回:
             适配器健康状态字典，键为适配器名称，值为健康检查结果
         """
-        results: Dict[str, HealthCheckResult] = {}
-        
         if adapter_name:
             if adapter_name not in self._adapters:
                 return {adapter_name: HealthCheckResult(
@@ -343,15 +492,61 @@ class LLMService(BaseService):
         else:
             adapters_to_check = self._adapters
         
-        for name, adapter in adapters_to_check.items():
-            try:
-                result = await adapter.health_check()
+        results = await self._collect_health(adapters_to_check, use_cache)
+        # 保持适配器注册顺序
+        return {name: results[name] for name in adapters_to_check}
+    
+    async def _collect_health(
+        self,
+        adapters_to_check: Dict[str, BaseLLMAdapter],
+        use_cache: bool,
+    ) -> Dict[str, HealthCheckResult]:
+        """
+        收集健康检查结果（内部方法）
+        
+        参数:
+            adapters_to_check: 适配器名称到实例的映射
+            use_cache: 是否复用缓存的检查结果
+        
+        返回:
+            健康检查结果字典（缓存命中的在前，不保证注册顺序）
+        """
+        results: Dict[str, HealthCheckResult] = {}
+        now = monotonic()
+        need_check: List[str] = []
+        for name in adapters_to_check:
+            entry = self._health_cache.get(name) if use_cache else None
+            if entry is not None and now - entry[0] < self._health_cache_ttl:
+                results[name] = entry[1]
+            else:
+                need_check.append(name)
+        
+        if need_check:
+            if len(need_check) > self._health_check_concurrency:
+                semaphore = asyncio.Semaphore(self._health_check_concurrency)
+                
+                async def _probe(adapter: BaseLLMAdapter) -> HealthCheckResult:
+                    async with semaphore:
+                        return await adapter.health_check()
+            else:
+                # 待检查数不超过并发上限时无需信号量
+                def _probe(adapter: BaseLLMAdapter):
+                    return adapter.health_check()
+            
+            checked = await asyncio.gather(
+                *(_probe(adapters_to_check[name]) for name in need_check),
+                return_exceptions=True,
+            )
+            for name, result in zip(need_check, checked):
+                if isinstance(result, Exception):
+                    result = HealthCheckResult(
+                        status=HealthStatus.UNHEALTHY,
+                        message=f"健康检查异常: {result}"
+                    )
+                elif isinstance(result, BaseException):
+                    raise result
+                self._health_cache[name] = (now, result)
                 results[name] = result
-            except Exception as e:
-                results[name] = HealthCheckResult(
-                    status=HealthStatus.UNHEALTHY,
-                    message=f"健康检查异常: {e}"
-                )
         
         return results
     
@@ -362,12 +557,12 @@ class LLMService(BaseService):
         返回:
             健康的适配器名称列表
         """
-        health_results = await self.check_adapter_health()
-        healthy_adapters = [
-            name for name, result in health_results.items()
-            if result.status == HealthStatus.HEALTHY
+        # 直接按注册顺序过滤检查结果，不再构造有序的结果字典
+        health_results = await self._collect_health(self._adapters, use_cache=True)
+        return [
+            name for name in self._adapters
+            if health_results[name].status == HealthStatus.HEALTHY
         ]
-        return healthy_adapters
     
     async def chat(
         self,
@@ -376,6 +571,9 @@ class LLMService(BaseService):
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
         functions: Optional[List[Dict[str, Any]]] = None,
+        stream_internally: bool = False,
+        allow_stochastic_cache: bool = False,
+        cache_prefix_boundary: Optional[int] = None,
         **kwargs: Any,
     ) -> LLMResponse:
         """
@@ -389,6 +587,13 @@ class LLMService(BaseService):
             temperature: 温度参数，控制输出随机性，范围 0-2
             max_tokens: 最大token数（可选）
             functions: Function Calling工具定义列表（可选）
+            stream_internally: 是否在内部使用流式接口获取响应（默认False），
+                接收完成后拼接为完整响应返回；适用于长输出、非流式接口易超时的场景
+            allow_stochastic_cache: 温度高于缓存阈值时是否仍使用响应缓存（默认False），
+                适用于评测等可接受复用同一采样结果的场景
+            cache_prefix_boundary: 稳定前缀的消息数（可选），如系统提示词和固定示例；
+                适配器支持提示词缓存时，前缀最后一条消息标记为缓存断点，
+                提供商可复用该前缀的计算结果；不支持的适配器忽略该参数
             **kwargs: 其他参数，会传递给适配器
         
         返回:
@@ -405,16 +610,82 @@ class LLMService(BaseService):
         """
         if not messages:
             raise ValueError("消息列表不能为空")
+        if cache_prefix_boundary is not None and cache_prefix_boundary < 1:
+            raise ValueError("cache_prefix_boundary必须为正整数")
         
         model = model or self._default_model
+        
+        # 确定性请求命中缓存时直接返回，省去网络往返
+        cache_request = None
+        if self._request_cache is not None and (
+            allow_stochastic_cache or temperature <= self._cache_temperature_threshold
+        ):
+            cache_request = {
+                "model": model,
+                # 消息快照：等待适配器期间调用方修改消息列表，写入缓存时的键也与查询时一致
+                "messages": [dict(message) for message in messages],
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "functions": functions,
+                "kwargs": kwargs,
+            }
+            cached_response = await self._get_cached_response(cache_request)
+            if cached_response is not None:
+                return cached_response
+        
+        if cache_request is not None and self._request_deduplicator is not None:
+            # 相同的可缓存请求正在进行时等待其结果，并发的重复请求只调用一次适配器；
+            # 每个调用方拿到独立的副本
+            try:
+                response = await self._request_deduplicator.deduplicate(
+                    cache_request,
+                    lambda: self._chat_uncached(
+                        messages, model, temperature, max_tokens, functions,
+                        stream_internally, cache_request, kwargs, cache_prefix_boundary,
+                    ),
+                )
+            except (TypeError, ValueError):
+                # 额外参数无法序列化（调用失败统一抛出LLMError），该请求不参与去重和缓存
+                cache_request = None
+            else:
+                return self._copy_response(response)
+        
+        return await self._chat_uncached(
+            messages, model, temperature, max_tokens, functions,
+            stream_internally, cache_request, kwargs, cache_prefix_boundary,
+        )
+    
+    async def _chat_uncached(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        functions: Optional[List[Dict[str, Any]]],
+        stream_internally: bool,
+        cache_request: Optional[Dict[str, Any]],
+        kwargs: Dict[str, Any],
+        cache_prefix_boundary: Optional[int] = None,
+    ) -> LLMResponse:
+        """
+        调用适配器完成聊天请求（内部方法）
+        
+        参数与chat相同；cache_request不为None时，成功的响应写入响应缓存。
+        
+        返回:
+            LLMResponse对象
+        
+        异常:
+            LLMError: LLM调用失败时抛出
+        """
         adapter = await self._get_adapter(model)
         
         self.logger.debug(f"发送LLM请求，模型: {model}, 消息数: {len(messages)}")
         
-        # 开始追踪（如果启用了追踪）
+        # 开始追踪（如果启用了追踪且本次请求被采样），元数据只在采样时构造
         trace_context = None
         span = None
-        if self._request_tracer:
+        if self._request_tracer and self._request_tracer.should_sample("llm_chat"):
             try:
                 trace_context = self._request_tracer.start_trace(
                     operation="llm_chat",
@@ -432,35 +703,78 @@ class LLMService(BaseService):
         if self._metrics_collector:
             self._metrics_collector.increment_active_requests(adapter.name, model)
         
-        # 记录请求开始时间
-        request_start_time = time_now()
-        
-        # 获取重试配置
-        max_retries = self._config.get("llm", {}).get("max_retries", 3)
+        # 记录请求开始时间（单调时钟纳秒整数，只在记录指标时换算为秒）
+        request_start_ns = perf_counter_ns()
         
         try:
+            # 构建适配器调用参数
+            adapter_kwargs = {
+                "messages": messages,
+                "model": model,
+                "temperature": temperature,
+            }
+            if max_tokens:
+                adapter_kwargs["max_tokens"] = max_tokens
+            if functions:
+                adapter_kwargs["functions"] = functions
+            # 合并其他kwargs参数
+            adapter_kwargs.update(kwargs)
+            
+            # 带缓存断点的消息只构造一次；重试切换到不支持提示词缓存的适配器时使用原消息
+            cached_prefix_kwargs = None
+            if cache_prefix_boundary:
+                cached_prefix_kwargs = dict(adapter_kwargs)
+                cached_prefix_kwargs["messages"] = self._mark_cache_prefix(messages, cache_prefix_boundary)
+            
+            attempts = 0
+            # 适配器名称 -> 序列化好的请求体，重试同一适配器时复用
+            prebuilt_payloads: Dict[str, Dict[str, Any]] = {}
+            
+            def _invoke(target: BaseLLMAdapter):
+                """按调用方式选择适配器入口"""
+                call_kwargs = adapter_kwargs
+                if cached_prefix_kwargs is not None and target.supports_prompt_cache:
+                    call_kwargs = cached_prefix_kwargs
+                if stream_internally:
+                    return self._collect_stream(target, call_kwargs)
+                if target.supports_prebuilt_payload:
+                    payload = prebuilt_payloads.get(target.name)
+                    if payload is None:
+                        payload = prebuilt_payloads[target.name] = target.build_payload(**call_kwargs)
+                    return target.call(**call_kwargs, prebuilt_payload=payload)
+                return target.call(**call_kwargs)
+            
             # 使用重试机制调用适配器
             async def _call_adapter():
-                # 构建适配器调用参数
-                adapter_kwargs = {
-                    "messages": messages,
-                    "model": model,
-                    "temperature": temperature,
-                }
-                if max_tokens:
-                    adapter_kwargs["max_tokens"] = max_tokens
-                if functions:
-                    adapter_kwargs["functions"] = functions
-                # 合并其他kwargs参数
-                adapter_kwargs.update(kwargs)
+                nonlocal adapter, attempts
+                if attempts and self._enable_routing and self._router:
+                    # 重试前重新路由：失败适配器的健康缓存失效后重新检查，
+                    # 避免在已失效的端点上继续退避重试
+                    self._router.invalidate_health(adapter.name)
+                    rerouted = await self._get_adapter(model, require_healthy=True)
+                    if rerouted is not adapter:
+                        self.logger.info(f"重试切换适配器: {adapter.name} -> {rerouted.name}")
+                        if self._metrics_collector:
+                            self._metrics_collector.decrement_active_requests(adapter.name, model)
+                            self._metrics_collector.increment_active_requests(rerouted.name, model)
+                        adapter = rerouted
+                attempts += 1
                 
-                return await adapter.call(**adapter_kwargs)
+                if not self._router:
+                    return await _invoke(adapter)
+                # 记录进行中请求数，供最少连接路由使用
+                called_adapter = adapter
+                self._router.record_connection(called_adapter.name)
+                try:
+                    return await _invoke(called_adapter)
+                finally:
+                    self._router.record_connection(called_adapter.name, -1)
             
             result = await retry_with_backoff(
                 _call_adapter,
-                max_attempts=max_retries,
-                initial_wait=1.0,
-                max_wait=10.0,
+                max_attempts=self._max_retries,
+                initial_wait=self._retry_initial_wait,
+                max_wait=self._retry_max_wait,
             )
             
             # 构建响应对象
@@ -470,42 +784,76 @@ class LLMService(BaseService):
                 usage=result.get("usage", {}),
                 metadata=result.get("metadata", {}),
             )
-            
-            # 计算请求持续时间
-            request_duration = time_now() - request_start_time
-            
-            # 记录成本（如果启用了成本管理）
-            cost = None
-            if self._cost_manager and response.usage:
-                try:
-                    # 获取适配器的成本信息
-                    cost_info = adapter.get_cost_per_1k_tokens(model)
-                    cost_record = await self._cost_manager.record_usage(
-                        adapter_name=adapter.name,
-                        model=model,
-                        usage=response.usage,
-                        cost_info=cost_info,
-                    )
-                    cost = cost_record.total_cost
-                except Exception as e:
-                    self.logger.warning(f"记录成本失败: {e}")
-            
-            # 结束追踪
-            if span is not None:
-                try:
-                    self._request_tracer.end_span(span)
-                    if trace_context is not None:
-                        self._request_tracer.end_trace(trace_context)
-                except Exception as e:
-                    self.logger.warning(f"结束追踪失败: {e}")
-            
-            # 减少活跃请求数
-            if self._metrics_collector:
+        except Exception as e:
+            await self._finish_request(adapter, model, request_start_ns, trace_context, span, error=e)
+            self.logger.error(f"LLM调用失败: {e}", exc_info=self._sample_traceback())
+            raise LLMError(f"LLM调用失败: {e}") from e
+        
+        await self._finish_request(adapter, model, request_start_ns, trace_context, span, response=response)
+        
+        if cache_request is not None:
+            await self._cache_response(cache_request, response)
+        
+        self.logger.debug(f"LLM响应完成，Token使用: {response.total_tokens}")
+        return response
+    
+    async def _finish_request(
+        self,
+        adapter: BaseLLMAdapter,
+        model: str,
+        request_start_ns: int,
+        trace_context: Optional[TraceContext],
+        span: Optional[TraceSpan],
+        response: Optional[LLMResponse] = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        """
+        结束请求的统计记录（内部方法）
+        
+        成功和失败共用同一出口：记录成本（仅成功时）、结束追踪、减少活跃请求数并
+        记录指标，每个请求只执行一次。记录过程中的异常只记录日志，不影响请求结果。
+        
+        参数:
+            adapter: 最终调用的适配器
+            model: 模型名称
+            request_start_ns: 请求开始时间（perf_counter_ns）
+            trace_context: 追踪上下文（未追踪时为None）
+            span: 适配器调用跨度（未追踪时为None）
+            response: 成功时的响应对象
+            error: 失败时的异常
+        """
+        request_duration = (perf_counter_ns() - request_start_ns) / 1e9
+        
+        # 记录成本（如果启用了成本管理）
+        cost = None
+        if response is not None and self._cost_manager and response.usage:
+            try:
+                # 获取适配器的成本信息
+                cost_info = adapter.get_cost_per_1k_tokens(model)
+                cost_record = await self._cost_manager.record_usage(
+                    adapter_name=adapter.name,
+                    model=model,
+                    usage=response.usage,
+                    cost_info=cost_info,
+                )
+                cost = cost_record.total_cost
+            except Exception as e:
+                self.logger.warning(f"记录成本失败: {e}")
+        
+        # 结束追踪
+        if span is not None:
+            try:
+                self._request_tracer.end_span(span, error=str(error) if error is not None else None)
+                if trace_context is not None:
+                    self._request_tracer.end_trace(trace_context)
+            except Exception as e:
+                self.logger.warning(f"结束追踪失败: {e}")
+        
+        # 减少活跃请求数并记录指标（如果启用了指标采集）
+        if self._metrics_collector:
+            try:
                 self._metrics_collector.decrement_active_requests(adapter.name, model)
-            
-            # 记录指标（如果启用了指标采集）
-            if self._metrics_collector:
-                try:
+                if error is None:
                     self._metrics_collector.record_request(
                         adapter=adapter.name,
                         model=model,
@@ -514,48 +862,156 @@ class LLMService(BaseService):
                         tokens=response.usage,
                         cost=cost,
                     )
-                except Exception as e:
-                    self.logger.warning(f"记录指标失败: {e}")
-            
-            self.logger.debug(f"LLM响应完成，Token使用: {response.total_tokens}")
-            return response
-            
-        except Exception as e:
-            # 计算请求持续时间
-            request_duration = time_now() - request_start_time if 'request_start_time' in locals() else 0.0
-            
-            # 结束追踪（错误情况）
-            if span is not None:
-                try:
-                    self._request_tracer.end_span(span, error=str(e))
-                    if trace_context is not None:
-                        self._request_tracer.end_trace(trace_context)
-                except Exception:
-                    pass
-            
-            # 减少活跃请求数
-            if self._metrics_collector:
-                try:
-                    self._metrics_collector.decrement_active_requests(adapter.name, model)
-                    # 记录错误指标
+                else:
                     self._metrics_collector.record_request(
                         adapter=adapter.name,
                         model=model,
                         duration=request_duration,
                         success=False,
-                        error_type=type(e).__name__,
+                        error_type=type(error).__name__,
                     )
-                except Exception:
-                    pass
-            
-            self.logger.error(f"LLM调用失败: {e}", exc_info=True)
-            raise LLMError(f"LLM调用失败: {e}") from e
+            except Exception as e:
+                self.logger.warning(f"记录指标失败: {e}")
+    
+    @staticmethod
+    def _mark_cache_prefix(
+        messages: List[Dict[str, Any]],
+        boundary: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        标记提示词缓存断点（内部方法）
+        
+        提供商按断点缓存其之前的全部内容，且断点数量有限（如Anthropic最多4个），
+        因此只在前缀的最后一条消息上添加cache_control；调用方的消息列表不会被修改。
+        
+        参数:
+            messages: 消息列表
+            boundary: 稳定前缀的消息数，超过消息总数时按消息总数处理
+        
+        返回:
+            新的消息列表，断点消息为带cache_control的副本
+        """
+        index = min(boundary, len(messages)) - 1
+        marked = list(messages)
+        marked[index] = {**messages[index], "cache_control": {"type": "ephemeral"}}
+        return marked
+    
+    async def _collect_stream(
+        self,
+        adapter: BaseLLMAdapter,
+        adapter_kwargs: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """
+        通过流式接口获取完整响应（内部方法）
+        
+        参数:
+            adapter: 适配器
+            adapter_kwargs: 适配器调用参数
+        
+        返回:
+            与adapter.call格式一致的响应字典
+        """
+        parts: List[str] = []
+        usage: Dict[str, Any] = {}
+        metadata: Dict[str, Any] = {}
+        async for chunk in self._stream_core(adapter, adapter_kwargs):
+            content = chunk.get("content")
+            if content:
+                parts.append(content)
+            # 使用信息通常只在最终块给出（或逐块累计），以最后一次非空值为准
+            if chunk.get("usage"):
+                usage = chunk["usage"]
+            if chunk.get("metadata"):
+                metadata.update(chunk["metadata"])
+        return {"content": "".join(parts), "usage": usage, "metadata": metadata}
+    
+    def _stream_core(
+        self,
+        adapter: BaseLLMAdapter,
+        adapter_kwargs: Dict[str, Any],
+        batch_chunks: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        发起适配器流式调用（内部方法，chat的内部流式模式和stream_chat共用）
+        
+        参数:
+            adapter: 适配器
+            adapter_kwargs: 适配器调用参数
+            batch_chunks: 是否按performance配置合并细小的响应块
+        
+        返回:
+            适配器响应块迭代器
+        """
+        chunks = adapter.stream_call(**adapter_kwargs)
+        if batch_chunks:
+            chunks = batch_stream_chunks(
+                chunks,
+                max_chars=self._stream_batch_max_chars,
+                max_interval=self._stream_batch_interval,
+            )
+        return chunks
+    
+    async def _get_cached_response(self, cache_request: Dict[str, Any]) -> Optional[LLMResponse]:
+        """
+        查询响应缓存（内部方法）
+        
+        参数:
+            cache_request: 规范化的请求数据
+        
+        返回:
+            缓存响应的副本（metadata中标记cache_hit），未命中或请求无法序列化时返回None
+        """
+        try:
+            cached = await self._request_cache.get(cache_request)
+        except (TypeError, ValueError):
+            # 额外参数无法序列化，该请求不参与缓存
+            return None
+        if cached is None:
+            return None
+        
+        self.logger.debug(f"命中响应缓存，模型: {cache_request['model']}")
+        # 返回副本，避免调用方修改缓存中的对象
+        return self._copy_response(cached, cache_hit=True)
+    
+    @staticmethod
+    def _copy_response(response: LLMResponse, **metadata: Any) -> LLMResponse:
+        """
+        复制响应对象（内部方法）
+        
+        参数:
+            response: 原响应
+            **metadata: 追加到副本metadata中的字段
+        
+        返回:
+            usage和metadata独立的响应副本
+        """
+        return LLMResponse(
+            content=response.content,
+            model=response.model,
+            usage=dict(response.usage),
+            metadata={**response.metadata, **metadata},
+        )
+    
+    async def _cache_response(self, cache_request: Dict[str, Any], response: LLMResponse) -> None:
+        """
+        写入响应缓存（内部方法）
+        
+        参数:
+            cache_request: 规范化的请求数据
+            response: 响应对象
+        """
+        try:
+            await self._request_cache.set(cache_request, self._copy_response(response))
+        except (TypeError, ValueError) as e:
+            self.logger.debug(f"响应无法缓存: {e}")
     
     async def stream_chat(
         self,
         messages: List[Dict[str, str]],
         model: Optional[str] = None,
         temperature: float = 0.7,
+        reuse_response: bool = False,
+        batch_chunks: bool = False,
     ) -> AsyncIterator[LLMResponse]:
         """
         流式聊天
@@ -566,6 +1022,12 @@ class LLMService(BaseService):
             messages: 消息列表
             model: 模型名称
             temperature: 温度参数
+            reuse_response: 是否复用同一个LLMResponse对象返回所有响应块（默认False）。
+                长文本生成时可避免逐块创建对象；启用后每个块的内容只在下一次迭代前有效，
+                调用方需要立即消费，不能保存块对象本身
+            batch_chunks: 是否合并细小的响应块（默认False）。按performance配置的
+                stream_batch_max_chars或stream_batch_interval_ms合并后返回，
+                原始块内容保存在metadata["sub_chunks"]中
         
         生成器:
             逐个返回LLMResponse对象
@@ -587,38 +1049,85 @@ class LLMService(BaseService):
         
         try:
             # 优化流式响应：立即yield，减少延迟
-            accumulated_content = ""
-            async for chunk_result in adapter.stream_call(
-                messages=messages,
-                model=model,
-                temperature=temperature,
-            ):
-                chunk_content = chunk_result.get("content", "")
-                if chunk_content:
-                    accumulated_content += chunk_content
-                    # 立即yield，不等待完整响应
+            reused_chunk = LLMResponse(content="", model=model) if reuse_response else None
+            adapter_kwargs = {
+                "messages": messages,
+                "model": model,
+                "temperature": temperature,
+            }
+            async for chunk_result in self._stream_core(adapter, adapter_kwargs, batch_chunks):
+                # 增量块只返回增量内容；最终块不包含新内容，但包含完整使用信息
+                chunk_content = chunk_result.get("content") or ""
+                usage = chunk_result.get("usage") or {}
+                metadata = chunk_result.get("metadata") or {}
+                
+                # 立即yield，不等待完整响应
+                if reused_chunk is None:
                     yield LLMResponse(
-                        content=chunk_content,  # 只返回增量内容
+                        content=chunk_content,
                         model=model,
-                        usage=chunk_result.get("usage", {}),
-                        metadata=chunk_result.get("metadata", {}),
+                        usage=usage,
+                        metadata=metadata,
                     )
                 else:
-                    # 最终块，包含完整使用信息
-                    yield LLMResponse(
-                        content="",  # 最终块不包含新内容
-                        model=model,
-                        usage=chunk_result.get("usage", {}),
-                        metadata=chunk_result.get("metadata", {}),
-                    )
+                    reused_chunk.content = chunk_content
+                    reused_chunk.usage = usage
+                    reused_chunk.metadata = metadata
+                    yield reused_chunk
         except Exception as e:
-            self.logger.error(f"流式LLM调用失败: {e}", exc_info=True)
+            self.logger.error(f"流式LLM调用失败: {e}", exc_info=self._sample_traceback())
             raise LLMError(f"流式LLM调用失败: {e}") from e
     
+    def _sample_traceback(self) -> bool:
+        """
+        判断本次失败日志是否记录完整堆栈（内部方法）
+        
+        限流等原因导致失败集中出现时，格式化堆栈的开销会明显占用CPU；
+        每个采样窗口内只记录前几次的堆栈，其余只记录错误信息。
+        
+        返回:
+            是否记录完整堆栈
+        """
+        now = monotonic()
+        times = self._traceback_times
+        if len(times) == times.maxlen and now - times[0] < _TRACEBACK_SAMPLE_WINDOW:
+            return False
+        times.append(now)
+        return True
+    
+    def get_token_counter(self) -> TokenCounter:
+        """
+        获取服务共享的Token计数器
+        
+        创建ConversationContext等需要计数的组件时传入，复用已加载的编码器。
+        
+        返回:
+            Token计数器实例
+        """
+        return self._token_counter
+    
+    def create_context(self, max_messages: Optional[int] = None) -> ConversationContext:
+        """
+        创建共享本服务Token计数器的对话上下文
+        
+        参数:
+            max_messages: 最大消息数量（可选，None表示无限制）
+        
+        返回:
+            对话上下文实例
+        
+        示例:
+            >>> context = service.create_context(max_messages=20)
+            >>> context.add_message("user", "你好")
+            >>> tokens = context.count_tokens("gpt-4")
+        """
+        return ConversationContext(max_messages=max_messages, token_counter=self._token_counter)
+    
     def calculate_tokens(
         self,
         text: str,
         model: Optional[str] = None,
+        precise: bool = True,
     ) -> int:
         """
         计算Token数量
@@ -628,6 +1137,8 @@ class LLMService(BaseService):
         参数:
             text: 文本内容
             model: 模型名称（可选，不同模型的token计算方式可能不同）
+            precise: 是否精确编码（默认True）；提示词预算检查等只需粗略数量的场景
+                可传False，按字符数/字节数估算，不执行BPE编码
         
         返回:
             Token数量
@@ -636,7 +1147,49 @@ class LLMService(BaseService):
             - GPT等模型：使用tiktoken进行精确计算
             - 非OpenAI/未知模型：使用cl100k_base作为回退（仍为编码级别的真实token计数）
         """
-        return self._token_counter.count_text_tokens(text=text, model=model)
+        return self._token_counter.count_text_tokens(text=text, model=model, precise=precise)
+    
+    def calculate_tokens_batch(
+        self,
+        texts: List[str],
+        model: Optional[str] = None,
+    ) -> List[int]:
+        """
+        批量计算Token数量
+        
+        一次解析编码器并批量编码，适合对消息列表逐条计数的场景。
+        
+        参数:
+            texts: 文本列表
+            model: 模型名称（可选）
+        
+        返回:
+            与texts一一对应的Token数量列表
+        """
+        return self._token_counter.count_batch_tokens(texts=texts, model=model)
+    
+    def calculate_messages_tokens(
+        self,
+        messages: List[Dict[str, Any]],
+        model: Optional[str] = None,
+    ) -> int:
+        """
+        计算消息列表内容的Token总数
+        
+        逐条计数并复用计数缓存，多轮对话中重复的系统提示词和历史消息不再重新编码。
+        
+        参数:
+            messages: 消息列表
+            model: 模型名称（可选）
+        
+        返回:
+            所有消息内容的Token总数（不含消息格式开销）
+        
+        示例:
+            >>> tokens = service.calculate_messages_tokens(messages, model="gpt-4")
+        """
+        contents = [message.get("content") or "" for message in messages]
+        return sum(self._token_counter.count_batch_tokens(texts=contents, model=model))
     
     async def get_cost_statistics(
         self,
@@ -683,6 +1236,10 @@ class LLMService(BaseService):
     
     async def cleanup(self) -> None:
         """清理服务资源"""
+        # 停止后台健康刷新
+        if self._router:
+            await self._router.stop_health_refresher()
+        
         # 清理连接池
         if self._connection_pool:
             await self._connection_pool.close_all()
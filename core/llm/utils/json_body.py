@@ -0,0 +1,46 @@
+"""
+模块名称：请求体序列化工具模块
+功能描述：为适配器的HTTP请求生成JSON请求体参数，安装orjson时使用其快速序列化
+创建日期：2026-01-23
+最后更新：2026-01-23
+维护者：AI框架团队
+
+主要函数：
+    - json_request_kwargs: 生成httpx请求的JSON请求体参数
+
+依赖模块：
+    - orjson: 快速JSON序列化（可选，未安装时交由httpx使用json序列化）
+    - typing: 类型注解
+"""
+
+from typing import Any, Dict
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# 预先构造的请求头，避免每次请求重复创建
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def json_request_kwargs(data: Any) -> Dict[str, Any]:
+    """
+    生成httpx请求的JSON请求体参数
+    
+    安装orjson时直接序列化为字节（Rust实现，比标准库json快数倍），
+    否则退回httpx的json参数，行为与原来一致。
+    
+    参数:
+        data: 请求体数据
+    
+    返回:
+        可直接展开传给 client.post / client.stream 的关键字参数
+    
+    示例:
+        >>> response = await client.post("/chat/completions", **json_request_kwargs(request_data))
+    """
+    if ORJSON_AVAILABLE:
+        return {"content": orjson.dumps(data), "headers": _JSON_HEADERS}
+    return {"json": data}
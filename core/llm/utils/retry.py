@@ -6,23 +6,23 @@
 维护者：AI框架团队
 
 主要功能：
-    - retry_llm_call: LLM调用重试装饰器
+    - retry_with_backoff: 带指数退避的重试函数
+    - retry_llm_call: LLM调用重试装饰器（基于retry_with_backoff）
     - is_retryable_error: 判断错误是否可重试
 """
 
 import asyncio
-from typing import Callable, Any, Type, Tuple, List
-from functools import wraps
+import random
+from typing import Callable, Any, Tuple
+from functools import lru_cache, wraps
 from httpx import HTTPError, HTTPStatusError
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type,
-    retry_if_exception,
-    RetryError,
-)
-from core.base.adapter import AdapterCallError
+
+
+# 可重试的HTTP状态码：429请求过多（限流）和全部5xx服务器错误
+_RETRYABLE_STATUS: frozenset = frozenset({429, *range(500, 600)})
+
+# 网络层错误，直接重试
+_NETWORK_ERRORS: Tuple[type, ...] = (ConnectionError, TimeoutError, asyncio.TimeoutError)
 
 
 def is_retryable_error(exception: Exception) -> bool:
@@ -41,52 +41,19 @@ def is_retryable_error(exception: Exception) -> bool:
     返回:
         True表示可重试，False表示不可重试
     """
-    # 网络错误可重试
-    if isinstance(exception, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
-        return True
-    
-    # HTTP错误
+    # 按出现频率排列：限流和服务端错误最常见，其次是网络错误
     if isinstance(exception, HTTPStatusError):
-        if exception.response is None:
-            # 没有响应对象的HTTP错误，可能是网络错误，可重试
-            return True
-        
-        status_code = exception.response.status_code
-        
-        # 5xx服务器错误可重试
-        if 500 <= status_code < 600:
-            return True
-        
-        # 429请求过多可重试
-        if status_code == 429:
-            return True
-        
-        # 502 Bad Gateway可重试
-        if status_code == 502:
-            return True
-        
-        # 503 Service Unavailable可重试
-        if status_code == 503:
-            return True
-        
-        # 504 Gateway Timeout可重试
-        if status_code == 504:
-            return True
-        
-        # 其他4xx错误不可重试
-        return False
+        response = exception.response
+        # 没有响应对象的HTTP错误，可能是网络错误，可重试；其他4xx错误不可重试
+        return response is None or response.status_code in _RETRYABLE_STATUS
     
-    # HTTPError（其他HTTP错误，通常是网络层面的错误，可重试）
-    if isinstance(exception, HTTPError):
-        # HTTPError但不包含status code，通常是网络错误，可重试
+    # 网络错误可重试
+    if isinstance(exception, _NETWORK_ERRORS):
         return True
     
-    # 其他AdapterCallError不重试（可能是参数错误等）
-    if isinstance(exception, AdapterCallError):
-        return False
-    
-    # 其他异常默认不重试
-    return False
+    # HTTPError（其他HTTP错误，不包含status code，通常是网络层面的错误，可重试）
+    # 其他异常（包括AdapterCallError，可能是参数错误等）默认不重试
+    return isinstance(exception, HTTPError)
 
 
 def retry_llm_call(
@@ -99,6 +66,7 @@ def retry_llm_call(
     LLM调用重试装饰器
     
     使用指数退避策略进行重试，避免对服务器造成过大压力。
+    内部直接调用retry_with_backoff，成功调用时只多一层函数调用。
     
     参数:
         max_attempts: 最大重试次数（不包括首次尝试）
@@ -113,32 +81,44 @@ def retry_llm_call(
         ...     pass
     """
     def decorator(func: Callable) -> Callable:
-        @retry(
-            stop=stop_after_attempt(max_attempts + 1),  # +1 包括首次尝试
-            wait=wait_exponential(
-                multiplier=initial_wait,
-                max=max_wait,
-                exp_base=exponential_base,
-            ),
-            retry=retry_if_exception(is_retryable_error),
-            reraise=True,
-        )
         @wraps(func)
         async def wrapper(*args: Any, **kwargs: Any) -> Any:
-            try:
-                return await func(*args, **kwargs)
-            except Exception as e:
-                # 如果错误不可重试，直接抛出
-                if not is_retryable_error(e):
-                    raise
-                # 可重试的错误会由tenacity处理
-                raise
+            return await retry_with_backoff(
+                lambda: func(*args, **kwargs),
+                max_attempts,
+                initial_wait,
+                max_wait,
+                exponential_base,
+            )
         
         return wrapper
     
     return decorator
 
 
+@lru_cache(maxsize=32)
+def _wait_schedule(
+    max_attempts: int,
+    initial_wait: float,
+    max_wait: float,
+    exponential_base: float,
+) -> Tuple[float, ...]:
+    """
+    计算每次重试前的等待时间（内部函数）
+    
+    第一次重试不等待（只让出事件循环）：上游偶发的502等瞬时错误通常立即重试即可成功；
+    之后从initial_wait开始指数增长。重试参数通常来自服务配置，组合很少，
+    首次失败时计算一次后复用。
+    
+    返回:
+        按重试序号索引的等待时间元组
+    """
+    return (0.0,) + tuple(
+        min(initial_wait * (exponential_base ** attempt), max_wait)
+        for attempt in range(max_attempts - 1)
+    )
+
+
 async def retry_with_backoff(
     func: Callable,
     max_attempts: int = 3,
@@ -151,7 +131,9 @@ async def retry_with_backoff(
     """
     带指数退避的重试函数
     
-    不依赖装饰器，直接调用函数并处理重试。
+    不依赖装饰器，直接调用函数并处理重试。第一次重试立即进行，
+    之后的等待时间按指数增长，并加入随机抖动（等待时间的50%-100%），
+    避免大量请求在限流恢复时同时重试。
     
     参数:
         func: 要重试的异步函数
@@ -184,13 +166,9 @@ async def retry_with_backoff(
             if attempt >= max_attempts:
                 break
             
-            # 计算等待时间（指数退避）
-            wait_time = min(
-                initial_wait * (exponential_base ** attempt),
-                max_wait,
-            )
-            
-            await asyncio.sleep(wait_time)
+            # 指数退避等待（带抖动）；第一次重试只让出事件循环
+            wait_time = _wait_schedule(max_attempts, initial_wait, max_wait, exponential_base)[attempt]
+            await asyncio.sleep(wait_time * (0.5 + random.random() * 0.5) if wait_time else 0)
     
     # 所有重试都失败了，抛出最后一个异常
     raise last_exception
@@ -0,0 +1,114 @@
+"""
+模块名称：流式响应块合并模块
+功能描述：将适配器流式返回的细小响应块按字符数或时间窗口合并，减少逐块的对象创建和异步切换
+创建日期：2026-01-24
+最后更新：2026-01-24
+维护者：AI框架团队
+
+主要功能：
+    - batch_stream_chunks: 合并流式响应块的异步生成器
+
+依赖模块：
+    - asyncio: 异步编程
+    - typing: 类型注解
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, List
+
+
+def _merge_chunks(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    合并多个响应块（内部函数）
+    
+    参数:
+        chunks: 待合并的响应块列表
+    
+    返回:
+        合并后的响应块；usage取最后出现的非空值，metadata按块顺序合并
+        （同名键取后出现的值），原始块内容保存在metadata["sub_chunks"]中
+    """
+    if len(chunks) == 1:
+        return chunks[0]
+    
+    usage: Dict[str, Any] = {}
+    metadata: Dict[str, Any] = {}
+    for chunk in chunks:
+        usage = chunk.get("usage") or usage
+        chunk_metadata = chunk.get("metadata")
+        if chunk_metadata:
+            metadata.update(chunk_metadata)
+    contents = [chunk.get("content") or "" for chunk in chunks]
+    return {
+        "content": "".join(contents),
+        "usage": usage,
+        "metadata": {**metadata, "sub_chunks": contents},
+    }
+
+
+async def batch_stream_chunks(
+    chunks: AsyncIterator[Dict[str, Any]],
+    max_chars: int = 256,
+    max_interval: float = 0.02,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    合并流式响应块
+    
+    从第一个未发送的块到达时开始计时，累计内容达到max_chars或等待超过
+    max_interval时发送一次合并块；上游结束时发送剩余内容。提前退出或被取消时
+    关闭上游迭代器。
+    
+    参数:
+        chunks: 适配器stream_call返回的响应块迭代器
+        max_chars: 合并块的内容字符数阈值
+        max_interval: 合并窗口（秒），上游较慢时不会因合并额外增加超过该值的延迟
+    
+    生成器:
+        合并后的响应块字典，格式与适配器响应块相同
+    
+    示例:
+        >>> async for chunk in batch_stream_chunks(adapter.stream_call(**kwargs)):
+        ...     print(chunk["content"], end="")
+    """
+    iterator = chunks.__aiter__()
+    loop = asyncio.get_running_loop()
+    buffer: List[Dict[str, Any]] = []
+    buffered_chars = 0
+    deadline = 0.0
+    # 超时后不取消正在等待的下一个块（取消会终止上游生成器），下一轮继续等待同一个任务
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            if buffer:
+                done, _ = await asyncio.wait({pending}, timeout=max(0.0, deadline - loop.time()))
+                if not done:
+                    yield _merge_chunks(buffer)
+                    buffer, buffered_chars = [], 0
+                    continue
+            try:
+                chunk = await pending
+            except StopAsyncIteration:
+                pending = None
+                break
+            pending = None
+            
+            if not buffer:
+                deadline = loop.time() + max_interval
+            buffer.append(chunk)
+            buffered_chars += len(chunk.get("content") or "")
+            if buffered_chars >= max_chars:
+                yield _merge_chunks(buffer)
+                buffer, buffered_chars = [], 0
+        
+        if buffer:
+            yield _merge_chunks(buffer)
+    finally:
+        if pending is not None:
+            # 先等待被取消的__anext__结束，上游生成器仍在运行时无法关闭
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -10,16 +10,94 @@
 
 依赖模块：
     - tiktoken: OpenAI Tokenizer（精确Token计算）
+    - concurrent.futures: 批量计数的共享线程池
 """
 
 from __future__ import annotations
 
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, Optional
+from functools import lru_cache, partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 import tiktoken
 
 
+# 批量计数达到该条数才分发到线程池，小批量的线程调度开销大于并行收益
+_PARALLEL_MIN_BATCH = 16
+
+# 计数结果缓存的最大条目数（系统提示词等重复文本在每轮对话中都会重新计数）
+_COUNT_CACHE_MAX = 4096
+
+# 估算Token数时每个Token对应的ASCII字符数（按编码族，未列出的编码族使用cl100k_base的值）
+_ASCII_CHARS_PER_TOKEN: Dict[str, float] = {"cl100k_base": 4.0, "o200k_base": 3.5}
+
+# 估算非ASCII文本时每个Token对应的UTF-8字节数（常用汉字为3字节，约1个Token）
+_BYTES_PER_TOKEN = 3
+
+# 进程内共享的计数结果缓存：(编码器键, 是否按普通文本编码, 文本) -> Token数；
+# encode和encode_ordinary对特殊token的处理不同，两种编码方式分别缓存
+_count_cache: Dict[Tuple[str, bool, str], int] = {}
+
+# 批量计数共享线程池的线程数
+_BATCH_WORKERS = os.cpu_count() or 8
+
+# tiktoken的BPE编码在Rust中执行并释放GIL，共享线程池按CPU核数并行；
+# 延迟创建并在进程内复用（encode_ordinary_batch每次调用都会新建线程池）
+_batch_executor: Optional[ThreadPoolExecutor] = None
+_batch_executor_lock = threading.Lock()
+
+
+def _get_batch_executor() -> ThreadPoolExecutor:
+    """获取批量计数共享线程池（首次调用时创建）"""
+    global _batch_executor
+    if _batch_executor is None:
+        with _batch_executor_lock:
+            if _batch_executor is None:
+                _batch_executor = ThreadPoolExecutor(
+                    max_workers=_BATCH_WORKERS,
+                    thread_name_prefix="token-counter",
+                )
+    return _batch_executor
+
+
+def _count_chunk(encode: Callable[[str], List[int]], texts: List[str]) -> List[int]:
+    """在工作线程中编码一段文本，只返回Token数，Token列表在线程内即可释放"""
+    return [len(encode(text)) for text in texts]
+
+
+@lru_cache(maxsize=16)
+def _resolve_encoding(model_key: str) -> tiktoken.Encoding:
+    """
+    解析模型对应的编码器（进程内共享）
+
+    - cl100k_base：直接使用该编码
+    - 其他模型名：优先encoding_for_model；不认识的模型名回退cl100k_base
+
+    参数：
+        model_key: 去除首尾空白的模型名称
+    """
+    if model_key != "cl100k_base":
+        try:
+            return tiktoken.encoding_for_model(model_key)
+        except KeyError:
+            # 不认识的模型名，回退到通用编码
+            pass
+    return tiktoken.get_encoding("cl100k_base")
+
+
+@lru_cache(maxsize=256)
+def _encoding_name(model_key: str) -> str:
+    """查询模型的编码族名称（只查映射表，不加载编码器），未知模型返回cl100k_base"""
+    try:
+        return tiktoken.encoding_name_for_model(model_key)
+    except KeyError:
+        return "cl100k_base"
+
+
 @dataclass(frozen=True)
 class TokenCounter:
     """
@@ -28,51 +106,179 @@ class TokenCounter:
     说明：
         - 对 OpenAI GPT 系列：使用 tiktoken.encoding_for_model() 获取精确编码器
         - 对未知/非OpenAI模型：使用 cl100k_base 作为保守回退（多数chat模型兼容）
+        - 实例不持有状态：编码器和计数结果缓存在进程内共享，多个服务或对话上下文
+          各自创建的计数器不会重复构建编码表
     """
 
-    _encoding_cache: Dict[str, tiktoken.Encoding]
-
-    def __init__(self) -> None:
-        object.__setattr__(self, "_encoding_cache", {})
-
-    def count_text_tokens(self, text: str, model: Optional[str] = None) -> int:
+    def count_text_tokens(self, text: str, model: Optional[str] = None, precise: bool = True) -> int:
         """
         计算纯文本Token数量
 
         参数：
             text: 文本内容
             model: 模型名称（可选）
+            precise: 是否精确编码（默认True）；为False时使用estimate_tokens估算
 
         返回：
             Token数量（>=0）
+
+        说明：
+            - 相同文本的计数结果会被缓存，重复计数（如每轮对话的系统提示词）不再编码
+        """
+        if not text:
+            return 0
+        if not precise:
+            return self.estimate_tokens(text, model)
+
+        cache_key = self._count_key(text, model, ordinary=False)
+        count = _count_cache.get(cache_key)
+        if count is None:
+            encoding = self._get_encoding(model)
+            count = len(encoding.encode(text))
+            self._remember_count(cache_key, count)
+        return count
+
+    @staticmethod
+    def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+        """
+        估算纯文本Token数量
+
+        不执行BPE编码：ASCII文本按编码族的平均字符数/Token估算，其他文本按UTF-8字节数
+        估算，结果向上取整。适合发送前的提示词预算检查等只需要粗略数量的场景，
+        需要精确数量（如成本核算）时使用count_text_tokens。
+
+        参数：
+            text: 文本内容
+            model: 模型名称（可选）
+
+        返回：
+            估算的Token数量（>=0，非空文本至少为1）
         """
         if not text:
             return 0
+        if text.isascii():
+            chars_per_token = _ASCII_CHARS_PER_TOKEN.get(
+                _encoding_name((model or "cl100k_base").strip()),
+                _ASCII_CHARS_PER_TOKEN["cl100k_base"],
+            )
+            return math.ceil(len(text) / chars_per_token)
+        return -(-len(text.encode("utf-8")) // _BYTES_PER_TOKEN)
+
+    def count_batch_tokens(self, texts: List[str], model: Optional[str] = None) -> List[int]:
+        """
+        批量计算纯文本Token数量
+
+        编码器只解析一次；条数较多时按线程数切分为连续的若干段，在共享线程池中
+        并行编码（编码期间释放GIL），每个线程一次处理一段而不是逐条提交任务；
+        条数较少时直接在当前线程编码。
+
+        参数：
+            texts: 文本列表
+            model: 模型名称（可选）
+
+        返回：
+            与texts一一对应的Token数量列表
+
+        说明：
+            - 批内重复的文本只编码一次
+            - 批量编码按普通文本处理特殊token（如"<|endoftext|>"），不会抛出异常
+        """
+        counts = [0] * len(texts)
+        # 只编码缓存未命中的非空文本；批内重复的文本（系统提示词、固定段落等）只编码一次，
+        # 结果回填到所有出现位置。文本 -> (缓存键, 出现位置)，按首次出现顺序排列
+        pending: Dict[str, Tuple[Tuple[str, bool, str], List[int]]] = {}
+        for i, text in enumerate(texts):
+            if not text:
+                continue
+            entry = pending.get(text)
+            if entry is not None:
+                entry[1].append(i)
+                continue
+            cache_key = self._count_key(text, model, ordinary=True)
+            count = _count_cache.get(cache_key)
+            if count is None:
+                pending[text] = (cache_key, [i])
+            else:
+                counts[i] = count
+        if not pending:
+            return counts
 
         encoding = self._get_encoding(model)
-        return len(encoding.encode(text))
+        encode = encoding.encode_ordinary
+        missing = list(pending)
+        if len(missing) < _PARALLEL_MIN_BATCH:
+            lengths = _count_chunk(encode, missing)
+        else:
+            size = -(-len(missing) // _BATCH_WORKERS)
+            chunks = [missing[start:start + size] for start in range(0, len(missing), size)]
+            lengths = [
+                length
+                for chunk_lengths in _get_batch_executor().map(partial(_count_chunk, encode), chunks)
+                for length in chunk_lengths
+            ]
+        for (cache_key, positions), length in zip(pending.values(), lengths):
+            for i in positions:
+                counts[i] = length
+            self._remember_count(cache_key, length)
+        return counts
+
+    def preload(self, models: Iterable[Optional[str]]) -> None:
+        """
+        预加载编码器
+
+        首次使用某个编码时tiktoken需要下载并构建BPE合并表（网络 + CPU），
+        启动时预加载可避免首个请求承担这部分延迟；下载的文件缓存在
+        TIKTOKEN_CACHE_DIR，构建镜像时预加载一次即可随镜像分发。
+
+        参数：
+            models: 模型名称列表（None表示默认的cl100k_base）
+        """
+        for model in models:
+            self._get_encoding(model)
+
+    @staticmethod
+    def _count_key(text: str, model: Optional[str], ordinary: bool) -> Tuple[str, bool, str]:
+        """
+        生成计数缓存键
+
+        以文本本身作为键的一部分，哈希冲突时由字符串比较区分；字符串的哈希值缓存在
+        对象上，同一文本对象重复计数时无需重新计算。
+
+        参数：
+            text: 文本内容
+            model: 模型名称（可选）
+            ordinary: 是否按普通文本编码（encode_ordinary）
+        """
+        return ((model or "cl100k_base").strip(), ordinary, text)
+
+    def _remember_count(self, cache_key: Tuple[str, bool, str], count: int) -> None:
+        """写入计数缓存，达到上限时整体清空"""
+        if len(_count_cache) >= _COUNT_CACHE_MAX:
+            _count_cache.clear()
+        _count_cache[cache_key] = count
+
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        """
+        获取共享缓存统计信息
+
+        返回：
+            编码器缓存的命中/未命中次数和条目数，以及计数结果缓存的条目数
+        """
+        info = _resolve_encoding.cache_info()
+        return {
+            "encoding_hits": info.hits,
+            "encoding_misses": info.misses,
+            "encoding_size": info.currsize,
+            "count_cache_size": len(_count_cache),
+        }
 
     def _get_encoding(self, model: Optional[str]) -> tiktoken.Encoding:
         """
-        获取并缓存编码器
+        获取编码器
 
         - model为空：使用cl100k_base
         - model有值：优先encoding_for_model；失败则回退cl100k_base
         """
-        key = (model or "cl100k_base").strip()
-        if key in self._encoding_cache:
-            return self._encoding_cache[key]
-
-        if model:
-            try:
-                enc = tiktoken.encoding_for_model(model)
-                self._encoding_cache[key] = enc
-                return enc
-            except KeyError:
-                # 不认识的模型名，回退到通用编码
-                pass
-
-        enc = tiktoken.get_encoding("cl100k_base")
-        self._encoding_cache[key] = enc
-        return enc
+        return _resolve_encoding((model or "cl100k_base").strip())
 
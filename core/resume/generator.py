@@ -4,16 +4,20 @@ Resume模块 - 简历生成器
 基于Jinja2模板引擎生成HTML格式的简历，并支持转换为PDF。
 """
 
+import asyncio
+import multiprocessing
 import os
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, Optional
 from datetime import datetime
 
 try:
-    from jinja2 import Environment, FileSystemLoader, Template
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
 except ImportError:
     Environment = None
+    FileSystemBytecodeCache = None
     FileSystemLoader = None
     Template = None
 
@@ -37,6 +41,21 @@ class ResumeGenerateError(Exception):
     pass
 
 
+def _render_pdf(html_content: str, pdf_path: str, base_url: str) -> None:
+    """
+    使用WeasyPrint将HTML渲染为PDF文件（在PDF进程池中执行）
+    
+    WeasyPrint渲染是CPU密集型操作且持有GIL，放在独立进程中执行，
+    避免阻塞事件循环。定义在模块顶层以便进程池序列化。
+    
+    参数:
+        html_content: HTML内容
+        pdf_path: PDF输出路径
+        base_url: 解析相对资源路径的基础URL
+    """
+    HTML(string=html_content, base_url=base_url).write_pdf(pdf_path)
+
+
 class ResumeGenerator(BaseService):
     """
     简历生成器
@@ -55,7 +74,14 @@ class ResumeGenerator(BaseService):
         resume_config = config.get("resume", {})
         self.template_dir = resume_config.get("template_dir", "templates/resume")
         self.output_dir = resume_config.get("output_dir", "output/resume")
+        # 模板编译结果的磁盘缓存目录（为空时使用系统临时目录）
+        self.template_cache_dir: Optional[str] = resume_config.get("template_cache_dir") or None
         self.jinja_env: Optional[Environment] = None
+        # 模板ID -> 已编译模板，初始化时预编译全部模板
+        self._template_cache: Dict[str, Template] = {}
+        # PDF渲染进程数（为空或0时使用CPU核数）
+        self.pdf_workers: int = resume_config.get("pdf_workers") or os.cpu_count() or 1
+        self._pdf_pool: Optional[ProcessPoolExecutor] = None
         
         # 确保输出目录存在
         Path(self.output_dir).mkdir(parents=True, exist_ok=True)
@@ -74,14 +100,50 @@ class ResumeGenerator(BaseService):
             template_path = Path(__file__).parent / "templates"
             template_path.mkdir(exist_ok=True)
         
+        # 模板在运行期间不变：关闭加载时的文件修改检查；编译结果缓存到磁盘，
+        # 重启和多进程部署时跳过模板解析
         self.jinja_env = Environment(
             loader=FileSystemLoader(str(template_path)),
             autoescape=True,
             trim_blocks=True,
             lstrip_blocks=True,
+            auto_reload=False,
+            bytecode_cache=FileSystemBytecodeCache(self.template_cache_dir),
         )
+        self._template_cache = self._precompile_templates()
+        
+        # 工作进程在首次提交任务时才启动，WeasyPrint不可用时不创建。
+        # 使用spawn启动：此时进程内已有线程池和HTTP客户端线程，fork出的子进程可能死锁
+        if WEASYPRINT_AVAILABLE and self._pdf_pool is None:
+            self._pdf_pool = ProcessPoolExecutor(
+                max_workers=self.pdf_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
         
-        self.logger.info(f"ResumeGenerator初始化完成，模板目录: {template_path}")
+        self.logger.info(
+            f"ResumeGenerator初始化完成，模板目录: {template_path}，"
+            f"已预编译模板: {len(self._template_cache)}"
+        )
+    
+    def _precompile_templates(self) -> Dict[str, Template]:
+        """
+        预编译模板目录下的全部模板
+        
+        编译失败的模板只记录警告，生成时按需加载并报告错误。
+        
+        返回:
+            模板ID到已编译模板的映射
+        """
+        templates: Dict[str, Template] = {}
+        for template_file in self.jinja_env.list_templates(
+            filter_func=lambda name: name.endswith("/template.html")
+        ):
+            template_id = template_file.rsplit("/", 1)[0]
+            try:
+                templates[template_id] = self.jinja_env.get_template(template_file)
+            except Exception as e:
+                self.logger.warning(f"预编译模板失败: {template_file}, 错误: {e}")
+        return templates
     
     async def generate(
         self,
@@ -159,21 +221,28 @@ class ResumeGenerator(BaseService):
         """
         加载模板
         
+        优先使用初始化时预编译的模板；初始化后新增的模板首次使用时加载并缓存。
+        
         参数:
             template_id: 模板ID
         
         返回:
             Template: Jinja2模板对象
         """
+        template = self._template_cache.get(template_id)
+        if template is not None:
+            return template
+        
         # 模板文件路径：{template_id}/template.html
         template_file = f"{template_id}/template.html"
         
         try:
             template = self.jinja_env.get_template(template_file)
-            return template
         except Exception as e:
             self.logger.error(f"加载模板失败: {template_file}, 错误: {e}")
             raise ResumeGenerateError(f"加载模板失败: {template_id}") from e
+        self._template_cache[template_id] = template
+        return template
     
     async def _render_template(
         self,
@@ -274,45 +343,64 @@ class ResumeGenerator(BaseService):
                 "建议：在Windows上使用HTML格式，或安装GTK+运行时库。"
             )
         
+        pdf_path = Path(self.output_dir) / f"{file_id}.pdf"
+        # 先写入临时文件，验证通过后再重命名，避免暴露未写完或损坏的PDF
+        tmp_path = pdf_path.with_suffix(".pdf.tmp")
         try:
-            pdf_path = Path(self.output_dir) / f"{file_id}.pdf"
-            
-            # 使用WeasyPrint转换
-            html_doc = HTML(string=html_content, base_url=str(Path(self.template_dir).parent))
-            html_doc.write_pdf(pdf_path)
+            # 在进程池中使用WeasyPrint转换
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                self._pdf_pool,
+                _render_pdf,
+                html_content,
+                str(tmp_path),
+                str(Path(self.template_dir).parent),
+            )
             
             # 验证PDF文件是否成功生成
-            if not pdf_path.exists():
+            if not tmp_path.exists():
                 raise ResumeGenerateError("PDF文件生成失败：文件不存在")
             
-            file_size = pdf_path.stat().st_size
+            file_size = tmp_path.stat().st_size
             if file_size == 0:
                 raise ResumeGenerateError("PDF文件生成失败：文件为空")
             
             # 验证PDF文件头
-            with open(pdf_path, "rb") as f:
+            with open(tmp_path, "rb") as f:
                 header = f.read(4)
-                if header != b"%PDF":
-                    pdf_path.unlink()  # 删除损坏的文件
-                    raise ResumeGenerateError("PDF文件生成失败：文件格式无效")
+            if header != b"%PDF":
+                raise ResumeGenerateError("PDF文件生成失败：文件格式无效")
             
+            os.replace(tmp_path, pdf_path)
             self.logger.info(f"PDF文件已生成: {pdf_path}, 大小: {file_size} bytes")
             return str(pdf_path)
         except ResumeGenerateError:
             raise
         except Exception as e:
             self.logger.error(f"PDF转换失败: {e}", exc_info=True)
-            # 如果生成了损坏的文件，尝试删除
-            pdf_path = Path(self.output_dir) / f"{file_id}.pdf"
-            if pdf_path.exists():
-                try:
-                    pdf_path.unlink()
-                    self.logger.info(f"已删除损坏的PDF文件: {pdf_path}")
-                except Exception:
-                    pass
             raise ResumeGenerateError(f"PDF转换失败: {e}") from e
+        finally:
+            # 验证失败、出错或请求被取消时删除临时文件；成功时已重命名，无需处理
+            self._remove_partial_pdf(tmp_path)
+    
+    def _remove_partial_pdf(self, tmp_path: Path) -> None:
+        """
+        删除未通过验证或未写完的PDF临时文件
+        
+        参数:
+            tmp_path: PDF临时文件路径
+        """
+        if tmp_path.exists():
+            try:
+                tmp_path.unlink()
+                self.logger.info(f"已删除损坏的PDF文件: {tmp_path}")
+            except Exception:
+                pass
     
     async def cleanup(self) -> None:
         """清理资源"""
         # 可以在这里实现定期清理过期文件的逻辑
+        if self._pdf_pool is not None:
+            self._pdf_pool.shutdown(wait=False, cancel_futures=True)
+            self._pdf_pool = None
         await super().cleanup()
@@ -130,7 +130,7 @@ class ConfigValidator:
         if "enable_routing" in llm_config and llm_config["enable_routing"]:
             if "default_routing_strategy" in llm_config:
                 strategy = llm_config["default_routing_strategy"]
-                valid_strategies = ["cost_first", "performance_first", "availability_first", "balanced", "manual"]
+                valid_strategies = ["cost_first", "performance_first", "availability_first", "balanced", "least_connections", "manual"]
                 if strategy not in valid_strategies:
                     errors.append(f"llm.default_routing_strategy 必须是以下之一: {', '.join(valid_strategies)}")
         
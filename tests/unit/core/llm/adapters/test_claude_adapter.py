@@ -3,6 +3,7 @@
 功能描述：测试ClaudeAdapter的所有功能
 """
 
+import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -66,6 +67,38 @@ class TestClaudeAdapter:
         assert result["usage"]["completion_tokens"] == 7
         assert result["usage"]["total_tokens"] == 12
 
+    async def test_call_with_cache_control(self):
+        """测试带cache_control的消息转换为带缓存断点的内容块"""
+        mock_response = MagicMock(spec=Response)
+        mock_response.raise_for_status = MagicMock()
+        mock_response.json = MagicMock(return_value={"content": [], "usage": {}})
+        mock_client = MagicMock()
+        mock_client.post = AsyncMock(return_value=mock_response)
+
+        adapter = ClaudeAdapter({"api_key": "sk-ant-test"})
+        await adapter.initialize()
+        adapter._client = mock_client
+
+        ephemeral = {"type": "ephemeral"}
+        await adapter.call(
+            messages=[
+                {"role": "system", "content": "sys", "cache_control": ephemeral},
+                {"role": "user", "content": "context", "cache_control": ephemeral},
+                {"role": "user", "content": "question"},
+            ],
+            model="claude-3-5-sonnet-20241022",
+        )
+
+        body = adapter._client.post.call_args[1]
+        request_data = body["json"] if "json" in body else json.loads(body["content"])
+        assert adapter.supports_prompt_cache is True
+        assert request_data["system"] == [{"type": "text", "text": "sys", "cache_control": ephemeral}]
+        assert request_data["messages"][0] == {
+            "role": "user",
+            "content": [{"type": "text", "text": "context", "cache_control": ephemeral}],
+        }
+        assert request_data["messages"][1] == {"role": "user", "content": "question"}
+
     async def test_cleanup(self):
         """测试清理资源"""
         adapter = ClaudeAdapter({"api_key": "sk-ant-test"})
@@ -3,6 +3,7 @@
 功能描述：测试DeepSeekAdapter的所有功能
 """
 
+import json
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from httpx import Response
@@ -10,6 +11,13 @@ from core.llm.adapters.deepseek_adapter import DeepSeekAdapter
 from core.base.adapter import AdapterCallError
 
 
+def _request_body(call_kwargs):
+    """读取请求体（兼容orjson序列化后的content参数）"""
+    if "content" in call_kwargs:
+        return json.loads(call_kwargs["content"])
+    return call_kwargs["json"]
+
+
 @pytest.mark.asyncio
 class TestDeepSeekAdapter:
     """DeepSeekAdapter测试类"""
@@ -359,7 +367,36 @@ class TestDeepSeekAdapter:
         assert result is not None
         # 验证请求中包含了max_tokens
         call_args = mock_client.post.call_args
-        assert "max_tokens" in call_args[1]["json"]
+        assert "max_tokens" in _request_body(call_args[1])
+
+    async def test_call_with_prebuilt_payload(self):
+        """测试传入预构建请求体时直接发送，不再重新构建"""
+        # Arrange
+        mock_response = MagicMock(spec=Response)
+        mock_response.json = MagicMock(return_value={
+            "choices": [{"message": {"content": "Hello"}, "finish_reason": "stop"}],
+            "usage": {"total_tokens": 10},
+        })
+        mock_response.raise_for_status = MagicMock()
+        mock_client = MagicMock()
+        mock_client.post = AsyncMock(return_value=mock_response)
+        
+        adapter = DeepSeekAdapter({"api_key": "test-key"})
+        await adapter.initialize()
+        adapter._client = mock_client
+        messages = [{"role": "user", "content": "Hello"}]
+        payload = adapter.build_payload(messages, "deepseek-chat", 0.3, max_tokens=50)
+        
+        # Act
+        result = await adapter.call(messages, model="deepseek-chat", prebuilt_payload=payload)
+        
+        # Assert
+        assert adapter.supports_prebuilt_payload is True
+        assert result["content"] == "Hello"
+        body = _request_body(mock_client.post.call_args[1])
+        assert body["temperature"] == 0.3
+        assert body["max_tokens"] == 50
+        assert "prebuilt_payload" not in body
 
     async def test_call_without_initialization(self):
         """测试未初始化时调用"""
@@ -511,4 +548,4 @@ class TestDeepSeekAdapter:
         # Assert - 验证请求中包含了max_tokens参数
         assert result is not None
         call_args = mock_client.post.call_args
-        assert "max_tokens" in call_args[1]["json"]
\ No newline at end of file
+        assert "max_tokens" in _request_body(call_args[1])
\ No newline at end of file
@@ -100,6 +100,37 @@ class TestAdapterRegistry:
         assert registry.get_adapter_for_model("custom-model") == "qwen-adapter"
         assert "custom-model" in registry.get_supported_models()
     
+    async def test_register_model_mapping_overrides_resolved_model(self):
+        """测试注册模型映射后覆盖已缓存的解析结果"""
+        # Arrange
+        registry = AdapterRegistry()
+        registry.discover_adapters()
+        assert registry.get_adapter_for_model("qwen-max") == "qwen-adapter"
+        
+        # Act
+        registry.register_model_mapping("qwen-max", "deepseek-adapter")
+        
+        # Assert
+        assert registry.get_adapter_for_model("qwen-max") == "deepseek-adapter"
+    
+    async def test_model_index_precompiles_explicit_mappings(self):
+        """测试批量注册的模型映射预先写入解析缓存，不经过逐个解析"""
+        # Arrange
+        registry = AdapterRegistry()
+        registry.discover_adapters()
+        registry.get_adapter_for_model("qwen-max")
+        
+        # Act
+        registry.register_model_mappings({"model-a": "qwen-adapter", "model-b": "deepseek-adapter"})
+        registry._resolve_model = None  # 已映射模型的查找不应再调用解析方法
+        
+        # Assert
+        assert registry.get_adapter_for_model("model-a") == "qwen-adapter"
+        assert registry.get_adapter_for_model("model-b") == "deepseek-adapter"
+        assert "qwen-max" not in registry._resolved_models
+        with pytest.raises(ValueError):
+            registry.register_model_mappings({"model-c": "missing-adapter"})
+    
     async def test_get_available_adapters(self):
         """测试获取可用适配器列表"""
         # Arrange
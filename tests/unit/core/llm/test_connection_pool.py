@@ -37,6 +37,22 @@ class TestConnectionPoolManager:
         assert manager._timeout == 30.0
         assert manager._pools == {}
     
+    async def test_http2_falls_back_without_h2(self):
+        """测试未安装h2时请求HTTP/2回退为HTTP/1.1，保持时间配置生效"""
+        # Arrange
+        with patch("core.llm.connection_pool.H2_AVAILABLE", False):
+            manager = ConnectionPoolManager(keepalive_expiry=60.0, http2=True)
+        
+        # Act
+        client = await manager.get_client("https://api.example.com")
+        stats = manager.get_statistics()
+        await manager.close_all()
+        
+        # Assert
+        assert isinstance(client, AsyncClient)
+        assert stats["http2"] is False
+        assert stats["keepalive_expiry"] == 60.0
+    
     async def test_get_client_new_pool(self, pool_manager):
         """测试获取客户端（新建连接池）"""
         # Arrange
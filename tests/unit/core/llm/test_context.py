@@ -4,6 +4,7 @@
 """
 
 import pytest
+from unittest.mock import MagicMock
 from core.llm.context import ConversationContext
 
 
@@ -93,3 +94,19 @@ class TestConversationContext:
         
         # Assert
         assert context.is_empty is False
+    
+    def test_count_tokens_uses_shared_counter(self):
+        """测试统计Token时使用传入的共享计数器，一次批量计数所有消息"""
+        # Arrange
+        counter = MagicMock()
+        counter.count_batch_tokens.return_value = [3, 5]
+        context = ConversationContext(token_counter=counter)
+        context.add_message("user", "Hello")
+        context.add_message("assistant", "Hi there!")
+        
+        # Act
+        total = context.count_tokens("gpt-4")
+        
+        # Assert
+        assert total == 8
+        counter.count_batch_tokens.assert_called_once_with(["Hello", "Hi there!"], "gpt-4")
@@ -167,3 +167,30 @@ class TestCostManager:
         # Assert
         assert count == 1
         assert len(cost_manager._records) == 0
+    
+    async def test_records_bounded_with_archived_statistics(self):
+        """测试明细记录超出上限后归档为聚合统计"""
+        # Arrange
+        manager = CostManager({"max_records": 2})
+        usage = {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150}
+        cost_info = {"input": 0.001, "output": 0.002}
+        
+        # Act
+        await manager.record_usage("adapter1", "model1", usage, cost_info)
+        await manager.record_usage("adapter1", "model1", usage, cost_info)
+        await manager.record_usage("adapter2", "model2", usage, cost_info)
+        stats = await manager.get_statistics()
+        
+        # Assert
+        assert len(manager._records) == 2
+        assert stats["request_count"] == 3
+        assert stats["total_tokens"] == 450
+        assert stats["adapter_stats"]["adapter1"]["request_count"] == 2
+        assert stats["model_stats"]["model2"]["request_count"] == 1
+        assert await manager.clear_records() == 3
+    
+    async def test_max_records_must_be_positive(self):
+        """测试max_records小于1时初始化失败"""
+        # Act & Assert
+        with pytest.raises(ValueError):
+            CostManager({"max_records": 0})
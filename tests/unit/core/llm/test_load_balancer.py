@@ -67,6 +67,22 @@ class TestLoadBalancer:
         # Assert
         assert selected in adapters
     
+    async def test_weighted_round_robin_integer_weights(self, adapters):
+        """测试整数权重的加权轮询按权重比例分配"""
+        # Arrange
+        load_balancer = LoadBalancer(LoadBalanceStrategy.WEIGHTED_ROUND_ROBIN)
+        load_balancer.set_weights({"adapter1": 3, "adapter2": 1, "adapter3": 2})
+        
+        # Act
+        selected = [load_balancer.select(adapters).name for _ in range(12)]
+        
+        # Assert - 每个周期（6次）内按 3:1:2 分配，且平滑交错
+        assert selected.count("adapter1") == 6
+        assert selected.count("adapter2") == 2
+        assert selected.count("adapter3") == 4
+        assert selected[:6] == selected[6:]
+        assert selected[:3] != ["adapter1"] * 3
+    
     async def test_least_connections_strategy(self, load_balancer, adapters):
         """测试最少连接策略"""
         # Arrange
@@ -0,0 +1,38 @@
+"""
+测试模块：LLM数据模型测试
+功能描述：测试LLMResponse的创建时间和序列化
+"""
+
+from datetime import datetime, timedelta
+from core.llm.models import LLMResponse
+
+
+class TestLLMResponse:
+    """LLMResponse测试类"""
+    
+    def test_created_at_is_resolved_lazily(self):
+        """测试创建时间在首次访问时转换，并与序列化结果一致"""
+        # Arrange
+        before = datetime.now()
+        response = LLMResponse(content="Hello", model="gpt-4")
+        
+        # Act
+        created_at = response.created_at
+        
+        # Assert
+        assert before - timedelta(seconds=1) <= created_at <= datetime.now()
+        assert response.created_at is created_at
+        assert response.to_dict()["created_at"] == created_at.isoformat()
+    
+    def test_created_at_setter_resets_serialized_value(self):
+        """测试设置创建时间后序列化使用新值"""
+        # Arrange
+        response = LLMResponse(content="Hello", model="gpt-4")
+        response.to_dict()
+        new_time = datetime(2026, 1, 1, 12, 0, 0)
+        
+        # Act
+        response.created_at = new_time
+        
+        # Assert
+        assert response.to_dict()["created_at"] == new_time.isoformat()
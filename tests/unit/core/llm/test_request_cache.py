@@ -3,6 +3,7 @@
 功能描述：测试RequestCache和RequestDeduplicator的所有功能
 """
 
+import asyncio
 import pytest
 from unittest.mock import AsyncMock
 from core.llm.request_cache import RequestCache, RequestDeduplicator
@@ -94,6 +95,68 @@ class TestRequestCache:
         assert await cache.get("key2") is not None
         assert await cache.get("key3") is not None
     
+    async def test_cache_evicts_least_recently_used(self, cache):
+        """测试缓存按最近最少使用淘汰"""
+        # Arrange
+        cache._max_size = 2
+        await cache.set("key1", LLMResponse("response1", "model1"))
+        await cache.set("key2", LLMResponse("response2", "model2"))
+        
+        # Act - 访问key1后再写入key3，应淘汰key2
+        assert await cache.get("key1") is not None
+        await cache.set("key3", LLMResponse("response3", "model3"))
+        
+        # Assert
+        assert await cache.get("key1") is not None
+        assert await cache.get("key2") is None
+        assert await cache.get("key3") is not None
+    
+    async def test_expiry_queue_is_compacted_on_rewrites(self, cache):
+        """测试重复写入同一批键时过期队列不会无限增长"""
+        # Arrange
+        cache._max_size = 4
+        
+        # Act
+        for i in range(50):
+            await cache.set(f"key{i % 6}", LLMResponse(f"response{i}", "model"))
+        
+        # Assert
+        assert len(cache._cache) == 4
+        assert len(cache._expiry_queue) <= 2 * cache._max_size
+        assert (await cache.get("key1")).content == "response49"
+    
+    async def test_bloom_filter_skips_serialization_on_cold_key(self, cache, mocker):
+        """测试布隆过滤器对冷键直接判定未命中"""
+        # Arrange
+        request = {"model": "model-a", "messages": [{"role": "user", "content": "hi"}]}
+        await cache.set(request, LLMResponse("response", "model-a"))
+        generate_key = mocker.spy(cache, "_generate_key")
+        
+        # Act
+        cold = await cache.get({"model": "model-b", "messages": [{"role": "user", "content": "bye"}]})
+        hit = await cache.get({"model": "model-a", "messages": [{"role": "user", "content": "hi"}]})
+        
+        # Assert
+        assert cold is None
+        assert hit is not None
+        assert generate_key.call_count == 1
+    
+    async def test_get_many(self, cache):
+        """测试批量获取缓存"""
+        # Arrange
+        await cache.set({"model": "m", "prompt": "a"}, LLMResponse("response-a", "m"))
+        await cache.set({"model": "m", "prompt": "c"}, LLMResponse("response-c", "m"))
+        
+        # Act
+        results = await cache.get_many([
+            {"model": "m", "prompt": "a"},
+            {"model": "m", "prompt": "b"},
+            {"model": "m", "prompt": "c"},
+        ])
+        
+        # Assert
+        assert [r.content if r else None for r in results] == ["response-a", None, "response-c"]
+    
     async def test_cleanup(self, cache):
         """测试清理缓存"""
         # Arrange
@@ -182,3 +245,27 @@ class TestRequestDeduplicator:
         
         # Assert
         assert len(deduplicator._pending_requests) == 0
+    
+    async def test_cancelled_waiter_does_not_cancel_shared_request(self, deduplicator):
+        """测试一个等待者被取消时，其他等待同一请求的调用方仍能拿到结果"""
+        # Arrange
+        release = asyncio.Event()
+        
+        async def fetch():
+            await release.wait()
+            return "response"
+        
+        request_data = {"model": "test", "messages": []}
+        first = asyncio.create_task(deduplicator.deduplicate(request_data, fetch))
+        second = asyncio.create_task(deduplicator.deduplicate(request_data, fetch))
+        await asyncio.sleep(0)
+        
+        # Act
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        result = await second
+        
+        # Assert
+        assert first.cancelled()
+        assert result == "response"
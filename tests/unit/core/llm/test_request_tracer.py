@@ -35,6 +35,18 @@ class TestRequestTracer:
         assert tracer._max_traces == 50
         assert tracer._enabled is True
     
+    def test_should_sample(self):
+        """测试采样率为0或追踪禁用时不采样，默认全部采样"""
+        # Arrange
+        default_tracer = RequestTracer({})
+        unsampled_tracer = RequestTracer({"sample_rate": 0.0})
+        disabled_tracer = RequestTracer({"enabled": False})
+        
+        # Act & Assert
+        assert default_tracer.should_sample("llm_chat") is True
+        assert unsampled_tracer.should_sample("llm_chat") is False
+        assert disabled_tracer.should_sample("llm_chat") is False
+    
     def test_start_trace(self, tracer):
         """测试开始追踪"""
         # Act
@@ -102,6 +114,47 @@ class TestRequestTracer:
         assert context.end_time is not None
         assert context.total_duration is not None
     
+    async def test_span_nesting_uses_current_context(self, tracer):
+        """测试跨度通过当前上下文自动嵌套"""
+        # Arrange
+        previous = RequestTracer.get_current_trace()
+        context = tracer.start_trace("root_operation")
+        root_span_id = context.spans[0].span_id
+        
+        # Act
+        outer = tracer.start_span(None, "outer")
+        inner = tracer.start_span(None, "inner")
+        tracer.end_span(inner)
+        sibling = tracer.start_span(None, "sibling")
+        tracer.end_span(sibling)
+        tracer.end_span(outer)
+        tracer.end_trace(context)
+        
+        # Assert
+        assert RequestTracer.get_current_trace() is previous
+        assert outer.parent_span_id == root_span_id
+        assert inner.parent_span_id == outer.span_id
+        assert sibling.parent_span_id == outer.span_id
+        assert len(context.spans) == 4
+    
+    async def test_nested_trace_restores_outer_trace(self, tracer):
+        """测试在外层追踪中开始并结束的追踪会恢复外层追踪和当前跨度"""
+        # Arrange
+        outer = tracer.start_trace("agent_step")
+        outer_span = tracer.start_span(None, "tool_call")
+        
+        # Act
+        inner = tracer.start_trace("chat")
+        inner_current = RequestTracer.get_current_trace()
+        tracer.end_trace(inner)
+        child = tracer.start_span(None, "after_chat")
+        
+        # Assert
+        assert inner_current is inner
+        assert RequestTracer.get_current_trace() is outer
+        assert child.parent_span_id == outer_span.span_id
+        assert len(outer.spans) == 3
+    
     async def test_get_trace(self, tracer):
         """测试获取追踪上下文"""
         # Arrange
@@ -159,6 +212,45 @@ class TestRequestTracer:
         # Assert
         assert len(traces) >= 1
     
+    async def test_oldest_and_expired_traces_are_evicted(self):
+        """测试超出容量时淘汰最早的追踪，过期追踪从时间索引头部清理"""
+        # Arrange
+        tracer = RequestTracer({"max_traces": 2, "trace_ttl": 3600})
+        contexts = [TraceContext(trace_id=f"trace{i}") for i in range(3)]
+        for i, context in enumerate(contexts):
+            context.start_time_ns += i
+        
+        # Act
+        for context in contexts:
+            await tracer._store_trace(context)
+        kept = await tracer.list_traces()
+        tracer._trace_ttl = 0
+        await tracer._store_trace(TraceContext(trace_id="latest"))
+        
+        # Assert
+        assert [trace.trace_id for trace in kept] == ["trace2", "trace1"]
+        assert list(tracer._traces) == ["latest"]
+        assert [trace_id for _, trace_id in tracer._trace_index] == ["latest"]
+    
+    async def test_list_traces_time_range_and_limit(self, tracer):
+        """测试在时间索引上按时间范围和数量限制取最新的追踪"""
+        # Arrange
+        base = datetime.now()
+        for i in range(5):
+            context = TraceContext(trace_id=f"trace{i}")
+            context.start_time_ns = int((base + timedelta(seconds=i)).timestamp() * 1_000_000_000)
+            await tracer._store_trace(context)
+        
+        # Act
+        traces = await tracer.list_traces(
+            limit=2,
+            start_time=base + timedelta(seconds=1),
+            end_time=base + timedelta(seconds=3),
+        )
+        
+        # Assert
+        assert [trace.trace_id for trace in traces] == ["trace3", "trace2"]
+    
     async def test_clear_traces(self, tracer):
         """测试清理所有追踪"""
         # Arrange
@@ -192,3 +284,23 @@ class TestRequestTracer:
         # Assert - 禁用时应该不存储追踪
         assert context.trace_id is not None
         # 但追踪不会被存储到_traces中
+    
+    def test_operation_statistics(self):
+        """测试按操作汇总跨度耗时"""
+        # Arrange
+        context = TraceContext(trace_id="trace")
+        context.spans = [
+            TraceSpan(span_id="1", parent_span_id=None, operation="llm_chat", duration=0.5),
+            TraceSpan(span_id="2", parent_span_id="1", operation="adapter_call", duration=0.1),
+            TraceSpan(span_id="3", parent_span_id="1", operation="adapter_call", duration=0.3),
+            TraceSpan(span_id="4", parent_span_id="1", operation="adapter_call"),
+        ]
+        
+        # Act
+        stats = context.get_operation_statistics()
+        
+        # Assert - 未结束的跨度不计入
+        assert stats["llm_chat"]["count"] == 1
+        assert stats["adapter_call"]["count"] == 2
+        assert stats["adapter_call"]["total_duration"] == pytest.approx(0.4)
+        assert stats["adapter_call"]["max_duration"] == 0.3
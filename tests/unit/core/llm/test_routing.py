@@ -3,6 +3,7 @@
 功能描述：测试AdapterRouter和路由策略的所有功能
 """
 
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from core.llm.routing import AdapterRouter, RoutingStrategy
@@ -200,9 +201,9 @@ class TestAdapterRouter:
     async def test_clear_health_cache(self, router):
         """测试清理健康检查缓存"""
         # Arrange
-        router._health_cache["adapter1"] = HealthCheckResult(
-            status=HealthStatus.HEALTHY,
-            message="Cached"
+        router._health_cache["adapter1"] = (
+            HealthCheckResult(status=HealthStatus.HEALTHY, message="Cached"),
+            0.0,
         )
         
         # Act
@@ -226,3 +227,233 @@ class TestAdapterRouter:
         # Assert
         assert stats is not None
         assert isinstance(stats, dict)
+
+
+@pytest.mark.asyncio
+class TestLeastConnectionsRouting:
+    """最少连接路由测试类"""
+    
+    async def test_route_least_connections(self):
+        """测试最少连接策略选择进行中请求最少的适配器"""
+        # Arrange
+        router = AdapterRouter(MagicMock())
+        adapters = [MockAdapter("adapter1"), MockAdapter("adapter2")]
+        router.record_connection("adapter1")
+        router.record_connection("adapter1")
+        router.record_connection("adapter2")
+        
+        # Act
+        selected = await router.route({"model": "test"}, RoutingStrategy.LEAST_CONNECTIONS, adapters)
+        router.record_connection("adapter1", -2)
+        reselected = await router.route({"model": "test"}, "least_connections", adapters)
+        
+        # Assert
+        assert selected.name == "adapter2"
+        assert reselected.name == "adapter1"
+
+
+@pytest.mark.asyncio
+class TestCostFirstRouting:
+    """成本优先路由测试类"""
+    
+    async def test_route_cost_first_uses_sorted_index(self):
+        """测试成本优先按排序索引选择最便宜的健康适配器，新适配器加入后重新排序"""
+        # Arrange
+        router = AdapterRouter(MagicMock())
+        cheap, medium, expensive = MockAdapter("cheap"), MockAdapter("medium"), MockAdapter("expensive")
+        cheap._cost = {"input": 0.001, "output": 0.001}
+        medium._cost = {"input": 0.002, "output": 0.002}
+        expensive._cost = {"input": 0.01, "output": 0.01}
+        cheapest = MockAdapter("cheapest")
+        cheapest._cost = {"input": 0.0001, "output": 0.0001}
+        request = {"model": "test"}
+        
+        # Act
+        first = await router.route(request, RoutingStrategy.COST_FIRST, [expensive, medium, cheap])
+        without_cheap = await router.route(request, RoutingStrategy.COST_FIRST, [expensive, medium])
+        with_new = await router.route(request, RoutingStrategy.COST_FIRST, [expensive, cheap, cheapest])
+        
+        # Assert
+        assert first.name == "cheap"
+        assert without_cheap.name == "medium"
+        assert with_new.name == "cheapest"
+    
+    async def test_cost_indexes_are_bounded(self):
+        """测试请求中的任意模型名不会使成本缓存和排序索引无限增长"""
+        # Arrange
+        router = AdapterRouter(MagicMock())
+        adapters = [MockAdapter("adapter1"), MockAdapter("adapter2")]
+        strategy = router._strategies["cost_first"]
+        
+        # Act
+        with patch("core.llm.routing._MAX_COST_ENTRIES", 8):
+            for i in range(20):
+                selected = await router.route({"model": f"model-{i}"}, RoutingStrategy.COST_FIRST, adapters)
+        
+        # Assert
+        assert selected.name == "adapter1"
+        assert len(strategy._cost_index) <= 8
+        assert len(strategy._cost_sorted_adapters) <= 4
+        assert len(strategy._ranked_names) <= 4
+
+
+@pytest.mark.asyncio
+class TestBalancedRouting:
+    """平衡模式路由测试类"""
+    
+    async def test_cost_index_is_bounded(self):
+        """测试请求中的任意模型名不会使成本缓存无限增长"""
+        # Arrange
+        router = AdapterRouter(MagicMock())
+        adapters = [MockAdapter("adapter1")]
+        
+        # Act
+        with patch("core.llm.routing._MAX_COST_ENTRIES", 8):
+            for i in range(20):
+                await router.route({"model": f"model-{i}"}, RoutingStrategy.BALANCED, adapters)
+        
+        # Assert
+        assert len(router._strategies["balanced"]._cost_index) <= 8
+
+
+@pytest.mark.asyncio
+class TestAvailabilityFirstRouting:
+    """可用性优先路由测试类"""
+    
+    async def test_healthy_adapters_are_chosen_by_priority(self):
+        """测试多个适配器健康时按候选顺序选择，与健康检查完成顺序无关"""
+        # Arrange
+        router = AdapterRouter(MagicMock())
+        slow, fast = MockAdapter("slow"), MockAdapter("fast")
+        original_check = slow.health_check
+        
+        async def slow_check():
+            await asyncio.sleep(0.01)
+            return await original_check()
+        
+        slow.health_check = slow_check
+        
+        # Act
+        selected = await router.route({"model": "test"}, RoutingStrategy.AVAILABILITY_FIRST, [slow, fast])
+        
+        # Assert
+        assert selected.name == "slow"
+        assert router._health_cache["fast"][0].status == HealthStatus.HEALTHY
+    
+    async def test_cancelled_health_check_counts_as_unhealthy(self):
+        """测试健康检查任务被取消时按检查失败处理，选择下一个健康的适配器"""
+        # Arrange
+        router = AdapterRouter(MagicMock())
+        cancelled, healthy = MockAdapter("cancelled"), MockAdapter("healthy")
+        cancelled.health_check = AsyncMock(side_effect=asyncio.CancelledError)
+        
+        # Act
+        selected = await router.route({"model": "test"}, RoutingStrategy.AVAILABILITY_FIRST, [cancelled, healthy])
+        
+        # Assert
+        assert selected.name == "healthy"
+        assert router._health_cache["cancelled"][0].status == HealthStatus.UNHEALTHY
+
+
+@pytest.mark.asyncio
+class TestCapabilityFilter:
+    """能力过滤测试类"""
+    
+    async def test_capability_masks_are_cached_on_adapters(self):
+        """测试按能力过滤使用适配器上缓存的位掩码，重复过滤不再重新计算"""
+        # Arrange
+        router = AdapterRouter(MagicMock())
+        reasoning, vision = MockAdapter("reasoning"), MockAdapter("vision")
+        vision.set_capability(ModelCapability(vision=True))
+        required = ModelCapability(reasoning=True)
+        
+        # Act
+        first = await router.get_healthy_adapters([reasoning, vision], required)
+        with patch.object(ModelCapability, "to_mask", autospec=True, side_effect=ModelCapability.to_mask) as to_mask:
+            second = await router.get_healthy_adapters([reasoning, vision], required)
+        
+        # Assert
+        assert [adapter.name for adapter in first] == ["reasoning"]
+        assert [adapter.name for adapter in second] == ["reasoning"]
+        assert to_mask.call_count == 1  # 只计算所需能力的掩码
+    
+    async def test_capability_mask_follows_set_capability(self):
+        """测试重新设置能力标签后位掩码随之更新"""
+        # Arrange
+        adapter = MockAdapter("adapter")
+        adapter.set_capability(ModelCapability(reasoning=True))
+        before = adapter.get_capability_mask()
+        
+        # Act
+        adapter.set_capability(ModelCapability(vision=True))
+        
+        # Assert
+        assert before == ModelCapability.REASONING_BIT
+        assert adapter.get_capability_mask() == ModelCapability.VISION_BIT
+
+
+@pytest.mark.asyncio
+class TestHealthPreFilter:
+    """路由健康预过滤测试类"""
+    
+    @pytest.mark.parametrize("strategy", [
+        RoutingStrategy.BALANCED,
+        RoutingStrategy.COST_FIRST,
+        RoutingStrategy.AVAILABILITY_FIRST,
+    ])
+    async def test_unhealthy_adapter_is_skipped_without_require_healthy(self, strategy):
+        """测试require_healthy=False时仍过滤不健康的适配器（LLMService的默认路径）"""
+        # Arrange
+        router = AdapterRouter(MagicMock())
+        bad, good = MockAdapter("bad"), MockAdapter("good")
+        bad._healthy = False
+        bad._cost = {"input": 0.0001, "output": 0.0001}
+        good._cost = {"input": 0.01, "output": 0.01}
+        
+        # Act
+        selected = await router.route({"model": "test", "require_healthy": False}, strategy, [bad, good])
+        
+        # Assert
+        assert selected.name == "good"
+    
+    async def test_fallback_prefers_unknown_over_unhealthy(self):
+        """测试没有健康的适配器时优先降级到状态未知的适配器，而不是确认不健康的"""
+        # Arrange
+        router = AdapterRouter(MagicMock())
+        bad, unknown = MockAdapter("bad"), MockAdapter("unknown")
+        bad._healthy = False
+        unknown.health_check = AsyncMock(return_value=HealthCheckResult(status=HealthStatus.UNKNOWN))
+        
+        # Act
+        selected = await router.route({"model": "test"}, RoutingStrategy.BALANCED, [bad, unknown])
+        
+        # Assert
+        assert selected.name == "unknown"
+
+
+@pytest.mark.asyncio
+class TestHealthRefresher:
+    """后台健康刷新测试类"""
+    
+    async def test_refresher_populates_cache_and_skips_inline_checks(self):
+        """测试后台刷新填充缓存，运行期间路由不再内联执行健康检查"""
+        # Arrange
+        router = AdapterRouter(MagicMock())
+        healthy = MockAdapter("adapter1")
+        unhealthy = MockAdapter("adapter2")
+        unhealthy._healthy = False
+        pending = MockAdapter("adapter3")
+        pending.health_check = AsyncMock(side_effect=AssertionError("不应内联检查"))
+        
+        # Act
+        await router.start_health_refresher(lambda: [healthy, unhealthy], interval=60)
+        while len(router._health_cache) < 2:  # 等待首轮刷新完成
+            await asyncio.sleep(0)
+        result = await router.get_healthy_adapters([healthy, unhealthy, pending])
+        running = router.is_health_refresher_running()
+        await router.stop_health_refresher()
+        
+        # Assert
+        assert running is True
+        assert [adapter.name for adapter in result] == ["adapter1", "adapter3"]
+        assert router.is_health_refresher_running() is False
@@ -3,10 +3,13 @@
 功能描述：测试LLMService的所有功能
 """
 
+import asyncio
 import pytest
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
 from core.llm.service import LLMService, LLMError
 from core.llm.adapters.base import BaseLLMAdapter
+from core.llm.utils.token_counter import TokenCounter
+from core.base.health_check import HealthStatus
 
 
 class MockAdapter(BaseLLMAdapter):
@@ -28,6 +31,15 @@ class MockAdapter(BaseLLMAdapter):
         }
 
 
+
+class DefaultMockAdapter(MockAdapter):
+    """用于测试默认适配器选择的Mock适配器"""
+    
+    @property
+    def name(self) -> str:
+        return "default-adapter"
+
+
 @pytest.mark.asyncio
 class TestLLMService:
     """LLMService测试类"""
@@ -62,6 +74,63 @@ class TestLLMService:
         # Assert
         assert "mock-adapter" in service._adapters
     
+    async def test_get_adapter_cache_invalidated_on_register(self):
+        """测试注册适配器后模型解析缓存失效"""
+        # Arrange
+        config = {"llm": {"default_adapter": "default-adapter", "auto_discover_adapters": False}}
+        service = LLMService(config)
+        await service.initialize()
+        service.register_adapter(MockAdapter())
+        assert (await service._get_adapter()).name == "mock-adapter"
+        
+        default_adapter = DefaultMockAdapter()
+        
+        # Act
+        service.register_adapter(default_adapter)
+        adapter = await service._get_adapter()
+        
+        # Assert
+        assert adapter is default_adapter
+        assert await service._get_adapter() is adapter
+    
+    async def test_get_adapter_falls_back_to_first_registered(self):
+        """测试未配置默认适配器时回退到最先注册的适配器，同名重新注册时使用新实例"""
+        # Arrange
+        config = {"llm": {"auto_discover_adapters": False}}
+        service = LLMService(config)
+        await service.initialize()
+        service.register_adapter(MockAdapter())
+        service.register_adapter(DefaultMockAdapter())
+        replacement = MockAdapter()
+        
+        # Act
+        first = await service._get_adapter()
+        service.register_adapter(replacement)
+        replaced = await service._get_adapter()
+        
+        # Assert
+        assert first.name == "mock-adapter"
+        assert replaced is replacement
+    
+    async def test_get_adapter_prefers_configured_default(self):
+        """测试配置的默认适配器晚于其他适配器注册时仍作为默认适配器"""
+        # Arrange
+        config = {"llm": {"auto_discover_adapters": False, "default_adapter": "default-adapter"}}
+        service = LLMService(config)
+        await service.initialize()
+        service.register_adapter(MockAdapter())
+        default = DefaultMockAdapter()
+        
+        # Act
+        before = await service._get_adapter()
+        service.register_adapter(default)
+        service.register_adapter(MockAdapter())
+        after = await service._get_adapter()
+        
+        # Assert
+        assert before.name == "mock-adapter"
+        assert after is default
+    
     async def test_chat_success(self):
         """测试聊天成功场景"""
         # Arrange
@@ -81,6 +150,241 @@ class TestLLMService:
         assert response.content == "Mock response"
         assert response.total_tokens == 10
     
+    async def test_chat_caches_deterministic_response(self):
+        """测试温度为0的相同请求命中响应缓存，不再调用适配器"""
+        # Arrange
+        config = {"llm": {"default_model": "gpt-3.5-turbo", "auto_discover_adapters": False}}
+        service = LLMService(config)
+        await service.initialize()
+        
+        adapter = MockAdapter()
+        adapter.call = AsyncMock(wraps=adapter.call)
+        service.register_adapter(adapter)
+        
+        messages = [{"role": "user", "content": "Hello"}]
+        
+        # Act
+        first = await service.chat(messages, temperature=0.0)
+        second = await service.chat(messages, temperature=0.0)
+        await service.chat(messages, temperature=0.7)
+        
+        # Assert
+        assert second.content == first.content
+        assert second.metadata["cache_hit"] is True
+        assert "cache_hit" not in first.metadata
+        assert adapter.call.await_count == 2
+    
+    async def test_chat_cache_covers_functions_and_stochastic_opt_in(self):
+        """测试工具定义参与缓存键，allow_stochastic_cache时高温度请求也使用缓存"""
+        # Arrange
+        config = {"llm": {"auto_discover_adapters": False}}
+        service = LLMService(config)
+        await service.initialize()
+        adapter = MockAdapter()
+        adapter.call = AsyncMock(wraps=adapter.call)
+        service.register_adapter(adapter)
+        messages = [{"role": "user", "content": "Hello"}]
+        tools = [{"name": "get_weather", "parameters": {"type": "object"}}]
+        
+        # Act
+        await service.chat(messages, temperature=0.0, functions=tools)
+        with_tools = await service.chat(messages, temperature=0.0, functions=tools)
+        without_tools = await service.chat(messages, temperature=0.0)
+        await service.chat(messages, temperature=0.9, allow_stochastic_cache=True)
+        stochastic = await service.chat(messages, temperature=0.9, allow_stochastic_cache=True)
+        
+        # Assert
+        assert with_tools.metadata["cache_hit"] is True
+        assert "cache_hit" not in without_tools.metadata
+        assert stochastic.metadata["cache_hit"] is True
+        assert adapter.call.await_count == 3
+    
+    async def test_concurrent_identical_chats_are_deduplicated(self):
+        """测试并发的相同确定性请求只调用一次适配器，各调用方拿到独立副本"""
+        # Arrange
+        config = {"llm": {"auto_discover_adapters": False}}
+        service = LLMService(config)
+        await service.initialize()
+        adapter = MockAdapter()
+        original_call = adapter.call
+        
+        async def slow_call(messages, model, **kwargs):
+            await asyncio.sleep(0.01)
+            return await original_call(messages, model, **kwargs)
+        
+        adapter.call = AsyncMock(side_effect=slow_call)
+        service.register_adapter(adapter)
+        messages = [{"role": "user", "content": "Hello"}]
+        
+        # Act
+        responses = await asyncio.gather(
+            *(service.chat(messages, temperature=0.0) for _ in range(3))
+        )
+        
+        # Assert
+        assert adapter.call.await_count == 1
+        assert all(r.content == "Mock response" for r in responses)
+        assert responses[0] is not responses[1]
+    
+    async def test_chat_cache_key_uses_message_snapshot(self):
+        """测试调用期间修改消息列表不影响响应缓存的键"""
+        # Arrange
+        config = {"llm": {"auto_discover_adapters": False}}
+        service = LLMService(config)
+        await service.initialize()
+        adapter = MockAdapter()
+        original_call = adapter.call
+        
+        async def mutating_call(messages, model, **kwargs):
+            # 模拟调用方在等待期间追加对话内容
+            messages.append({"role": "assistant", "content": "Mock response"})
+            return await original_call(messages, model, **kwargs)
+        
+        adapter.call = AsyncMock(side_effect=mutating_call)
+        service.register_adapter(adapter)
+        
+        # Act
+        await service.chat([{"role": "user", "content": "Hello"}], temperature=0.0)
+        cached = await service.chat([{"role": "user", "content": "Hello"}], temperature=0.0)
+        
+        # Assert
+        assert cached.metadata["cache_hit"] is True
+        assert adapter.call.await_count == 1
+    
+    async def test_chat_stream_internally(self):
+        """测试内部流式获取响应并拼接为完整响应"""
+        # Arrange
+        config = {"llm": {"default_model": "gpt-3.5-turbo", "auto_discover_adapters": False}}
+        service = LLMService(config)
+        await service.initialize()
+        
+        adapter = MockAdapter()
+        
+        async def stream_call(messages, model, **kwargs):
+            yield {"content": "Hello, "}
+            yield {"content": "world"}
+            yield {"content": "", "usage": {"total_tokens": 7}, "metadata": {"finish_reason": "stop"}}
+        
+        adapter.stream_call = stream_call
+        adapter.call = AsyncMock()
+        service.register_adapter(adapter)
+        
+        # Act
+        response = await service.chat([{"role": "user", "content": "Hi"}], stream_internally=True)
+        
+        # Assert
+        assert response.content == "Hello, world"
+        assert response.total_tokens == 7
+        assert response.metadata["finish_reason"] == "stop"
+        adapter.call.assert_not_awaited()
+    
+    async def test_chat_cache_prefix_boundary(self):
+        """测试提示词缓存断点只传给支持提示词缓存的适配器，且不修改调用方的消息"""
+        # Arrange
+        config = {"llm": {"default_model": "gpt-3.5-turbo", "auto_discover_adapters": False}}
+        service = LLMService(config)
+        await service.initialize()
+        
+        adapter = MockAdapter()
+        adapter.call = AsyncMock(return_value={"content": "ok", "usage": {}, "metadata": {}})
+        service.register_adapter(adapter)
+        messages = [
+            {"role": "system", "content": "You are helpful."},
+            {"role": "user", "content": "Context"},
+            {"role": "user", "content": "Question"},
+        ]
+        
+        # Act
+        await service.chat(messages, cache_prefix_boundary=2)
+        plain_messages = adapter.call.call_args.kwargs["messages"]
+        with patch.object(MockAdapter, "supports_prompt_cache", new_callable=PropertyMock, return_value=True):
+            await service.chat(messages, cache_prefix_boundary=2)
+        marked_messages = adapter.call.call_args.kwargs["messages"]
+        
+        # Assert
+        assert all("cache_control" not in message for message in plain_messages)
+        assert "cache_control" not in marked_messages[0]
+        assert marked_messages[1]["cache_control"] == {"type": "ephemeral"}
+        assert "cache_control" not in marked_messages[2]
+        assert all("cache_control" not in message for message in messages)
+        with pytest.raises(ValueError):
+            await service.chat(messages, cache_prefix_boundary=0)
+    
+    async def test_retry_reuses_prebuilt_payload(self):
+        """测试支持预构建请求体的适配器在重试时只构建一次请求体"""
+        # Arrange
+        config = {"llm": {"default_model": "gpt-3.5-turbo", "auto_discover_adapters": False, "max_retries": 2}}
+        service = LLMService(config)
+        await service.initialize()
+        
+        adapter = MockAdapter()
+        adapter.build_payload = MagicMock(return_value={"content": b"{}"})
+        adapter.call = AsyncMock(side_effect=[
+            ConnectionError("reset"),
+            {"content": "ok", "usage": {}, "metadata": {}},
+        ])
+        service.register_adapter(adapter)
+        
+        # Act
+        with patch.object(MockAdapter, "supports_prebuilt_payload", new_callable=PropertyMock, return_value=True):
+            response = await service.chat([{"role": "user", "content": "Hi"}])
+        
+        # Assert
+        assert response.content == "ok"
+        adapter.build_payload.assert_called_once()
+        assert adapter.call.call_count == 2
+        assert all(
+            call.kwargs["prebuilt_payload"] == {"content": b"{}"} for call in adapter.call.call_args_list
+        )
+    
+    async def test_retry_reroutes_to_healthy_adapter(self):
+        """测试重试前使失败适配器的健康缓存失效并切换适配器，活跃请求数随之转移"""
+        # Arrange
+        config = {"llm": {"enable_routing": True, "auto_discover_adapters": False, "max_retries": 1}}
+        service = LLMService(config)
+        await service.initialize()
+        failing = MockAdapter()
+        failing.call = AsyncMock(side_effect=ConnectionError("reset"))
+        healthy = DefaultMockAdapter()
+        healthy.call = AsyncMock(return_value={"content": "ok", "usage": {}, "metadata": {}})
+        service.register_adapter(failing)
+        service.register_adapter(healthy)
+        service._router.route = AsyncMock(side_effect=[failing, healthy])
+        
+        # Act
+        with patch.object(service._router, "invalidate_health", wraps=service._router.invalidate_health) as invalidate:
+            response = await service.chat([{"role": "user", "content": "Hi"}], model="gpt-3.5-turbo")
+        
+        # Assert
+        assert response.content == "ok"
+        invalidate.assert_called_once_with("mock-adapter")
+        failing.call.assert_awaited_once()
+        healthy.call.assert_awaited_once()
+        registry = service._metrics_collector.get_registry()
+        for name in ("mock-adapter", "default-adapter"):
+            labels = {"adapter": name, "model": "gpt-3.5-turbo"}
+            assert registry.get_sample_value("llm_active_requests", labels) == 0
+    
+    async def test_routed_get_adapter_passes_adapter_snapshot(self):
+        """测试路由模式直接传入注册时构建的适配器快照，注册新适配器后快照更新"""
+        # Arrange
+        config = {"llm": {"enable_routing": True, "auto_discover_adapters": False}}
+        service = LLMService(config)
+        await service.initialize()
+        adapter = MockAdapter()
+        service.register_adapter(adapter)
+        service._router.route = AsyncMock(return_value=adapter)
+        
+        # Act
+        selected = await service._get_adapter("gpt-3.5-turbo")
+        routed_adapters = service._router.route.call_args.args[2]
+        service.register_adapter(DefaultMockAdapter())
+        
+        # Assert
+        assert selected is adapter
+        assert routed_adapters == (adapter,)
+        assert len(service._adapter_values) == 2
+    
     async def test_chat_with_empty_messages(self):
         """测试空消息列表时抛出异常"""
         # Arrange
@@ -129,6 +433,139 @@ class TestLLMService:
         assert len(chunks) > 0
         assert chunks[0].content == "Mock response"
     
+    async def test_stream_chat_reuse_response(self):
+        """测试流式聊天复用响应对象"""
+        # Arrange
+        config = {"llm": {}}
+        service = LLMService(config)
+        await service.initialize()
+        service.register_adapter(MockAdapter())
+        
+        messages = [{"role": "user", "content": "Hello"}]
+        
+        # Act
+        chunks = []
+        contents = []
+        async for chunk in service.stream_chat(messages, reuse_response=True):
+            chunks.append(chunk)
+            contents.append(chunk.content)
+        
+        # Assert
+        assert contents[0] == "Mock response"
+        assert all(chunk is chunks[0] for chunk in chunks)
+    
+    async def test_check_adapter_health_uses_cache(self):
+        """测试健康检查结果在缓存有效期内复用，use_cache=False时重新检查"""
+        # Arrange
+        config = {"llm": {"auto_discover_adapters": False, "health_check": {"cache_ttl": 60.0}}}
+        service = LLMService(config)
+        await service.initialize()
+        adapter = MockAdapter()
+        adapter.health_check = AsyncMock(side_effect=RuntimeError("down"))
+        service.register_adapter(adapter)
+        service.register_adapter(DefaultMockAdapter())
+        
+        # Act
+        first = await service.check_adapter_health()
+        second = await service.check_adapter_health()
+        await service.check_adapter_health(use_cache=False)
+        
+        # Assert
+        assert list(first) == ["mock-adapter", "default-adapter"]
+        assert first["mock-adapter"].status == HealthStatus.UNHEALTHY
+        assert second["mock-adapter"] is first["mock-adapter"]
+        assert adapter.health_check.await_count == 2
+    
+    async def test_check_adapter_health_respects_concurrency(self):
+        """测试同时进行的健康检查数不超过health_check.concurrency"""
+        # Arrange
+        config = {"llm": {"auto_discover_adapters": False, "health_check": {"concurrency": 1}}}
+        service = LLMService(config)
+        await service.initialize()
+        running = []
+        peak = []
+        
+        async def health_check():
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0)
+            running.pop()
+            return await BaseLLMAdapter.health_check(adapter)
+        
+        adapter = MockAdapter()
+        other = DefaultMockAdapter()
+        adapter.health_check = health_check
+        other.health_check = health_check
+        service.register_adapter(adapter)
+        service.register_adapter(other)
+        
+        # Act
+        results = await service.check_adapter_health()
+        
+        # Assert
+        assert len(results) == 2
+        assert max(peak) == 1
+    
+    async def test_get_healthy_adapters_keeps_registration_order(self):
+        """测试健康适配器按注册顺序返回，并复用健康检查缓存"""
+        # Arrange
+        service = LLMService({"llm": {"auto_discover_adapters": False}})
+        await service.initialize()
+        unhealthy = MockAdapter()
+        unhealthy.health_check = AsyncMock(side_effect=RuntimeError("down"))
+        service.register_adapter(unhealthy)
+        healthy_adapter = DefaultMockAdapter()
+        await healthy_adapter.initialize()
+        service.register_adapter(healthy_adapter)
+        await service.check_adapter_health(adapter_name="mock-adapter")
+        
+        # Act
+        healthy = await service.get_healthy_adapters()
+        
+        # Assert
+        assert healthy == ["default-adapter"]
+        assert unhealthy.health_check.await_count == 1
+    
+    async def test_initialize_preloads_tokenizer(self):
+        """测试启用preload_tokenizer时初始化预加载默认模型编码器，失败不影响初始化"""
+        # Arrange
+        config = {"llm": {
+            "default_model": "gpt-4",
+            "auto_discover_adapters": False,
+            "performance": {"preload_tokenizer": True},
+        }}
+        service = LLMService(config)
+        
+        # Act
+        with patch.object(TokenCounter, "preload", side_effect=OSError("offline")) as preload:
+            await service.initialize()
+        
+        # Assert
+        preload.assert_called_once_with(["gpt-4"])
+        assert service.is_initialized
+    
+    async def test_failure_traceback_is_sampled(self):
+        """测试采样窗口内只为前几次失败记录完整堆栈"""
+        # Arrange
+        service = LLMService({"llm": {"auto_discover_adapters": False}})
+        
+        # Act
+        sampled = [service._sample_traceback() for _ in range(8)]
+        
+        # Assert
+        assert sampled == [True] * 5 + [False] * 3
+    
+    async def test_create_context_shares_token_counter(self):
+        """测试服务创建的对话上下文共享服务的Token计数器"""
+        # Arrange
+        service = LLMService({"llm": {"auto_discover_adapters": False}})
+        
+        # Act
+        context = service.create_context(max_messages=10)
+        
+        # Assert
+        assert context._token_counter is service.get_token_counter()
+    
     async def test_calculate_tokens(self):
         """测试Token计算"""
         # Arrange
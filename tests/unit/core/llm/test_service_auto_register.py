@@ -3,6 +3,7 @@
 功能描述：测试LLMService的自动发现和注册功能
 """
 
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, patch
 from core.llm.service import LLMService
@@ -96,3 +97,146 @@ class TestLLMServiceAutoRegister:
         # Assert
         # 测试_get_adapter方法（通过chat方法间接测试）
         # 注意：需要Mock适配器的实际调用
+    
+    async def test_auto_register_failure_does_not_block_others(self):
+        """测试单个适配器创建失败不影响其他适配器注册"""
+        # Arrange
+        config = {
+            "llm": {
+                "auto_discover_adapters": True,
+                "adapters": {
+                    "qwen-adapter": {"api_key": "test-key"},
+                    "deepseek-adapter": {"api_key": "test-key"}
+                }
+            }
+        }
+        service = LLMService(config)
+        original_create = service._registry.create_adapter
+        
+        async def create_adapter(adapter_name, config, connection_pool=None, global_config=None):
+            if adapter_name == "deepseek-adapter":
+                raise RuntimeError("初始化失败")
+            return await original_create(
+                adapter_name, config, connection_pool=connection_pool, global_config=global_config
+            )
+        
+        # Act
+        with patch.object(service._registry, "create_adapter", side_effect=create_adapter):
+            await service.initialize()
+        
+        # Assert
+        assert "qwen-adapter" in service._adapters
+        assert "deepseek-adapter" not in service._adapters
+    
+    async def test_adapters_are_created_concurrently(self):
+        """测试适配器并发创建：所有创建都开始后才有创建完成，注册顺序保持发现顺序"""
+        # Arrange
+        config = {
+            "llm": {
+                "auto_discover_adapters": True,
+                "adapters": {
+                    "qwen-adapter": {"api_key": "test-key"},
+                    "deepseek-adapter": {"api_key": "test-key"}
+                }
+            }
+        }
+        service = LLMService(config)
+        original_create = service._registry.create_adapter
+        started = []
+        all_started = asyncio.Event()
+        
+        async def create_adapter(adapter_name, config, connection_pool=None, global_config=None):
+            started.append(adapter_name)
+            if len(started) == 2:
+                all_started.set()
+            # 串行创建时第一个创建会一直等待，由超时暴露
+            await asyncio.wait_for(all_started.wait(), timeout=1.0)
+            return await original_create(
+                adapter_name, config, connection_pool=connection_pool, global_config=global_config
+            )
+        
+        # Act
+        with patch.object(service._registry, "create_adapter", side_effect=create_adapter):
+            await service.initialize()
+        
+        # Assert
+        assert set(service._adapters) == {"qwen-adapter", "deepseek-adapter"}
+        assert list(service._adapters) == [
+            name for name in service._registry.get_available_adapters() if name in service._adapters
+        ]
+    
+    async def test_adapter_config_is_copied_and_global_config_passed(self):
+        """测试适配器收到配置副本且服务配置不被修改，全局配置通过global_config单独传入"""
+        # Arrange
+        qwen_config = {"api_key": "test-key"}
+        config = {
+            "llm": {
+                "auto_discover_adapters": True,
+                "timeout": 42.0,
+                "adapters": {"qwen-adapter": qwen_config}
+            }
+        }
+        service = LLMService(config)
+        
+        # Act
+        await service.initialize()
+        
+        # Assert
+        adapter = service._adapters["qwen-adapter"]
+        assert qwen_config == {"api_key": "test-key"}
+        assert adapter._config == qwen_config
+        assert adapter._config is not qwen_config
+        assert adapter._global_config is service._config
+        assert adapter._client.timeout.read == 42.0
+    
+    async def test_failed_adapter_is_not_retried_during_backoff(self):
+        """测试注册失败的适配器在退避期内不会重复创建"""
+        # Arrange
+        config = {
+            "llm": {
+                "auto_discover_adapters": True,
+                "adapters": {
+                    "deepseek-adapter": {"api_key": "test-key"}
+                }
+            }
+        }
+        service = LLMService(config)
+        attempted = []
+        
+        async def create_adapter(adapter_name, config, connection_pool=None, global_config=None):
+            attempted.append(adapter_name)
+            raise RuntimeError("初始化失败")
+        
+        # Act
+        with patch.object(service._registry, "create_adapter", side_effect=create_adapter):
+            await service.initialize()
+            await service._auto_register_adapters()
+        
+        # Assert
+        assert attempted.count("deepseek-adapter") == 1
+        assert service._failed_adapters["deepseek-adapter"][1] == 1
+    
+    async def test_model_dispatch_is_precomputed(self):
+        """测试自动注册后按默认模型和模型映射预先建立模型分发表"""
+        # Arrange
+        config = {
+            "llm": {
+                "auto_discover_adapters": True,
+                "default_model": "qwen-plus",
+                "model_adapter_mapping": {"my-model": "qwen-adapter"},
+                "adapters": {
+                    "qwen-adapter": {"api_key": "test-key"}
+                }
+            }
+        }
+        service = LLMService(config)
+        
+        # Act
+        await service.initialize()
+        
+        # Assert
+        adapter = service._adapters["qwen-adapter"]
+        assert service._adapter_cache["qwen-plus"] is adapter
+        assert service._adapter_cache["my-model"] is adapter
+        assert service._adapter_cache[None] is adapter
+        assert await service._get_adapter("my-model") is adapter
@@ -0,0 +1,39 @@
+"""
+测试模块：请求体序列化工具测试
+功能描述：测试json_request_kwargs在有无orjson时生成的请求参数
+"""
+
+import json
+import pytest
+from unittest.mock import patch
+from core.llm.utils import json_body
+from core.llm.utils.json_body import json_request_kwargs
+
+
+class TestJsonRequestKwargs:
+    """json_request_kwargs测试类"""
+    
+    def test_fallback_to_httpx_json(self):
+        """测试未安装orjson时退回httpx的json参数"""
+        # Arrange
+        data = {"model": "gpt-4", "messages": [{"role": "user", "content": "你好"}]}
+        
+        # Act
+        with patch.object(json_body, "ORJSON_AVAILABLE", False):
+            kwargs = json_request_kwargs(data)
+        
+        # Assert
+        assert kwargs == {"json": data}
+    
+    @pytest.mark.skipif(not json_body.ORJSON_AVAILABLE, reason="未安装orjson")
+    def test_orjson_body_round_trips(self):
+        """测试orjson序列化的请求体可还原且带JSON请求头"""
+        # Arrange
+        data = {"model": "gpt-4", "messages": [{"role": "user", "content": "你好"}]}
+        
+        # Act
+        kwargs = json_request_kwargs(data)
+        
+        # Assert
+        assert json.loads(kwargs["content"]) == data
+        assert kwargs["headers"]["Content-Type"] == "application/json"
@@ -5,11 +5,13 @@
 
 import pytest
 import asyncio
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from httpx import HTTPStatusError, Response
 from core.llm.utils.retry import (
     is_retryable_error,
+    retry_llm_call,
     retry_with_backoff,
+    _wait_schedule,
 )
 from core.base.adapter import AdapterCallError
 
@@ -135,3 +137,51 @@ class TestRetryUtils:
             await retry_with_backoff(mock_func, max_attempts=3, initial_wait=0.1)
         
         assert call_count == 1  # 只调用一次，不重试
+    
+    async def test_retry_llm_call_decorator(self):
+        """测试重试装饰器对可重试错误重试，并透传调用参数"""
+        calls = []
+        
+        @retry_llm_call(max_attempts=2, initial_wait=0.01)
+        async def call_api(value, suffix=""):
+            calls.append(value)
+            if len(calls) == 1:
+                raise ConnectionError("Connection failed")
+            return value + suffix
+        
+        result = await call_api("ok", suffix="!")
+        
+        assert result == "ok!"
+        assert calls == ["ok", "ok"]
+        assert call_api.__name__ == "call_api"
+    
+    def test_wait_schedule_is_capped(self):
+        """测试第一次重试不等待，之后按指数增长且不超过最大等待时间"""
+        assert _wait_schedule(5, 1.0, 5.0, 2.0) == (0.0, 1.0, 2.0, 4.0, 5.0)
+    
+    async def test_retry_with_backoff_applies_jitter(self):
+        """测试第一次重试立即进行，之后的等待时间在50%-100%之间抖动"""
+        calls = 0
+        
+        async def mock_func():
+            nonlocal calls
+            calls += 1
+            raise ConnectionError("Connection failed")
+        
+        with patch("core.llm.utils.retry.asyncio.sleep", new=AsyncMock()) as sleep:
+            with pytest.raises(ConnectionError):
+                await retry_with_backoff(mock_func, max_attempts=3, initial_wait=1.0)
+        
+        waits = [call.args[0] for call in sleep.await_args_list]
+        assert waits[0] == 0
+        assert 0.5 <= waits[1] <= 1.0
+        assert 1.0 <= waits[2] <= 2.0
+    
+    def test_is_retryable_error_status_table(self):
+        """测试全部5xx和429可重试，其他4xx不可重试"""
+        def status_error(code):
+            request = MagicMock()
+            return HTTPStatusError("error", request=request, response=Response(code, request=request))
+        
+        assert all(is_retryable_error(status_error(code)) for code in (429, 500, 501, 599))
+        assert not any(is_retryable_error(status_error(code)) for code in (400, 401, 404, 422))
@@ -0,0 +1,103 @@
+"""
+测试模块：流式响应块合并测试
+功能描述：测试batch_stream_chunks按字符数和时间窗口合并响应块
+"""
+
+import asyncio
+import pytest
+from core.llm.utils.stream_batcher import batch_stream_chunks
+
+
+async def _stream(chunks, delays=None):
+    """按给定间隔依次产生响应块"""
+    for i, chunk in enumerate(chunks):
+        if delays:
+            await asyncio.sleep(delays[i])
+        yield chunk
+
+
+@pytest.mark.asyncio
+class TestBatchStreamChunks:
+    """batch_stream_chunks测试类"""
+    
+    async def test_merges_by_char_threshold(self):
+        """测试累计字符数达到阈值时发送合并块，最后一块携带usage"""
+        # Arrange
+        chunks = [{"content": c} for c in ["ab", "cd", "ef", "g"]]
+        chunks.append({"content": "", "usage": {"total_tokens": 5}, "metadata": {"finish_reason": "stop"}})
+        
+        # Act
+        merged = [c async for c in batch_stream_chunks(_stream(chunks), max_chars=4, max_interval=1.0)]
+        
+        # Assert
+        assert [c["content"] for c in merged] == ["abcd", "efg"]
+        assert merged[0]["metadata"]["sub_chunks"] == ["ab", "cd"]
+        assert merged[-1]["usage"] == {"total_tokens": 5}
+        assert merged[-1]["metadata"]["finish_reason"] == "stop"
+    
+    async def test_flushes_when_interval_expires(self):
+        """测试上游较慢时超过合并窗口即发送已缓冲内容"""
+        # Arrange
+        chunks = [{"content": "a"}, {"content": "b"}, {"content": "c"}]
+        
+        # Act
+        merged = [
+            c async for c in batch_stream_chunks(
+                _stream(chunks, delays=[0, 0, 0.1]), max_chars=100, max_interval=0.02
+            )
+        ]
+        
+        # Assert
+        assert [c["content"] for c in merged] == ["ab", "c"]
+    
+    async def test_single_chunk_is_passed_through(self):
+        """测试只有一个块时原样返回"""
+        # Arrange
+        chunk = {"content": "hello", "usage": {}, "metadata": {}}
+        
+        # Act
+        merged = [c async for c in batch_stream_chunks(_stream([chunk]))]
+        
+        # Assert
+        assert merged == [chunk]
+    
+    async def test_metadata_is_merged_across_chunks(self):
+        """测试合并块保留前面块的metadata，同名键取后出现的值"""
+        # Arrange
+        chunks = [
+            {"content": "a", "metadata": {"id": "msg-1", "index": 0}},
+            {"content": "b", "metadata": {"index": 1}},
+            {"content": "", "metadata": {"finish_reason": "stop"}},
+        ]
+        
+        # Act
+        merged = [c async for c in batch_stream_chunks(_stream(chunks), max_chars=100, max_interval=1.0)]
+        
+        # Assert
+        assert len(merged) == 1
+        assert merged[0]["metadata"]["id"] == "msg-1"
+        assert merged[0]["metadata"]["index"] == 1
+        assert merged[0]["metadata"]["finish_reason"] == "stop"
+    
+    async def test_upstream_is_closed_on_early_exit(self):
+        """测试调用方提前退出时取消等待中的读取并关闭上游生成器"""
+        # Arrange
+        closed = asyncio.Event()
+        
+        async def upstream():
+            try:
+                yield {"content": "a"}
+                await asyncio.sleep(10)
+                yield {"content": "b"}
+            finally:
+                closed.set()
+        
+        batcher = batch_stream_chunks(upstream(), max_chars=100, max_interval=0.01)
+        
+        # Act
+        first = await batcher.__anext__()
+        await batcher.aclose()
+        
+        # Assert
+        assert first["content"] == "a"
+        assert closed.is_set()
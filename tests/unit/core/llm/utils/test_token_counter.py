@@ -4,8 +4,19 @@
 """
 
 import pytest
+from unittest.mock import MagicMock, patch
 
-from core.llm.utils.token_counter import TokenCounter
+from core.llm.utils.token_counter import TokenCounter, _count_cache, _resolve_encoding
+
+
+@pytest.fixture(autouse=True)
+def clear_shared_caches():
+    """清空进程内共享的编码器和计数缓存，避免Mock编码器的结果在测试间残留"""
+    _count_cache.clear()
+    _resolve_encoding.cache_clear()
+    yield
+    _count_cache.clear()
+    _resolve_encoding.cache_clear()
 
 
 class TestTokenCounter:
@@ -37,3 +48,94 @@ class TestTokenCounter:
         t2 = counter.count_text_tokens("Hello", model="gpt-3.5-turbo")
         assert t1 == t2
 
+    def test_count_batch_tokens(self):
+        """批量计数应与逐条计数一致，空文本返回0"""
+        counter = TokenCounter()
+        texts = ["Hello, world!", "", "How are you?"]
+        counts = counter.count_batch_tokens(texts, model="gpt-3.5-turbo")
+        assert counts == [counter.count_text_tokens(t, model="gpt-3.5-turbo") for t in texts]
+        assert counts[1] == 0
+
+    def test_count_batch_tokens_large_batch(self):
+        """大批量走线程池并行编码，结果顺序与逐条计数一致"""
+        counter = TokenCounter()
+        texts = [f"message number {i} " * (i % 5 + 1) for i in range(64)]
+        counts = counter.count_batch_tokens(texts, model="gpt-3.5-turbo")
+        assert counts == [counter.count_text_tokens(t, model="gpt-3.5-turbo") for t in texts]
+
+    def test_count_batch_tokens_chunks_large_batch(self):
+        """大批量按线程数分段提交，每段一个任务，结果顺序不变"""
+        counter = TokenCounter()
+        encoding = MagicMock()
+        encoding.encode_ordinary.side_effect = lambda text: text.split()
+        # 批内文本互不相同，去重后仍达到并行阈值
+        texts = [f"{i} " * (i % 7 + 1) for i in range(100)]
+        executor = MagicMock()
+        executor.map.side_effect = map
+        with patch.object(TokenCounter, "_get_encoding", return_value=encoding), \
+                patch("core.llm.utils.token_counter._BATCH_WORKERS", 4), \
+                patch("core.llm.utils.token_counter._get_batch_executor", return_value=executor):
+            counts = counter.count_batch_tokens(texts, model="gpt-4")
+        assert counts == [i % 7 + 1 for i in range(100)]
+        chunks = list(executor.map.call_args.args[1])
+        assert [len(chunk) for chunk in chunks] == [25, 25, 25, 25]
+
+    def test_encodings_are_shared_across_counters(self):
+        """不同计数器实例共享进程内编码器缓存，未知模型回退cl100k_base"""
+        fallback = MagicMock()
+        with patch("tiktoken.encoding_for_model", side_effect=KeyError("unknown")) as for_model, \
+                patch("tiktoken.get_encoding", return_value=fallback) as get_encoding:
+            first = TokenCounter()._get_encoding(" custom-model ")
+            second = TokenCounter()._get_encoding("custom-model")
+        assert first is second is fallback
+        assert for_model.call_count == 1
+        assert get_encoding.call_count == 1
+        assert TokenCounter.stats()["encoding_hits"] == 1
+
+    def test_count_batch_tokens_deduplicates_texts(self):
+        """批内重复文本只编码一次，结果回填到每个出现位置"""
+        counter = TokenCounter()
+        encoding = MagicMock()
+        encoding.encode_ordinary.side_effect = lambda text: text.split()
+        texts = ["system prompt text", "question one", "system prompt text", "", "system prompt text"]
+        with patch.object(TokenCounter, "_get_encoding", return_value=encoding):
+            counts = counter.count_batch_tokens(texts, model="gpt-4")
+        assert counts == [3, 2, 3, 0, 3]
+        assert encoding.encode_ordinary.call_count == 2
+
+    def test_estimate_tokens(self):
+        """估算不加载编码器：ASCII按编码族字符数，非ASCII按UTF-8字节数，向上取整"""
+        counter = TokenCounter()
+        with patch.object(TokenCounter, "_get_encoding") as get_encoding:
+            assert counter.estimate_tokens("") == 0
+            assert counter.estimate_tokens("hi") == 1
+            assert counter.estimate_tokens("a" * 40, model="gpt-4") == 10
+            assert counter.estimate_tokens("a" * 35, model="gpt-4o") == 10
+            assert counter.estimate_tokens("你好世界") == 4
+            assert counter.count_text_tokens("a" * 40, model="unknown-model", precise=False) == 10
+        get_encoding.assert_not_called()
+
+    def test_preload_resolves_encodings(self):
+        """预加载为每个模型解析一次编码器"""
+        counter = TokenCounter()
+        with patch.object(TokenCounter, "_get_encoding") as get_encoding:
+            counter.preload(["gpt-4", None])
+        assert [c.args[0] for c in get_encoding.call_args_list] == ["gpt-4", None]
+
+    def test_repeated_text_counts_are_cached(self):
+        """重复文本的计数命中缓存，不再调用编码器；两种编码方式分别缓存"""
+        counter = TokenCounter()
+        encoding = MagicMock()
+        encoding.encode.side_effect = lambda text: text.split()
+        encoding.encode_ordinary.side_effect = lambda text: text.split()
+        system_prompt = "you are a helpful assistant"
+        with patch.object(TokenCounter, "_get_encoding", return_value=encoding):
+            first = counter.count_text_tokens(system_prompt, model="gpt-4")
+            second = counter.count_text_tokens(system_prompt, model="gpt-4")
+            counts = counter.count_batch_tokens([system_prompt, "hello world"], model="gpt-4")
+            again = counter.count_batch_tokens([system_prompt], model="gpt-4")
+        assert first == second == 5
+        assert counts == [5, 2]
+        assert again == [5]
+        assert encoding.encode.call_count == 1
+        assert encoding.encode_ordinary.call_count == 2
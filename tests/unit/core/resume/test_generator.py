@@ -2,8 +2,10 @@
 ResumeGenerator单元测试
 """
 
+import asyncio
 import pytest
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import AsyncMock, MagicMock, patch
 import tempfile
 import shutil
@@ -71,6 +73,25 @@ class TestResumeGenerator:
         assert generator._initialized is True
         assert generator.jinja_env is not None
     
+    @pytest.mark.asyncio
+    async def test_initialize_precompiles_templates(self, generator_config):
+        """测试初始化时预编译模板，生成时不再加载"""
+        # Arrange
+        template_dir = Path(generator_config["resume"]["template_dir"])
+        (template_dir / "classic").mkdir()
+        (template_dir / "classic" / "template.html").write_text("<h1>{{ resume.personal_info.name }}</h1>")
+        generator = ResumeGenerator(generator_config)
+        
+        # Act
+        await generator.initialize()
+        
+        # Assert
+        assert set(generator._template_cache) == {"classic"}
+        with patch.object(generator.jinja_env, "get_template") as get_template:
+            template = await generator._load_template("classic")
+        assert template is generator._template_cache["classic"]
+        get_template.assert_not_called()
+    
     @pytest.mark.asyncio
     async def test_initialize_no_jinja2(self, generator_config):
         """测试Jinja2未安装"""
@@ -111,6 +132,72 @@ class TestResumeGenerator:
                 await generator.generate(sample_resume_data, "test", "pdf")
             assert "WeasyPrint未安装" in str(exc_info.value)
     
+    @pytest.mark.asyncio
+    async def test_convert_to_pdf_runs_in_executor(self, generator):
+        """测试PDF在进程池中渲染，验证通过后才写入最终路径"""
+        # Arrange
+        await generator.initialize()
+        generator._pdf_pool = ThreadPoolExecutor(max_workers=1)
+        
+        def fake_render(html_content, pdf_path, base_url):
+            Path(pdf_path).write_bytes(b"%PDF-1.7 " + html_content.encode())
+        
+        # Act
+        with patch('core.resume.generator.WEASYPRINT_AVAILABLE', True), \
+                patch('core.resume.generator.HTML', MagicMock()), \
+                patch('core.resume.generator._render_pdf', fake_render):
+            file_path = await generator._convert_to_pdf("<html></html>", "resume1")
+        await generator.cleanup()
+        
+        # Assert
+        assert Path(file_path).read_bytes().startswith(b"%PDF")
+        assert not Path(file_path).with_suffix(".pdf.tmp").exists()
+        assert generator._pdf_pool is None
+    
+    @pytest.mark.asyncio
+    async def test_convert_to_pdf_invalid_file_removed(self, generator):
+        """测试渲染结果无效时删除临时文件且不产生PDF"""
+        # Arrange
+        await generator.initialize()
+        generator._pdf_pool = ThreadPoolExecutor(max_workers=1)
+        
+        def fake_render(html_content, pdf_path, base_url):
+            Path(pdf_path).write_bytes(b"broken")
+        
+        # Act
+        with patch('core.resume.generator.WEASYPRINT_AVAILABLE', True), \
+                patch('core.resume.generator.HTML', MagicMock()), \
+                patch('core.resume.generator._render_pdf', fake_render):
+            with pytest.raises(ResumeGenerateError) as exc_info:
+                await generator._convert_to_pdf("<html></html>", "resume2")
+        await generator.cleanup()
+        
+        # Assert
+        assert "文件格式无效" in str(exc_info.value)
+        assert list(Path(generator.output_dir).iterdir()) == []
+    
+    @pytest.mark.asyncio
+    async def test_convert_to_pdf_cancelled_removes_tmp(self, generator):
+        """测试渲染被取消时删除临时文件"""
+        # Arrange
+        await generator.initialize()
+        generator._pdf_pool = ThreadPoolExecutor(max_workers=1)
+        
+        def fake_render(html_content, pdf_path, base_url):
+            Path(pdf_path).write_bytes(b"%PDF-1.7")
+        
+        # Act
+        with patch('core.resume.generator.WEASYPRINT_AVAILABLE', True), \
+                patch('core.resume.generator.HTML', MagicMock()), \
+                patch('core.resume.generator._render_pdf', fake_render), \
+                patch('core.resume.generator.os.replace', side_effect=asyncio.CancelledError):
+            with pytest.raises(asyncio.CancelledError):
+                await generator._convert_to_pdf("<html></html>", "resume3")
+        await generator.cleanup()
+        
+        # Assert
+        assert list(Path(generator.output_dir).iterdir()) == []
+    
     @pytest.mark.asyncio
     async def test_generate_invalid_format(self, generator, sample_resume_data):
         """测试无效的输出格式"""